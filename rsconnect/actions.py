@@ -39,6 +39,7 @@ from .bundle import (
 from .environment import Environment
 from .environment_r import REnvironment
 from .exception import RSConnectException
+from .http_timing import RequestTimingStats, add_request_timing_hook, remove_request_timing_hook
 from .log import VERBOSE, logger
 from .models import AppMode, AppModes
 
@@ -96,6 +97,30 @@ def set_verbosity(verbose: int):
         logger.setLevel(VERBOSE)
     else:
         logger.setLevel(logging.DEBUG)
+    if verbose:
+        _report_request_timings()
+
+
+def _report_request_timings():
+    """
+    Collect the timings of the HTTP requests made by the running command, and log a
+    summary table of them when it finishes.
+    """
+    ctx = click.get_current_context(silent=True)
+    if ctx is None or "rsconnect.request_timings" in ctx.meta:
+        return
+    stats = ctx.meta["rsconnect.request_timings"] = RequestTimingStats()
+    add_request_timing_hook(stats)
+
+    def report():
+        remove_request_timing_hook(stats)
+        lines = stats.summary()
+        if lines:
+            logger.log(VERBOSE, "HTTP request timings:")
+            for line in lines:
+                logger.log(VERBOSE, line)
+
+    ctx.call_on_close(report)
 
 
 def _verify_server(connect_server: api.RSConnectServer):
@@ -503,6 +528,7 @@ def create_quarto_deployment_bundle(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> typing.IO[bytes]:
     """
     Create an in-memory bundle, ready to deploy.
@@ -523,6 +549,7 @@ def create_quarto_deployment_bundle(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: the bundle.
     """
     if app_mode is None:
@@ -539,6 +566,7 @@ def create_quarto_deployment_bundle(
         env_management_py,
         env_management_r,
         r_environment,
+        use_checksum_cache,
     )
 
 
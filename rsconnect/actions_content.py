@@ -7,13 +7,14 @@ from __future__ import annotations
 import json
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from typing import Iterator, Literal, Optional, Sequence, cast, Union
 
 import semver
 
-from .api import RSConnectServer, SPCSConnectServer, RSConnectClient, emit_task_log
+from .api import RSConnectServer, SPCSConnectServer, RSConnectClient, TaskWatcher
 from .exception import RSConnectException
 from .log import logger
 from .metadata import ContentBuildStore, ContentItemWithBuildState
@@ -21,6 +22,7 @@ from .models import (
     BuildStatus,
     ContentGuidWithBundle,
     ContentItemV1,
+    TaskStatusV1,
     VersionSearchFilter,
 )
 
@@ -179,7 +181,6 @@ def build_start(
         return
 
     build_monitor = None
-    content_executor = None
     try:
         logger.info("Starting content build (%s)..." % connect_server.url)
         build_store.set_build_running(True)
@@ -192,25 +193,30 @@ def build_start(
         #   this would help resolve a race condidition in the packrat cache.
         #   or we could just re-run the build...
 
-        # https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor-example
-        #   spawn a pool of worker threads to perform the content builds
-        content_executor = ThreadPoolExecutor(max_workers=parallelism)
-        build_result_futures = {
-            content_executor.submit(_build_content_item, connect_server, content, poll_wait): ContentGuidWithBundle(
-                content["guid"], content["bundle_id"]
-            )
-            for content in content_items
-        }
-        for future in as_completed(build_result_futures):
-            guid_with_bundle = build_result_futures[future]
-            try:
-                future.result()
-            except Exception as exc:
-                # catch any unexpected exceptions from the future thread
-                build_store.set_content_item_build_status(guid_with_bundle.guid, BuildStatus.ERROR)
-                logger.error("%s generated an exception: %s" % (guid_with_bundle, exc))
-                if debug:
-                    logger.error(traceback.format_exc())
+        # Builds are started from this thread, up to `parallelism` at a time, and a
+        # single TaskWatcher thread follows all of the running build tasks over one
+        # connection.
+        pending = deque(content_items)
+        running: dict[Future[TaskStatusV1], ContentGuidWithBundle] = {}
+        with RSConnectClient(connect_server) as client, TaskWatcher(connect_server, poll_wait=poll_wait) as watcher:
+            while pending or running:
+                while pending and len(running) < parallelism and not build_store.aborted():
+                    content = pending.popleft()
+                    guid_with_bundle = ContentGuidWithBundle(content["guid"], content["bundle_id"])
+                    try:
+                        running[_start_content_build(client, watcher, build_store, content)] = guid_with_bundle
+                    except Exception as exc:
+                        _build_exception(build_store, guid_with_bundle, exc, debug)
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    guid_with_bundle = running.pop(future)
+                    try:
+                        _finish_content_build(build_store, guid_with_bundle.guid, future)
+                    except Exception as exc:
+                        _build_exception(build_store, guid_with_bundle, exc, debug)
 
         # all content builds are finished, mark the build as complete
         build_store.set_build_running(False)
@@ -245,12 +251,20 @@ def build_start(
         # there's no guarantee that the content_executor or build_monitor
         # were allowed to shut down gracefully, they may have been interrupted.
         build_store.set_build_running(False)
-        if content_executor:
-            content_executor.shutdown(wait=False)
         if build_monitor:
             build_monitor.shutdown()
 
 
+def _build_exception(
+    build_store: ContentBuildStore, guid_with_bundle: ContentGuidWithBundle, exc: Exception, debug: bool
+):
+    # catch any unexpected exceptions from starting or following a build
+    build_store.set_content_item_build_status(guid_with_bundle.guid, BuildStatus.ERROR)
+    logger.error("%s generated an exception: %s" % (guid_with_bundle, exc))
+    if debug:
+        logger.error(traceback.format_exc())
+
+
 def _monitor_build(
     connect_server: Union[RSConnectServer, SPCSConnectServer], content_items: list[ContentItemWithBuildState]
 ):
@@ -298,60 +312,53 @@ def _monitor_build(
     return True
 
 
-def _build_content_item(
-    connect_server: Union[RSConnectServer, SPCSConnectServer], content: ContentItemWithBuildState, poll_wait: int
-):
-    build_store = ensure_content_build_store(connect_server)
-    with RSConnectClient(connect_server) as client:
-        # Pending futures will still try to execute when ThreadPoolExecutor.shutdown() is called
-        # so just exit immediately if the current build has been aborted.
-        # ThreadPoolExecutor.shutdown(cancel_futures=) isnt available until py3.9
-        if build_store.aborted():
-            return
-
-        guid = content["guid"]
-        logger.info("Starting build: %s" % guid)
-        build_store.update_content_item_last_build_time(guid)
-        build_store.set_content_item_build_status(guid, BuildStatus.RUNNING)
-        build_store.ensure_logs_dir(guid)
-        try:
-            task_result = client.content_build(guid, content.get("bundle_id"))
-            task_id = task_result["task_id"]
-        except RSConnectException:
-            # if we can't submit the build to connect then there is no log file
-            # created on disk. When this happens we need to set the last_build_log
-            # to None so its clear that we submitted a build but it never started
-            build_store.update_content_item_last_build_log(guid, None)
-            raise
-        log_file = build_store.get_build_log(guid, task_id)
-        if log_file is None:
-            raise RSConnectException("Log file not found for content: %s" % guid)
-        with open(log_file, "w") as log:
-
-            def write_log(line: str):
-                log.write("%s\n" % line)
-
-            _, _, task = emit_task_log(
-                connect_server,
-                guid,
-                task_id,
-                log_callback=write_log,
-                abort_func=build_store.aborted,
-                poll_wait=poll_wait,
-                raise_on_error=False,
-            )
-        build_store.update_content_item_last_build_log(guid, log_file)
-
-        if build_store.aborted():
-            return
-
-        build_store.set_content_item_last_build_task_result(guid, task)
-        if task["code"] != 0:
-            logger.error("Build failed: %s" % guid)
-            build_store.set_content_item_build_status(guid, BuildStatus.ERROR)
-        else:
-            logger.info("Build succeeded: %s" % guid)
-            build_store.set_content_item_build_status(guid, BuildStatus.COMPLETE)
+def _start_content_build(
+    client: RSConnectClient, watcher: TaskWatcher, build_store: ContentBuildStore, content: ContentItemWithBuildState
+) -> Future[TaskStatusV1]:
+    """Start building a content item, and follow the build task with the watcher."""
+    guid = content["guid"]
+    logger.info("Starting build: %s" % guid)
+    build_store.update_content_item_last_build_time(guid)
+    build_store.set_content_item_build_status(guid, BuildStatus.RUNNING)
+    build_store.ensure_logs_dir(guid)
+    try:
+        task_result = client.content_build(guid, content.get("bundle_id"))
+        task_id = task_result["task_id"]
+    except RSConnectException:
+        # if we can't submit the build to connect then there is no log file
+        # created on disk. When this happens we need to set the last_build_log
+        # to None so its clear that we submitted a build but it never started
+        build_store.update_content_item_last_build_log(guid, None)
+        raise
+    log_file = build_store.get_build_log(guid, task_id)
+    if log_file is None:
+        raise RSConnectException("Log file not found for content: %s" % guid)
+    open(log_file, "w").close()
+
+    # The log is opened for each poll's output rather than held open, so that
+    # hundreds of builds can run at once without running out of file handles.
+    def write_log(lines: Sequence[str]):
+        with open(log_file, "a") as log:
+            log.writelines("%s\n" % line for line in lines)
+
+    future = watcher.watch(task_id, write_log, abort_func=build_store.aborted)
+    build_store.update_content_item_last_build_log(guid, log_file)
+    return future
+
+
+def _finish_content_build(build_store: ContentBuildStore, guid: str, future: Future[TaskStatusV1]):
+    """Record the result of a build followed by _start_content_build()."""
+    if build_store.aborted():
+        return
+
+    task = future.result()
+    build_store.set_content_item_last_build_task_result(guid, task)
+    if task["code"] != 0:
+        logger.error("Build failed: %s" % guid)
+        build_store.set_content_item_build_status(guid, BuildStatus.ERROR)
+    else:
+        logger.info("Build succeeded: %s" % guid)
+        build_store.set_content_item_build_status(guid, BuildStatus.COMPLETE)
 
 
 def emit_build_log(
@@ -373,9 +380,34 @@ def emit_build_log(
         raise RSConnectException("Log file not found for content: %s" % guid)
 
 
-def download_bundle(connect_server: Union[RSConnectServer, SPCSConnectServer], guid_with_bundle: ContentGuidWithBundle):
+def _log_download_progress(label: str):
+    """
+    Make a download progress callback that logs every 10% (or every 100 MB, when the
+    size is unknown).
+    """
+    reported = [0]
+
+    def progress(received: int, total: Optional[int]):
+        step = received * 10 // total if total else received // (100 * 1024 * 1024)
+        if step > reported[0]:
+            reported[0] = step
+            if total:
+                logger.info("Downloaded %d%% of %s (%d of %d bytes)" % (step * 10, label, received, total))
+            else:
+                logger.info("Downloaded %d bytes of %s" % (received, label))
+
+    return progress
+
+
+def download_bundle(
+    connect_server: Union[RSConnectServer, SPCSConnectServer],
+    guid_with_bundle: ContentGuidWithBundle,
+    destination: Optional[str] = None,
+):
     """
     :param guid_with_bundle: models.ContentGuidWithBundle
+    :param destination: if given, the bundle is streamed to this file instead of being
+        returned in the response body.
     """
     with RSConnectClient(connect_server) as client:
         # bundle_id not provided so grab the latest
@@ -388,12 +420,15 @@ def download_bundle(connect_server: Union[RSConnectServer, SPCSConnectServer], g
                     "There is no current bundle available for this content: %s" % guid_with_bundle.guid
                 )
 
-        return client.download_bundle(guid_with_bundle.guid, guid_with_bundle.bundle_id)
+        progress = _log_download_progress(destination) if destination is not None else None
+        return client.download_bundle(guid_with_bundle.guid, guid_with_bundle.bundle_id, destination, progress)
 
 
-def download_lockfile(connect_server: Union[RSConnectServer, SPCSConnectServer], guid: str):
+def download_lockfile(
+    connect_server: Union[RSConnectServer, SPCSConnectServer], guid: str, destination: Optional[str] = None
+):
     with RSConnectClient(connect_server) as client:
-        return client.content_lockfile(guid)
+        return client.content_lockfile(guid, destination)
 
 
 def get_content(connect_server: Union[RSConnectServer, SPCSConnectServer], guid: str | list[str]):
@@ -4,18 +4,27 @@ Posit Connect API client and utility functions
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import binascii
+import contextlib
 import datetime
 import hashlib
+import heapq
 import hmac
+import itertools
 import json
+import logging
+import math
 import os
+import random
 import re
 import sys
+import threading
 import time
 import typing
 import webbrowser
+from concurrent.futures import Future, InvalidStateError
 from os.path import abspath, dirname
 from ssl import SSLError
 from typing import (
@@ -23,6 +32,7 @@ from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
+    Iterable,
     List,
     Literal,
     Mapping,
@@ -52,20 +62,24 @@ else:
     from typing_extensions import TypedDict
 
 from . import validation
-from .bundle import _default_title
+from .bundle import BundleFile, _default_title, bundle_cache, bundle_size_and_checksum
 from .certificates import read_certificate_file
+from .compression import DEFAULT_COMPRESSION_LEVEL
 from .environment import fake_module_file_from_directory
 from .exception import DeploymentFailedException, RSConnectException
+from .http_async import AsyncHTTPServer
 from .http_support import (
     CookieJar,
     HTTPResponse,
     HTTPServer,
     JsonData,
+    RetryPolicy,
+    _DownloadSink,
     append_to_path,
-    create_multipart_form_data,
+    create_multipart_form_data_stream,
 )
-from .log import cls_logged, connect_logger, console_logger, logger
-from .metadata import AppStore, ServerData, ServerStore
+from .log import VERBOSE, cls_logged, connect_logger, console_logger, logger
+from .metadata import AppStore, ServerData, ServerInfoCache, ServerStore
 from .models import (
     AppMode,
     AppModes,
@@ -94,7 +108,7 @@ from .models import (
     UserRecord,
 )
 from .snowflake import generate_jwt, get_parameters
-from .timeouts import get_task_timeout, get_task_timeout_help_message
+from .timeouts import get_request_timeout, get_task_timeout, get_task_timeout_help_message
 from .utils_package import compare_semvers
 
 if TYPE_CHECKING:
@@ -105,6 +119,19 @@ T = TypeVar("T")
 P = ParamSpec("P")
 
 
+def server_info_cache() -> Optional[ServerInfoCache]:
+    """
+    Return the cache of server settings for the running command, or None outside
+    of a command or when it was given --no-server-cache.
+    """
+    ctx = click.get_current_context(silent=True)
+    if ctx is None or ctx.meta.get("rsconnect.no_server_cache", True):
+        return None
+    if "rsconnect.server_info_cache" not in ctx.meta:
+        ctx.meta["rsconnect.server_info_cache"] = ServerInfoCache()
+    return ctx.meta["rsconnect.server_info_cache"]
+
+
 class AbstractRemoteServer:
     def __init__(self, url: str, remote_name: str):
         self.url = url
@@ -237,6 +264,8 @@ class RSConnectServer(AbstractRemoteServer):
         oauth_access_token: Optional[str] = None,
         oauth_client_id: Optional[str] = None,
         server_name: Optional[str] = None,
+        rate_limit: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
     ):
         super().__init__(url, "Posit Connect")
         self.api_key = api_key
@@ -246,6 +275,8 @@ class RSConnectServer(AbstractRemoteServer):
         self.oauth_access_token = oauth_access_token
         self.oauth_client_id = oauth_client_id
         self.server_name = server_name
+        self.rate_limit = rate_limit
+        self.max_in_flight = max_in_flight
         # This is specifically not None.
         self.cookie_jar = CookieJar()
         # for compatibility with RSconnectClient
@@ -267,11 +298,15 @@ class SPCSConnectServer(AbstractRemoteServer):
         snowflake_connection_name: Optional[str],
         insecure: bool = False,
         ca_data: Optional[str | bytes] = None,
+        rate_limit: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
     ):
         super().__init__(url, "Posit Connect (SPCS)")
         self.snowflake_connection_name = snowflake_connection_name
         self.insecure = insecure
         self.ca_data = ca_data
+        self.rate_limit = rate_limit
+        self.max_in_flight = max_in_flight
         # for compatibility with RSConnectClient
         self.cookie_jar = CookieJar()
         self.api_key = api_key
@@ -441,62 +476,40 @@ def server_supports_draft_deploy(server_version: Optional[str]) -> bool:
         return False
 
 
-class RSConnectClient(HTTPServer):
-    def __init__(self, server: Union[RSConnectServer, SPCSConnectServer], cookies: Optional[CookieJar] = None):
-        if cookies is None:
-            cookies = server.cookie_jar
-        super().__init__(
-            append_to_path(server.url, "__api__"),
-            server.insecure,
-            server.ca_data,
-            cookies,
-        )
-        self._server = server
+def _authorize_client(client: HTTPServer, server: Union[RSConnectServer, SPCSConnectServer]):
+    """Set the authorization headers a client needs for the given Connect server."""
+    if server.api_key:
+        client.key_authorization(server.api_key)
 
+    if server.bootstrap_jwt:
+        client.bootstrap_authorization(server.bootstrap_jwt)
+
+    if server.snowflake_connection_name and isinstance(server, SPCSConnectServer):
+        token = server.exchange_token()
+        client.snowflake_authorization(token)
         if server.api_key:
-            self.key_authorization(server.api_key)
+            client._headers["X-RSC-Authorization"] = server.api_key
 
-        if server.bootstrap_jwt:
-            self.bootstrap_authorization(server.bootstrap_jwt)
+    if (
+        isinstance(server, RSConnectServer)
+        and server.oauth_access_token
+        and not server.api_key
+        and not server.bootstrap_jwt
+    ):
+        client.authorization(f"Bearer {server.oauth_access_token}")
 
-        if server.snowflake_connection_name and isinstance(server, SPCSConnectServer):
-            token = server.exchange_token()
-            self.snowflake_authorization(token)
-            if server.api_key:
-                self._headers["X-RSC-Authorization"] = server.api_key
 
-        if (
-            isinstance(server, RSConnectServer)
-            and server.oauth_access_token
-            and not server.api_key
-            and not server.bootstrap_jwt
-        ):
-            self.authorization(f"Bearer {server.oauth_access_token}")
+class _ConnectClientBase(HTTPServer):
+    """
+    What RSConnectClient and AsyncRSConnectClient share: the decoding of successful
+    responses, and the refresh of an expired OAuth access token.
+    """
 
-    def request(
-        self,
-        method: str,
-        path: str,
-        query_params: Optional[Mapping[str, "JsonData"]] = None,
-        body: "str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None" = None,
-        maximum_redirects: int = 5,
-        decode_response: bool = True,
-        headers: Optional[Mapping[str, str]] = None,
-    ) -> "JsonData | HTTPResponse":
-        can_retry = isinstance(self._server, RSConnectServer) and bool(self._server.oauth_client_id)
-        start_pos: "int | None" = None
-        if can_retry and hasattr(body, "read"):
-            if getattr(body, "seekable", lambda: False)():
-                start_pos = body.tell()  # type: ignore[union-attr]
-            else:
-                body = body.read()  # type: ignore[union-attr]
-        response = super().request(method, path, query_params, body, maximum_redirects, decode_response, headers)  # pyright: ignore[reportUnknownArgumentType]
-        if can_retry and isinstance(response, HTTPResponse) and response.status == 401:
-            if self._attempt_token_refresh():
-                if start_pos is not None:
-                    body.seek(start_pos)  # type: ignore[union-attr]
-                return super().request(method, path, query_params, body, maximum_redirects, decode_response, headers)  # pyright: ignore[reportUnknownArgumentType]
-        return response
+    _server: Union[RSConnectServer, SPCSConnectServer]
+
+    def _refreshes_token(self) -> bool:
+        """Whether a request that is refused with a 401 can be tried again with a refreshed token."""
+        return isinstance(self._server, RSConnectServer) and bool(self._server.oauth_client_id)
 
     def _attempt_token_refresh(self) -> bool:
         from .oauth import (
@@ -588,6 +601,62 @@ class RSConnectClient(HTTPServer):
             else response
         )
 
+
+class RSConnectClient(_ConnectClientBase):
+    def __init__(self, server: Union[RSConnectServer, SPCSConnectServer], cookies: Optional[CookieJar] = None):
+        if cookies is None:
+            cookies = server.cookie_jar
+        super().__init__(
+            append_to_path(server.url, "__api__"),
+            server.insecure,
+            server.ca_data,
+            cookies,
+        )
+        self._server = server
+        self.server_info_cache = server_info_cache()
+        _authorize_client(self, server)
+        if server.rate_limit is not None or server.max_in_flight is not None:
+            self.rate_limiter.configure(server.rate_limit, server.max_in_flight)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        query_params: Optional[Mapping[str, "JsonData"]] = None,
+        body: "str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None" = None,
+        maximum_redirects: int = 5,
+        decode_response: bool = True,
+        headers: Optional[Mapping[str, str]] = None,
+        response_sink: "Optional[_DownloadSink]" = None,
+        raw_response: bool = False,
+    ) -> "JsonData | HTTPResponse":
+        can_retry = self._refreshes_token()
+        start_pos: "int | None" = None
+        if can_retry and hasattr(body, "read"):
+            if getattr(body, "seekable", lambda: False)():
+                start_pos = body.tell()  # type: ignore[union-attr]
+            else:
+                body = body.read()  # type: ignore[union-attr]
+        response = super().request(
+            method, path, query_params, body, maximum_redirects, decode_response, headers, response_sink, raw_response
+        )  # pyright: ignore[reportUnknownArgumentType]
+        if can_retry and isinstance(response, HTTPResponse) and response.status == 401:
+            if self._attempt_token_refresh():
+                if start_pos is not None:
+                    body.seek(start_pos)  # type: ignore[union-attr]
+                return super().request(
+                    method,
+                    path,
+                    query_params,
+                    body,
+                    maximum_redirects,
+                    decode_response,
+                    headers,
+                    response_sink,
+                    raw_response,
+                )  # pyright: ignore[reportUnknownArgumentType]
+        return response
+
     def me(self) -> UserRecord:
         response = cast(Union[UserRecord, HTTPResponse], self.get("v1/user"))
         response = self._server.handle_bad_response(response)
@@ -602,15 +671,44 @@ class RSConnectClient(HTTPServer):
         return response
 
     def server_settings(self) -> ServerSettings:
-        response = cast(Union[ServerSettings, HTTPResponse], self.get("server_settings"))
+        response = cast(Union[ServerSettings, HTTPResponse], self._cached_get("server_settings"))
         response = self._server.handle_bad_response(response)
         return response
 
     def python_settings(self) -> PyInfo:
-        response = cast(Union[PyInfo, HTTPResponse], self.get("v1/server_settings/python"))
+        response = cast(Union[PyInfo, HTTPResponse], self._cached_get("v1/server_settings/python"))
         response = self._server.handle_bad_response(response)
         return response
 
+    def _cached_get(self, path: str) -> JsonData | HTTPResponse:
+        """
+        GET a path describing the server, rather than its content, through the server
+        info cache. A fresh cached response is returned without a request; a stale one
+        is revalidated with its ETag, if it has one.
+        """
+        cache = self.server_info_cache
+        if cache is None:
+            return self.get(path)
+
+        if isinstance(self._server, SPCSConnectServer):
+            credential = self._server.snowflake_connection_name
+        else:
+            credential = self._server.api_key or self._server.oauth_client_id
+        key = ServerInfoCache.key(self._server.url, credential, path)
+        entry = cache.get(key)
+        if entry is not None and cache.is_fresh(entry):
+            return cast(JsonData, entry["data"])
+
+        headers = {"If-None-Match": entry["etag"]} if entry is not None and "etag" in entry else None
+        response = cast(HTTPResponse, self.request("GET", path, headers=headers, raw_response=True))
+        if response.exception is None:
+            if entry is not None and response.status == 304:
+                cache.set(key, entry["data"], response.getheader("ETag") or entry.get("etag"))
+                return cast(JsonData, entry["data"])
+            if 200 <= response.status <= 299 and response.json_data is not None:
+                cache.set(key, response.json_data, response.getheader("ETag"))
+        return self._tweak_response(response)
+
     def app_get(self, app_id: str) -> ContentItemV0:
         response = cast(Union[ContentItemV0, HTTPResponse], self.get(f"applications/{app_id}"))
         response = self._server.handle_bad_response(response)
@@ -644,19 +742,28 @@ class RSConnectClient(HTTPServer):
                 + f"\n\t For more information: {logs_url}"
             )
 
-    def bundle_download(self, content_guid: str, bundle_id: str) -> HTTPResponse:
-        response = cast(
-            HTTPResponse,
-            self.get(f"v1/content/{content_guid}/bundles/{bundle_id}/download", decode_response=False),
-        )
+    def bundle_download(
+        self,
+        content_guid: str,
+        bundle_id: str,
+        destination: Optional[str] = None,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> HTTPResponse:
+        path = f"v1/content/{content_guid}/bundles/{bundle_id}/download"
+        if destination is not None:
+            # Bundles are immutable, so an interrupted download can be resumed.
+            response = cast(HTTPResponse, self.download(path, destination, progress=progress))
+        else:
+            response = cast(HTTPResponse, self.get(path, decode_response=False))
         response = self._server.handle_bad_response(response, is_httpresponse=True)
         return response
 
-    def content_lockfile(self, content_guid: str) -> HTTPResponse:
-        response = cast(
-            HTTPResponse,
-            self.get(f"v1/content/{content_guid}/lockfile", decode_response=False),
-        )
+    def content_lockfile(self, content_guid: str, destination: Optional[str] = None) -> HTTPResponse:
+        path = f"v1/content/{content_guid}/lockfile"
+        if destination is not None:
+            response = cast(HTTPResponse, self.download(path, destination, resume=False))
+        else:
+            response = cast(HTTPResponse, self.get(path, decode_response=False))
         response = self._server.handle_bad_response(response, is_httpresponse=True)
         return response
 
@@ -703,16 +810,19 @@ class RSConnectClient(HTTPServer):
         :return: ContentItemV0 with bundle information
         """
         if metadata:
-            # Use multipart form upload when metadata is provided
-            tarball_content = tarball.read()
-            fields = {
-                "archive": ("bundle.tar.gz", tarball_content, "application/x-tar"),
+            # Use multipart form upload when metadata is provided. The tarball is read
+            # from the file as the form is sent.
+            fields: dict[str, str | tuple[str, bytes | typing.IO[bytes], str]] = {
+                "archive": ("bundle.tar.gz", tarball, "application/x-tar"),
                 "metadata": json.dumps(metadata),
             }
-            body, content_type = create_multipart_form_data(fields)
+            body, content_type = create_multipart_form_data_stream(fields)
+            headers = {"Content-Type": content_type}
+            if body.length is not None:
+                headers["Content-Length"] = str(body.length)
             response = cast(
                 Union[BundleMetadata, HTTPResponse],
-                self.post(f"v1/content/{content_guid}/bundles", body=body, headers={"Content-Type": content_type}),
+                self.post(f"v1/content/{content_guid}/bundles", body=body, headers=headers),
             )
         else:
             response = cast(
@@ -1102,7 +1212,15 @@ class RSConnectClient(HTTPServer):
         env_vars: Optional[dict[str, str]] = None,
         activate: bool = True,
         metadata: Optional[dict[str, str]] = None,
+        bundle_id: Optional[str] = None,
     ) -> RSConnectClientDeployResult:
+        """
+        Create or update a content item and deploy a bundle to it.
+
+        :param bundle_id: an existing bundle of the content item that has the same
+        contents as tarball. It is deployed again instead of uploading tarball; if it
+        can't be deployed (for example because it was deleted), tarball is uploaded.
+        """
         if app_id is None:
             if app_name is None:
                 raise RSConnectException("An app ID or name is required to deploy an app.")
@@ -1129,11 +1247,18 @@ class RSConnectClient(HTTPServer):
             result = self._server.handle_bad_response(result)
             app["title"] = app_title
 
-        app_bundle = self.upload_bundle(app_guid, tarball, metadata=metadata)
-
-        task = self.content_deploy(app_guid, app_bundle["id"], activate=activate)
+        task = None
+        if bundle_id is not None:
+            try:
+                task = self.content_deploy(app_guid, bundle_id, activate=activate)
+                logger.info("Bundle is unchanged since the last deployment; redeploying bundle %s." % bundle_id)
+            except RSConnectException as e:
+                logger.debug("Unable to redeploy bundle %s, uploading a new one: %s" % (bundle_id, e))
+        if task is None:
+            bundle_id = self.upload_bundle(app_guid, tarball, metadata=metadata)["id"]
+            task = self.content_deploy(app_guid, bundle_id, activate=activate)
 
-        draft_url = app["dashboard_url"] + f"/draft/{app_bundle['id']}"
+        draft_url = app["dashboard_url"] + f"/draft/{bundle_id}"
 
         return {
             "task_id": task["task_id"],
@@ -1142,12 +1267,18 @@ class RSConnectClient(HTTPServer):
             "app_url": app["content_url"],
             "dashboard_url": app["dashboard_url"],
             "draft_url": draft_url if not activate else None,
-            "bundle_id": app_bundle["id"],
+            "bundle_id": bundle_id,
             "title": app["title"],
         }
 
-    def download_bundle(self, content_guid: str, bundle_id: str) -> HTTPResponse:
-        results = self.bundle_download(content_guid, bundle_id)
+    def download_bundle(
+        self,
+        content_guid: str,
+        bundle_id: str,
+        destination: Optional[str] = None,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> HTTPResponse:
+        results = self.bundle_download(content_guid, bundle_id, destination, progress)
         return results
 
     def search_content(self) -> list[ContentItemV1]:
@@ -1166,44 +1297,65 @@ class RSConnectClient(HTTPServer):
         timeout: int = get_task_timeout(),
         poll_wait: int = 1,
         raise_on_error: bool = True,
+        max_poll_wait: int = 10,
     ) -> tuple[list[str] | None, TaskStatusV1]:
+        """
+        Follow a task until it finishes, passing its output to log_callback.
+
+        The task is long-polled: Connect holds each request open for up to the
+        requested number of seconds, answering as soon as there is new output. While
+        the task is quiet the wait is doubled, up to max_poll_wait, and while output
+        is flowing it is halved again, down to poll_wait, so that a long, quiet step
+        (such as installing packages) takes few requests. All of the requests are
+        sent over one connection.
+        """
         if log_callback is None:
             log_lines: list[str] | None = []
             log_callback = log_lines.append
         else:
             log_lines = None
 
+        request_timeout = get_request_timeout()
+        if request_timeout:
+            # Leave the server time to answer before the request times out.
+            max_poll_wait = min(max_poll_wait, max(1, request_timeout // 2))
+        max_poll_wait = max(max_poll_wait, poll_wait)
+
         first: int | None = None
+        wait = poll_wait
+        polls = 0
         start_time = time.time()
-        while True:
-            if (time.time() - start_time) > timeout:
-                raise RSConnectException(get_task_timeout_help_message(timeout))
-            elif abort_func():
-                raise RSConnectException("Task aborted.")
+        with contextlib.ExitStack() as stack:
+            if self._conn is None:
+                stack.enter_context(self)
+            while True:
+                if (time.time() - start_time) > timeout:
+                    raise RSConnectException(get_task_timeout_help_message(timeout))
+                elif abort_func():
+                    raise RSConnectException("Task aborted.")
+
+                task = self.task_get(task_id, first=first, wait=wait)
+                polls += 1
+                self.output_task_log(task, log_callback)
+                if task["output"]:
+                    wait = max(poll_wait, wait // 2)
+                else:
+                    wait = min(max_poll_wait, wait * 2)
+                first = task["last"]
+                if task["finished"]:
+                    self._log_task_polls(task_id, polls, time.time() - start_time, poll_wait)
+                    self.output_task_result(task, log_callback, raise_on_error)
+                    return log_lines, task
 
-            task = self.task_get(task_id, first=first, wait=poll_wait)
-            self.output_task_log(task, log_callback)
-            first = task["last"]
-            if task["finished"]:
-                result = task.get("result")
-                if isinstance(result, dict):
-                    data = result.get("data", "")
-                    type = result.get("type", "")
-                    if data or type:
-                        log_callback("%s (%s)" % (data, type))
-
-                err = task.get("error")
-                if err:
-                    log_callback("Error from Connect server: " + err)
-
-                exit_code = task["code"]
-                if exit_code != 0:
-                    exit_status = "Task exited with status %d." % exit_code
-                    if raise_on_error:
-                        raise RSConnectException(exit_status)
-                    else:
-                        log_callback("Task failed. %s" % exit_status)
-                return log_lines, task
+    @staticmethod
+    def _log_task_polls(task_id: str, polls: int, elapsed: float, poll_wait: int):
+        """Log how many requests following a task took, and how many fixed-interval polling would have."""
+        fixed_polls = max(polls, math.ceil(elapsed / max(poll_wait, 1)))
+        logger.log(
+            VERBOSE,
+            f"Followed task {task_id} for {elapsed:.0f} seconds with {polls} requests "
+            f"({fixed_polls - polls} fewer than polling every {poll_wait} seconds).",
+        )
 
     @staticmethod
     def output_task_log(
@@ -1214,6 +1366,304 @@ class RSConnectClient(HTTPServer):
         for line in task["output"]:
             log_callback(line)
 
+    @staticmethod
+    def output_task_result(
+        task: TaskStatusV1,
+        log_callback: Callable[[str], None],
+        raise_on_error: bool = True,
+    ):
+        """Pipe the result of a finished task through the log_callback, raising if it failed and raise_on_error."""
+        result = task.get("result")
+        if isinstance(result, dict):
+            data = result.get("data", "")
+            type = result.get("type", "")
+            if data or type:
+                log_callback("%s (%s)" % (data, type))
+
+        err = task.get("error")
+        if err:
+            log_callback("Error from Connect server: " + err)
+
+        exit_code = task["code"]
+        if exit_code != 0:
+            exit_status = "Task exited with status %d." % exit_code
+            if raise_on_error:
+                raise RSConnectException(exit_status)
+            else:
+                log_callback("Task failed. %s" % exit_status)
+
+
+class _WatchedTask(object):
+    """The state of a task followed by a TaskWatcher."""
+
+    def __init__(
+        self,
+        task_id: str,
+        output_callback: Callable[[List[str]], None],
+        abort_func: Callable[[], bool],
+        poll_wait: float,
+    ):
+        self.task_id = task_id
+        self.output_callback = output_callback
+        self.abort_func = abort_func
+        self.future: Future[TaskStatusV1] = Future()
+        self.started = time.monotonic()
+        self.wait = poll_wait
+        self.first: Optional[int] = None
+
+
+class TaskWatcher(object):
+    """
+    Follows many Connect tasks at once from a single thread and over one connection,
+    instead of a thread and a connection for each task.
+
+    Tasks are polled in the order they are due, taking turns when more are due than
+    can be polled at once. Each task is polled every poll_wait seconds while it is
+    producing output, and after each quiet poll the interval doubles, up to
+    max_poll_wait. The new output from each poll is passed to the task's output
+    callback at once, from the watcher's thread, and the future returned by
+    watch() is resolved with the task's final status when it finishes.
+    """
+
+    def __init__(
+        self,
+        server: Union[RSConnectServer, SPCSConnectServer],
+        poll_wait: float = 1,
+        max_poll_wait: float = 10,
+        timeout: int = get_task_timeout(),
+    ):
+        """
+        :param server: the Connect server running the tasks.
+        :param poll_wait: the shortest time between polls of a task, in seconds.
+        :param max_poll_wait: the longest time between polls of a task, in seconds.
+        :param timeout: how long to follow a task before failing it, in seconds.
+        """
+        self.poll_wait = poll_wait
+        self.max_poll_wait = max(max_poll_wait, poll_wait)
+        self.timeout = timeout
+        self.polls = 0
+        self._client = RSConnectClient(server)
+        self._cond = threading.Condition()
+        self._queue: list[tuple[float, int, _WatchedTask]] = []
+        self._order = itertools.count()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args: object):
+        self.close()
+
+    def watch(
+        self,
+        task_id: str,
+        output_callback: Callable[[List[str]], None],
+        abort_func: Callable[[], bool] = lambda: False,
+    ) -> Future[TaskStatusV1]:
+        """
+        Start following a task.
+
+        :param task_id: the ID of the task.
+        :param output_callback: called with the lines of the task's output from each
+        poll that has any.
+        :param abort_func: polled before each request; the task fails with "Task
+        aborted." once it returns True.
+        :return: a future for the task's final status. It fails if the task cannot be
+        followed, but not if the task itself fails; check its "code". Cancelling it
+        stops following the task.
+        """
+        task = _WatchedTask(task_id, output_callback, abort_func, self.poll_wait)
+        with self._cond:
+            if self._closed:
+                raise RSConnectException("The task watcher has been closed.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rsc_task_watcher", daemon=True)
+                self._thread.start()
+        self._schedule(task, time.monotonic())
+        return task.future
+
+    def close(self):
+        """Stop following tasks, cancelling the futures of those still running."""
+        with self._cond:
+            self._closed = True
+            queue, self._queue = self._queue, []
+            thread = self._thread
+            self._cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        for _, _, task in queue:
+            task.future.cancel()
+        logger.log(VERBOSE, f"The task watcher made {self.polls} requests.")
+
+    def _schedule(self, task: _WatchedTask, due: float):
+        with self._cond:
+            if self._closed:
+                task.future.cancel()
+                return
+            heapq.heappush(self._queue, (due, next(self._order), task))
+            self._cond.notify_all()
+
+    def _run(self):
+        with self._client:
+            while True:
+                with self._cond:
+                    while not self._closed:
+                        now = time.monotonic()
+                        if self._queue and self._queue[0][0] <= now:
+                            break
+                        self._cond.wait(self._queue[0][0] - now if self._queue else None)
+                    if self._closed:
+                        return
+                    _, _, task = heapq.heappop(self._queue)
+                self._poll(task)
+
+    def _poll(self, task: _WatchedTask):
+        if task.future.cancelled():
+            return
+        try:
+            if time.monotonic() - task.started > self.timeout:
+                raise RSConnectException(get_task_timeout_help_message(self.timeout))
+            if task.abort_func():
+                raise RSConnectException("Task aborted.")
+            status = self._client.task_get(task.task_id, first=task.first)
+            self.polls += 1
+            lines: List[str] = []
+            RSConnectClient.output_task_log(status, lines.append)
+            if status["finished"]:
+                RSConnectClient.output_task_result(status, lines.append, raise_on_error=False)
+            if lines:
+                task.output_callback(lines)
+        except Exception as exc:
+            with contextlib.suppress(InvalidStateError):
+                task.future.set_exception(exc)
+            return
+
+        task.first = status["last"]
+        if status["finished"]:
+            with contextlib.suppress(InvalidStateError):
+                task.future.set_result(status)
+            return
+        task.wait = self.poll_wait if status["output"] else min(self.max_poll_wait, task.wait * 2)
+        self._schedule(task, time.monotonic() + task.wait)
+
+
+class AsyncRSConnectClient(_ConnectClientBase, AsyncHTTPServer):
+    """
+    An asyncio counterpart to RSConnectClient, for running many requests against a
+    Connect server concurrently from a single thread. It has the RSConnectClient
+    methods used to query content and to run and watch builds.
+    """
+
+    def __init__(
+        self,
+        server: Union[RSConnectServer, SPCSConnectServer],
+        cookies: Optional[CookieJar] = None,
+        max_connections: int = 100,
+    ):
+        if cookies is None:
+            cookies = server.cookie_jar
+        super().__init__(
+            append_to_path(server.url, "__api__"),
+            server.insecure,
+            server.ca_data,
+            cookies,
+            max_connections,
+        )
+        self._server = server
+        self._token_refresh: Optional[asyncio.Lock] = None
+        _authorize_client(self, server)
+        if server.rate_limit is not None or server.max_in_flight is not None:
+            self.rate_limiter.configure(server.rate_limit, server.max_in_flight)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        query_params: Optional[Mapping[str, "JsonData"]] = None,
+        body: "str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None" = None,
+        maximum_redirects: int = 5,
+        decode_response: bool = True,
+        headers: Optional[Mapping[str, str]] = None,
+        raw_response: bool = False,
+    ) -> "JsonData | HTTPResponse":
+        can_retry = self._refreshes_token()
+        if can_retry and hasattr(body, "read"):
+            body = body.read()  # type: ignore[union-attr]
+        authorization = self.get_authorization()
+        response = await super().request(
+            method, path, query_params, body, maximum_redirects, decode_response, headers, raw_response
+        )
+        if can_retry and isinstance(response, HTTPResponse) and response.status == 401:
+            if self._token_refresh is None:
+                self._token_refresh = asyncio.Lock()
+            async with self._token_refresh:
+                # Concurrent requests that failed together only refresh the token once.
+                refreshed = self.get_authorization() != authorization
+                if not refreshed:
+                    loop = asyncio.get_running_loop()
+                    refreshed = await loop.run_in_executor(None, self._attempt_token_refresh)
+            if refreshed:
+                return await super().request(
+                    method, path, query_params, body, maximum_redirects, decode_response, headers, raw_response
+                )
+        return response
+
+    async def me(self) -> UserRecord:
+        response = cast(Union[UserRecord, HTTPResponse], await self.get("v1/user"))
+        response = self._server.handle_bad_response(response)
+        return response
+
+    async def server_settings(self) -> ServerSettings:
+        response = cast(Union[ServerSettings, HTTPResponse], await self.get("server_settings"))
+        response = self._server.handle_bad_response(response)
+        return response
+
+    async def content_list(self, filters: Optional[Mapping[str, JsonData]] = None) -> list[ContentItemV1]:
+        response = cast(Union[List[ContentItemV1], HTTPResponse], await self.get("v1/content", query_params=filters))
+        response = self._server.handle_bad_response(response)
+        return response
+
+    async def content_get(self, content_guid: str) -> ContentItemV1:
+        response = cast(Union[ContentItemV1, HTTPResponse], await self.get(f"v1/content/{content_guid}"))
+        response = self._server.handle_bad_response(response)
+        return response
+
+    async def content_build(
+        self, content_guid: str, bundle_id: Optional[str] = None, activate: bool = True
+    ) -> BuildOutputDTO:
+        body: dict[str, str | bool | None] = {"bundle_id": bundle_id}
+        if not activate:
+            body["activate"] = False
+        response = cast(
+            Union[BuildOutputDTO, HTTPResponse],
+            await self.post(f"v1/content/{content_guid}/build", body=body),
+        )
+        response = self._server.handle_bad_response(response)
+        return response
+
+    async def task_get(
+        self,
+        task_id: str,
+        first: Optional[int] = None,
+        wait: Optional[int] = None,
+    ) -> TaskStatusV1:
+        params = None
+        if first is not None or wait is not None:
+            params = {}
+            if first is not None:
+                params["first"] = first
+            if wait is not None:
+                params["wait"] = wait
+        response = cast(Union[TaskStatusV1, HTTPResponse], await self.get(f"v1/tasks/{task_id}", query_params=params))
+        response = self._server.handle_bad_response(response)
+
+        # compatibility with rsconnect-jupyter
+        response["status"] = response["output"]
+        response["last_status"] = response["last"]
+
+        return response
+
 
 class ServerDetailsPython(TypedDict):
     api_enabled: bool
@@ -1257,6 +1707,9 @@ class RSConnectExecutor:
         branch: Optional[str] = None,
         subdirectory: Optional[str] = None,
         polling: bool = True,
+        force_upload: bool = False,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        use_bundle_cache: bool = True,
     ) -> None:
         self.remote_server: TargetableServer
         self.client: RSConnectClient | PositClient
@@ -1285,6 +1738,13 @@ class RSConnectExecutor:
         self.polling: bool = polling
 
         self.bundle: IO[bytes] | None = None
+        self.bundle_digest: str | None = None
+        # Upload a new bundle even when the last deployed one has the same digest.
+        self.force_upload = force_upload
+        if not 1 <= compression_level <= 9:
+            raise RSConnectException("The compression level must be between 1 and 9.")
+        self.compression_level = compression_level
+        self.use_bundle_cache = use_bundle_cache
         self.deployed_info: RSConnectClientDeployResult | None = None
         self._draft_deploy_supported: bool | None = None
 
@@ -1331,6 +1791,9 @@ class RSConnectExecutor:
         branch: Optional[str] = None,
         subdirectory: Optional[str] = None,
         polling: bool = True,
+        force_upload: bool = False,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        use_bundle_cache: bool = True,
     ):
         return cls(
             ctx=ctx,
@@ -1358,6 +1821,9 @@ class RSConnectExecutor:
             branch=branch,
             subdirectory=subdirectory,
             polling=polling,
+            force_upload=force_upload,
+            compression_level=compression_level,
+            use_bundle_cache=use_bundle_cache,
         )
 
     def output_overlap_header(self, previous: bool) -> bool:
@@ -1459,10 +1925,25 @@ class RSConnectExecutor:
 
         if snowflake_connection_name:
             url = cast(str, url)
-            self.remote_server = SPCSConnectServer(url, api_key, snowflake_connection_name, insecure, ca_data)
+            self.remote_server = SPCSConnectServer(
+                url,
+                api_key,
+                snowflake_connection_name,
+                insecure,
+                ca_data,
+                rate_limit=server_data.rate_limit,
+                max_in_flight=server_data.max_in_flight,
+            )
         elif api_key:
             url = cast(str, url)
-            self.remote_server = RSConnectServer(url, api_key, insecure, ca_data)
+            self.remote_server = RSConnectServer(
+                url,
+                api_key,
+                insecure,
+                ca_data,
+                rate_limit=server_data.rate_limit,
+                max_in_flight=server_data.max_in_flight,
+            )
         elif token and secret:
             url = cast(str, url)
             account_name = cast(str, account_name)
@@ -1481,6 +1962,8 @@ class RSConnectExecutor:
                 oauth_access_token=oauth_access_token,
                 oauth_client_id=server_data.oauth_client_id,
                 server_name=name or server_data.name,
+                rate_limit=server_data.rate_limit,
+                max_in_flight=server_data.max_in_flight,
             )
         else:
             raise RSConnectException("Unable to infer Connect server type and setup server.")
@@ -1607,9 +2090,17 @@ class RSConnectExecutor:
             )
             raise RSConnectException(msg)
 
+        # Builders only collect the bundle's members, so the tarball itself can still
+        # come from the local bundle cache.
+        if isinstance(self.bundle, BundleFile):
+            self.bundle.cache = bundle_cache() if self.use_bundle_cache else None
+            self.bundle.compression_level = self.compression_level
+
         return self
 
-    def upload_posit_bundle(self, prepare_deploy_result: PrepareDeployResult, bundle_size: int, contents: bytes):
+    def upload_posit_bundle(
+        self, prepare_deploy_result: PrepareDeployResult, bundle_size: int, contents: bytes | IO[bytes]
+    ):
         upload_url = prepare_deploy_result.presigned_url
         parsed_upload_url = urlparse(upload_url)
         with S3Client(f"{parsed_upload_url.scheme}://{parsed_upload_url.netloc}") as s3_client:
@@ -1634,6 +2125,7 @@ class RSConnectExecutor:
         if isinstance(self.remote_server, (RSConnectServer, SPCSConnectServer)):
             if not isinstance(self.client, RSConnectClient):
                 raise RSConnectException("client must be an RSConnectClient.")
+            self.bundle_digest = self.make_bundle_digest()
             result = self.client.deploy(
                 self.app_id,
                 self.deployment_name,
@@ -1643,13 +2135,12 @@ class RSConnectExecutor:
                 self.env_vars,
                 activate=activate,
                 metadata=self.metadata,
+                bundle_id=self.unchanged_bundle_id(),
             )
             self.deployed_info = result
             return self
         else:
-            contents = self.bundle.read()
-            bundle_size = len(contents)
-            bundle_hash = hashlib.md5(contents).hexdigest()
+            self.bundle, bundle_size, bundle_hash = bundle_size_and_checksum(self.bundle)
 
             if not isinstance(self.client, PositClient):
                 raise RSConnectException("client must be a PositClient.")
@@ -1662,7 +2153,7 @@ class RSConnectExecutor:
                 bundle_hash,
                 self.visibility,
             )
-            self.upload_posit_bundle(prepare_deploy_result, bundle_size, contents)
+            self.upload_posit_bundle(prepare_deploy_result, bundle_size, self.bundle)
             # type: ignore[arg-type] - PrepareDeployResult uses int, but format() accepts it
             shinyapps_service.do_deploy(prepare_deploy_result.bundle_id, prepare_deploy_result.app_id)
 
@@ -1680,6 +2171,35 @@ class RSConnectExecutor:
             )
             return self
 
+    def make_bundle_digest(self) -> Optional[str]:
+        """
+        A digest of the bundle's contents and the metadata uploaded with it, or None
+        if the bundle isn't one we built (e.g. ``deploy bundle``).
+        """
+        if not isinstance(self.bundle, BundleFile):
+            return None
+        contents_digest = self.bundle.digest()
+        if contents_digest is None:
+            return None
+        hasher = hashlib.sha256(contents_digest.encode("utf-8"))
+        hasher.update(json.dumps(self.metadata or {}, sort_keys=True).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def unchanged_bundle_id(self) -> Optional[str]:
+        """
+        The ID of the bundle last deployed to the same content item, if its digest
+        matches the current bundle. Deploying that bundle again makes building and
+        uploading a new, identical one unnecessary, unless force_upload is set.
+        """
+        if self.force_upload or self.app_id is None or self.bundle_digest is None:
+            return None
+        metadata = self.app_store.get(self.remote_server.url)
+        if metadata is None or metadata.get("bundle_digest") != self.bundle_digest:
+            return None
+        if str(self.app_id) not in (str(metadata.get("app_guid")), str(metadata.get("app_id"))):
+            return None
+        return metadata.get("bundle_id")
+
     @cls_logged("Creating git-backed deployment ...")
     def deploy_git(self, activate: bool = True):
         """Deploy content from a remote git repository.
@@ -1774,6 +2294,8 @@ class RSConnectExecutor:
             deployed_info["app_guid"],
             deployed_info["title"],
             self.app_mode,
+            bundle_id=deployed_info.get("bundle_id"),
+            bundle_digest=self.bundle_digest,
         )
 
         return self
@@ -2029,7 +2551,17 @@ class RSConnectExecutor:
 
 
 class S3Client(HTTPServer):
-    def upload(self, path: str, presigned_checksum: str, bundle_size: int, contents: bytes):
+    # The presigned URL only allows the whole bundle to be PUT at once, so a failed
+    # upload is sent again from the start. S3 also asks for retries with a 500. A
+    # retried upload can take a while, so retries are shown at the default level.
+    retry_policy = RetryPolicy(max_retries=2, backoff=4.0, statuses=(500, 502, 503, 504), log_level=logging.INFO)
+
+    def upload(self, path: str, presigned_checksum: str, bundle_size: int, contents: bytes | IO[bytes]):
+        """
+        Upload a bundle to a presigned S3 URL. An upload that fails with a
+        connection error or a 5xx response is sent again from the start, as
+        retry_policy allows, as long as the contents can be rewound.
+        """
         headers = {
             "content-type": "application/x-tar",
             "content-length": str(bundle_size),
@@ -2122,6 +2654,63 @@ class PositClientShinyappsBuildTaskSearchResults(TypedDict):
     tasks: list[PositClientShinyappsBuildTask]
 
 
+# The checksum signed into bodiless requests, such as task polls.
+_EMPTY_BODY_MD5 = hashlib.md5(b"").hexdigest()
+
+
+class _BuildLogTail(object):
+    """
+    The part of a shinyapps.io deploy's build log that has been passed on so far.
+    The build task is looked up once it exists, and its log is then fetched again
+    from time to time; only lines not seen before are passed on.
+
+    The logs API has no way to ask for only the end of a log, so each fetch
+    downloads all of it. Fetches are therefore at least min_fetch_interval apart,
+    except when the deploy's status changes or it finishes.
+    """
+
+    # The least time between fetches of the log, in seconds.
+    min_fetch_interval = 10.0
+
+    def __init__(self, client: PositClient, parent_task_id: str, log_callback: Callable[[str], None]):
+        self.client = client
+        self.parent_task_id = parent_task_id
+        self.log_callback = log_callback
+        self.build_task_id: Optional[str] = None
+        self.lines = 0
+        self._fetched: Optional[float] = None
+
+    def update(self, final: bool = False, changed: bool = False):
+        """
+        Pass on the new lines of the log, if it is time to fetch it again.
+
+        :param final: whether the deploy has finished, in which case the log is
+        fetched and a last line with no newline is passed on too.
+        :param changed: whether the deploy's status has changed, in which case the
+        log is fetched.
+        """
+        now = time.monotonic()
+        if not (final or changed) and self._fetched is not None and now - self._fetched < self.min_fetch_interval:
+            return
+        self._fetched = now
+        if self.build_task_id is None:
+            tasks = self.client.get_shinyapps_build_task(self.parent_task_id)["tasks"]
+            if not tasks:
+                return
+            self.build_task_id = tasks[0]["id"]
+        log = self.client.get_task_logs(self.build_task_id).response_body or ""
+        if isinstance(log, bytes):
+            log = log.decode("utf-8", errors="replace")
+        lines = log.splitlines(keepends=True)
+        new_lines = lines[self.lines :]
+        if new_lines and not new_lines[-1].endswith("\n") and not final:
+            # A partial last line is not counted, so it is passed on once it is complete.
+            new_lines.pop()
+        for line in new_lines:
+            self.log_callback(line.rstrip("\r\n"))
+        self.lines += len(new_lines)
+
+
 class PositClient(HTTPServer):
     """
     An HTTP client to call the shinyapps.io API.
@@ -2160,11 +2749,11 @@ class PositClient(HTTPServer):
         canonical_request_date = datetime.datetime.now(datetime.timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
 
         # get request checksum
-        md5 = hashlib.md5()
-        body = body or b""
-        body_bytes = body if isinstance(body, bytes) else body.encode()
-        md5.update(body_bytes)
-        canonical_request_checksum = md5.hexdigest()
+        if body:
+            body_bytes = body if isinstance(body, bytes) else body.encode()
+            canonical_request_checksum = hashlib.md5(body_bytes).hexdigest()
+        else:
+            canonical_request_checksum = _EMPTY_BODY_MD5
 
         canonical_request = self._get_canonical_request(
             canonical_request_method, canonical_request_path, canonical_request_date, canonical_request_checksum
@@ -2275,51 +2864,87 @@ class PositClient(HTTPServer):
         response = self._server.handle_bad_response(response)
         return response
 
-    def wait_until_task_is_successful(self, task_id: str, timeout: int = get_task_timeout()) -> None:
+    def wait_until_task_is_successful(
+        self,
+        task_id: str,
+        timeout: int = get_task_timeout(),
+        poll_wait: float = 1,
+        max_poll_wait: float = 15,
+        backoff: float = 1.5,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """
+        Poll a task until it finishes, printing its status whenever it changes.
+
+        The first poll comes poll_wait seconds after the task is started. While the
+        status stays the same, the wait grows by the backoff factor after each poll,
+        up to max_poll_wait, and it drops back to poll_wait when the status changes.
+        Each wait is varied by up to a fifth either way so that many deploys don't
+        poll in step.
+
+        :param task_id: the ID of the task.
+        :param timeout: how long to wait for the task, in seconds, before failing.
+        :param poll_wait: the shortest wait between polls, in seconds.
+        :param max_poll_wait: the longest wait between polls, in seconds.
+        :param backoff: the factor the wait grows by after each poll with no change.
+        :param log_callback: if given, the build log of the task is followed and each
+        new line of it is passed to this function. The log is fetched at most every
+        _BuildLogTail.min_fetch_interval seconds while the status stays the same.
+        """
         print()
         print(f"Waiting for task: {task_id}")
 
-        start_time = time.time()
-        finished: bool | None = None
-        status: str | None = None
-        error: str | None = None
-        description: str | None = None
+        deadline = time.monotonic() + timeout
+        wait = poll_wait
+        log_tail = _BuildLogTail(self, task_id, log_callback) if log_callback is not None else None
+        last_status: tuple[str, str] | None = None
 
-        while time.time() - start_time < timeout:
+        while True:
             task = self.get_task(task_id)
             finished = task["finished"]
             status = task["status"]
             description = task["description"]
-            error = task["error"]
-
+            changed = (status, description) != last_status
+
+            if log_tail is not None:
+                try:
+                    log_tail.update(final=finished, changed=changed)
+                except RSConnectException as e:
+                    # The log is only a convenience; keep waiting for the task without it.
+                    logger.debug(f"Could not follow the build log: {e}")
+                    log_tail = None
             if finished:
                 break
 
-            print(f"  {status} - {description}")
-            time.sleep(2)
+            if changed:
+                print(f"  {status} - {description}")
+                last_status = (status, description)
+                wait = poll_wait
+            else:
+                wait = min(max_poll_wait, wait * backoff)
 
-        if not finished:
-            raise RSConnectException(get_task_timeout_help_message(timeout))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RSConnectException(get_task_timeout_help_message(timeout))
+            time.sleep(min(remaining, wait * random.uniform(0.8, 1.2)))
 
         if status != "success":
-            raise DeploymentFailedException(f"Application deployment failed with error: {error}")
+            raise DeploymentFailedException(f"Application deployment failed with error: {task['error']}")
 
         print(f"Task done: {description}")
 
     def get_applications_like_name(self, name: str) -> list[str]:
-        applications: list[PositClientApp] = []
-
-        results = self._get_applications_like_name_page(name, 0)
-        results = self._server.handle_bad_response(results)
+        names: list[str] = []
         offset = 0
 
-        while len(applications) < int(results["total"]):
+        while True:
             results = self._get_applications_like_name_page(name, offset)
-            applications = results["applications"]
-            applications.extend(applications)
-            offset += int(results["count"])
-
-        return [app["name"] for app in applications]
+            page = results["applications"]
+            names.extend(app["name"] for app in page)
+            offset += len(page)
+            # Stop on an empty page too, in case the total changes while paging.
+            if not page or offset >= int(results["total"]):
+                return names
 
 
 class ShinyappsService:
@@ -2380,9 +3005,18 @@ class ShinyappsService:
     def do_deploy(self, bundle_id: str, app_id: str):
         self._posit_client.set_bundle_status(bundle_id, "ready")
         deploy_task = self._posit_client.deploy_application(bundle_id, app_id)
+        build_log: list[str] = []
+
+        def log_callback(line: str):
+            build_log.append(line)
+            connect_logger.info(line)
+
         try:
-            self._posit_client.wait_until_task_is_successful(deploy_task["id"])
+            self._posit_client.wait_until_task_is_successful(deploy_task["id"], log_callback=log_callback)
         except DeploymentFailedException as e:
+            if build_log:
+                # The build log has been shown as it was written.
+                raise e
             build_task_result = self._posit_client.get_shinyapps_build_task(deploy_task["id"])
             build_task = build_task_result["tasks"][0]
             logs = self._posit_client.get_task_logs(build_task["id"])
@@ -2519,46 +3153,41 @@ class AbbreviatedAppItem(TypedDict):
     config_url: str
 
 
+def _first_free_name(name: str, existing_names: Iterable[str]) -> str:
+    """
+    The name itself if it isn't taken, or else the name with the lowest numeric
+    suffix (starting at 1) that isn't taken.
+    """
+    taken = set(existing_names)
+    if name not in taken:
+        return name
+    suffix = 1
+    while "%s%d" % (name, suffix) in taken:
+        suffix += 1
+    return "%s%d" % (name, suffix)
+
+
 def find_unique_name(remote_server: TargetableServer, name: str):
     """
-    Poll through existing apps to see if anything with a similar name exists.
-    If so, start appending numbers until a unique name is found.
+    Check whether anything with the same name exists. If so, find the lowest
+    number that can be appended to the name to make it unique.
 
     :param remote_server: the remote server information.
     :param name: the default name for an app.
     :return: the name, potentially with a suffixed number to guarantee uniqueness.
     """
     if isinstance(remote_server, (RSConnectServer, SPCSConnectServer)):
-        # Use v1/content API with name query parameter
         with RSConnectClient(remote_server) as client:
-            results = client.content_list(filters={"name": name})
-
-            # If name exists, append suffix and try again
-            if len(results) > 0:
-                suffix = 1
-                test_name = "%s%d" % (name, suffix)
-                while True:
-                    results = client.content_list(filters={"name": test_name})
-                    if len(results) == 0:
-                        return test_name
-                    suffix = suffix + 1
-                    test_name = "%s%d" % (name, suffix)
-
-            return name
+            # The v1/content API only filters on the exact name, so when it is taken,
+            # list the content visible to the caller once and pick a suffix from that
+            # rather than asking about each candidate name in turn.
+            if not client.content_list(filters={"name": name}):
+                return name
+            return _first_free_name(name, (content["name"] for content in client.content_list()))
 
     elif isinstance(remote_server, ShinyappsServer):
         client = PositClient(remote_server)
-        existing_names = client.get_applications_like_name(name)
-
-        if name in existing_names:
-            suffix = 1
-            test = "%s%d" % (name, suffix)
-            while test in existing_names:
-                suffix = suffix + 1
-                test = "%s%d" % (name, suffix)
-            name = test
-
-        return name
+        return _first_free_name(name, client.get_applications_like_name(name))
     else:
         # non-unique names are permitted in cloud
         return name
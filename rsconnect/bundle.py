@@ -8,14 +8,18 @@ import hashlib
 import io
 import json
 import mimetypes
+import mmap
 import os
+import queue
 import re
 import subprocess
 import sys
 import tarfile
 import tempfile
+import threading
 import typing
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from mimetypes import guess_type
 from os.path import (
@@ -36,6 +40,7 @@ from typing import (
     Callable,
     Iterator,
     Literal,
+    Mapping,
     Optional,
     Sequence,
     Union,
@@ -52,11 +57,14 @@ else:
 
 import click
 
+from .bundle_cache import BundleCache, BundleCacheWriter, bundle_cache_size
+from .compression import DEFAULT_COMPRESSION_LEVEL, STORE_ONLY, ParallelGzipWriter, is_precompressed
 from .environment import Environment, list_environment_dirs, is_environment_dir
 from .environment_node import NodeEnvironment
 from .environment_r import REnvironment
 from .exception import RSConnectException
 from .log import VERBOSE, logger
+from .metadata import ChecksumCache
 from .models import AppMode, AppModes, GlobSet
 from .shiny_express import escape_to_var_name, is_express_app
 
@@ -83,6 +91,19 @@ directories_to_ignore = {Path(d) for d in directories_ignore_list}
 
 mimetypes.add_type("text/ipynb", ".ipynb")
 
+CONNECT_STREAM_BUNDLE = "CONNECT_STREAM_BUNDLE"
+_BUNDLE_STREAM_CHUNK_SIZE = 64 * 1024
+# At most this many chunks are buffered between the bundle producer and the upload.
+_BUNDLE_STREAM_MAX_CHUNKS = 16
+
+CONNECT_CHECKSUM_WORKERS = "CONNECT_CHECKSUM_WORKERS"
+_CHECKSUM_CHUNK_SIZE = 1024 * 1024
+# Files at least this large are hashed through a memory map rather than read in chunks.
+_CHECKSUM_MMAP_THRESHOLD = 8 * 1024 * 1024
+
+# The reproducible-builds.org convention for a fixed build timestamp.
+SOURCE_DATE_EPOCH = "SOURCE_DATE_EPOCH"
+
 
 class ManifestDataFile(TypedDict):
     checksum: str
@@ -295,6 +316,13 @@ class Manifest:
         self.data["files"][manifestPath] = {"checksum": file_checksum(path)}
         return self
 
+    def add_files(self, paths: Sequence[str], use_checksum_cache: bool = True):
+        """Add several files at once, hashing them concurrently."""
+        cache = ChecksumCache(self.deploy_dir) if use_checksum_cache and self.deploy_dir else None
+        for path, checksum in zip(paths, file_checksums(paths, cache=cache)):
+            self.data["files"][Path(path).as_posix()] = {"checksum": checksum}
+        return self
+
     def discard_file(self, path: str):
         if path in self.data["files"]:
             del self.data["files"][path]
@@ -376,6 +404,457 @@ class Manifest:
         return new_manifest
 
 
+def stream_bundle_enabled() -> bool:
+    """
+    Whether bundle tarballs should be streamed to the server while they are being
+    built, rather than written to a temporary file first. Controlled by the
+    CONNECT_STREAM_BUNDLE environment variable.
+    """
+    value = os.environ.get(CONNECT_STREAM_BUNDLE, "").strip().lower()
+    return value in ("1", "true", "yes")
+
+
+class _BundleStreamAborted(Exception):
+    """Raised in the producer thread when the reader has gone away."""
+
+
+class _BundlePipeWriter:
+    """
+    The write end of a BundleStream. Small writes (as produced by gzip) are
+    coalesced into fixed-size chunks before being handed to the reader.
+    """
+
+    def __init__(self, stream: BundleStream):
+        self._stream = stream
+        self._pending = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._pending += data
+        if len(self._pending) >= _BUNDLE_STREAM_CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._pending:
+            self._stream._put(bytes(self._pending))
+            self._pending.clear()
+
+
+class BundleStream(io.RawIOBase):
+    """
+    A read-only file-like object whose contents are produced on the fly by a
+    background thread. The producer and the reader are coupled through a bounded
+    queue, so the tarball is compressed while it is being uploaded and only a
+    handful of chunks are ever held in memory.
+
+    Errors raised by the producer (e.g. a file that disappeared after the file
+    list was built) are re-raised to the reader as an RSConnectException once the
+    stream has been drained.
+    """
+
+    def __init__(self, produce: Callable[[IO[bytes]], None]):
+        super().__init__()
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize=_BUNDLE_STREAM_MAX_CHUNKS)
+        self._aborted = threading.Event()
+        self._buffer = b""
+        self._eof = False
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, args=(produce,), name="rsc_bundle", daemon=True)
+        self._thread.start()
+
+    def _run(self, produce: Callable[[IO[bytes]], None]) -> None:
+        writer = _BundlePipeWriter(self)
+        try:
+            produce(cast(IO[bytes], writer))
+            writer.flush()
+        except _BundleStreamAborted:
+            pass
+        except BaseException as error:
+            self._error = error
+        finally:
+            try:
+                self._put(None)
+            except _BundleStreamAborted:
+                pass
+
+    def _put(self, chunk: bytes | None) -> None:
+        while not self._aborted.is_set():
+            try:
+                self._queue.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise _BundleStreamAborted()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # pyright: ignore[reportIncompatibleMethodOverride]
+        while not self._buffer:
+            if self._eof:
+                return 0
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+                self._thread.join()
+                if self._error is not None:
+                    error = self._error
+                    if isinstance(error, EnvironmentError) and error.filename:
+                        msg = "Unable to include the file %s in the bundle: %s" % (error.filename, error.strerror)
+                        raise RSConnectException(msg) from error
+                    raise RSConnectException("Unable to create the bundle: %s" % error) from error
+                return 0
+            self._buffer = chunk
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self) -> None:
+        # Unblock the producer if the stream is abandoned before it is fully read.
+        self._aborted.set()
+        super().close()
+
+
+def source_date_epoch() -> Optional[int]:
+    """
+    The timestamp from the SOURCE_DATE_EPOCH environment variable, or None if it
+    isn't set. Bundle members modified after it are dated at that time instead.
+    """
+    value = os.environ.get(SOURCE_DATE_EPOCH)
+    if value is None or value.strip() == "":
+        return None
+    try:
+        epoch = int(value)
+    except ValueError:
+        raise RSConnectException("%s must be a Unix timestamp, not %r." % (SOURCE_DATE_EPOCH, value))
+    if epoch < 0:
+        raise RSConnectException("%s must not be negative." % SOURCE_DATE_EPOCH)
+    return epoch
+
+
+def normalize_file_mode(mode: int) -> int:
+    """The permissions a file is archived with: 0755 if it is executable, otherwise 0644."""
+    return 0o755 if mode & 0o111 else 0o644
+
+
+def normalize_tarinfo(tarinfo: tarfile.TarInfo, epoch: Optional[int] = None) -> tarfile.TarInfo:
+    """
+    Remove what a tarball member's header would otherwise take from the machine
+    that built it: the owner is cleared, permissions become 0644, or 0755 for
+    directories and executables, and the modification time is truncated to whole
+    seconds (which also keeps tarfile from adding a PAX header to every member)
+    and clamped to epoch, when given.
+    """
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = ""
+    if tarinfo.issym():
+        tarinfo.mode = 0o777
+    elif tarinfo.isdir():
+        tarinfo.mode = 0o755
+    else:
+        tarinfo.mode = normalize_file_mode(tarinfo.mode)
+    tarinfo.mtime = int(tarinfo.mtime)
+    if epoch is not None and tarinfo.mtime > epoch:
+        tarinfo.mtime = epoch
+    return tarinfo
+
+
+class _HashingReader:
+    """
+    Wraps a file being copied into a tarball, hashing each chunk as tarfile reads
+    it, so the file's checksum comes from the same read as its archive member.
+    """
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        self._fileobj = fileobj
+        self._hasher = make_hasher()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self._hasher.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
+class BundleArchive:
+    """
+    Collects the members of a bundle tarball so the archive can be produced in a
+    single pass once everything that goes into it is known.
+
+    Members are added with the same ``add``/``addfile`` calls used on a
+    ``tarfile.TarFile``, so the ``bundle_add_file`` and ``bundle_add_buffer``
+    helpers work with either.
+
+    :param base_dir: the directory the bundled files come from. When given, file
+    checksums cached for that directory are used to compute the digest, and the
+    checksums of the files read while writing the archive are added to the cache.
+    :param checksums: checksums already computed for the bundled files, by
+    arcname, such as those in the manifest built for the bundle. The digest uses
+    them rather than reading the files again.
+    :param use_checksum_cache: whether to use the checksum cache for base_dir.
+    """
+
+    def __init__(
+        self,
+        base_dir: Optional[str] = None,
+        checksums: Optional[Mapping[str, str]] = None,
+        use_checksum_cache: bool = True,
+    ) -> None:
+        self.base_dir = base_dir
+        self.use_checksum_cache = use_checksum_cache
+        self._known_checksums = dict(checksums or {})
+        self._members: list[tuple[str, str | None, tarfile.TarInfo | None, bytes]] = []
+        # The md5 checksum of each regular file, by arcname, computed while writing.
+        self.checksums: dict[str, str] = {}
+        # The normalized mode of each regular file, by arcname, as written.
+        self.modes: dict[str, int] = {}
+
+    def add(self, name: str, arcname: Optional[str] = None) -> None:
+        self._members.append((arcname if arcname is not None else name, name, None, b""))
+
+    def addfile(self, tarinfo: tarfile.TarInfo, fileobj: Optional[IO[bytes]] = None) -> None:
+        data = fileobj.read() if fileobj is not None else b""
+        self._members.append((tarinfo.name, None, tarinfo, data))
+
+    def digest(self) -> Optional[str]:
+        """
+        Compute a digest of the bundle's contents, the name, normalized mode and
+        checksum of each member, without building the tarball. Two bundles with
+        the same digest contain the same files. Returns None if the bundle includes
+        a directory, whose contents aren't tracked member by member.
+        """
+        files = [(arcname, path) for arcname, path, _, _ in self._members if path is not None]
+        if any(isdir(path) for _, path in files):
+            return None
+        modes = [normalize_file_mode(os.stat(path).st_mode) for _, path in files]
+        known = [self._known_checksums.get(Path(arcname).as_posix()) for arcname, _ in files]
+        missing = [path for (_, path), checksum in zip(files, known) if checksum is None]
+        computed: Iterator[str] = iter([])
+        if missing:
+            cache = self._checksum_cache()
+            computed = iter(file_checksums(missing, cache=cache))
+        checksums = [checksum if checksum is not None else next(computed) for checksum in known]
+        return self._digest(iter(zip(checksums, modes)))
+
+    def written_digest(self) -> Optional[str]:
+        """
+        The digest of the files as they were read by the last call to write(), or
+        None if some of them weren't archived as regular files.
+        """
+        return self._digest(
+            (self.checksums.get(arcname), self.modes.get(arcname))
+            for arcname, path, _, _ in self._members
+            if path is not None
+        )
+
+    def _digest(self, files: Iterator[tuple[Optional[str], Optional[int]]]) -> Optional[str]:
+        hasher = hashlib.sha256()
+        for arcname, path, tarinfo, data in self._members:
+            if path is not None:
+                checksum, mode = next(files)
+            else:
+                checksum, mode = buffer_checksum(data), normalize_file_mode(cast(tarfile.TarInfo, tarinfo).mode)
+            if checksum is None or mode is None:
+                return None
+            hasher.update(("%s\0%o\0%s\n" % (Path(arcname).as_posix(), mode, checksum)).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def _checksum_cache(self) -> Optional[ChecksumCache]:
+        if not self.use_checksum_cache or not self.base_dir or not isdir(self.base_dir):
+            return None
+        return ChecksumCache(self.base_dir)
+
+    def write(self, fileobj: IO[bytes], compression_level: int = DEFAULT_COMPRESSION_LEVEL) -> None:
+        """
+        Write the archive, as a gzip'd tarball, to the given file object. Files that
+        are already compressed are stored rather than deflated again; the others are
+        compressed at compression_level, from 1 (fastest) to 9 (smallest).
+
+        Each file is read once, in large chunks that are both hashed and archived;
+        the resulting checksums are available in ``checksums`` afterwards.
+
+        The output depends only on the members, their contents and modification
+        times: owners are dropped and permissions normalized (see
+        normalize_tarinfo), so the same files always produce the same tarball.
+        """
+        level = compression_level
+        epoch = source_date_epoch()
+        stats: dict[str, os.stat_result] = {}
+        self.checksums = {}
+        self.modes = {}
+        with ParallelGzipWriter(fileobj, level) as gz:
+            with tarfile.open(mode="w", fileobj=cast(IO[bytes], gz), copybufsize=_CHECKSUM_CHUNK_SIZE) as bundle:
+                for arcname, path, tarinfo, data in self._members:
+                    gz.set_level(STORE_ONLY if is_precompressed(arcname) else level)
+                    if path is not None:
+                        self._add_path(bundle, path, arcname, stats, epoch)
+                    else:
+                        bundle.addfile(normalize_tarinfo(tarinfo, epoch), io.BytesIO(data))
+                gz.set_level(level)
+
+        cache = self._checksum_cache()
+        if cache is not None:
+            for arcname, path, _, _ in self._members:
+                if path is not None and path in stats:
+                    cache.set(path, stats[path], self.checksums[arcname])
+            cache.save()
+
+    def _add_path(
+        self,
+        bundle: tarfile.TarFile,
+        path: str,
+        arcname: str,
+        stats: dict[str, os.stat_result],
+        epoch: Optional[int],
+    ) -> None:
+        tarinfo = bundle.gettarinfo(path, arcname=arcname)
+        if not tarinfo.isreg():
+            # Directories, symlinks and hard links are archived as tarfile would.
+            bundle.add(path, arcname=arcname, filter=lambda info: normalize_tarinfo(info, epoch))
+            return
+        with open(path, "rb") as f:
+            # Describe the file that was opened, so the header, the data and the
+            # cached stat all agree even if the file was replaced in the meantime.
+            stat = os.fstat(f.fileno())
+            tarinfo = bundle.gettarinfo(arcname=arcname, fileobj=f)
+            reader = _HashingReader(f)
+            bundle.addfile(normalize_tarinfo(tarinfo, epoch), cast(IO[bytes], reader))
+        stats[path] = stat
+        self.checksums[arcname] = reader.hexdigest()
+        self.modes[arcname] = tarinfo.mode
+
+    def to_file(self, stream: Optional[bool] = None) -> typing.IO[bytes]:
+        """
+        Produce the bundle tarball. Nothing is written until the returned file is
+        first used, so a caller can look at the bundle's digest and skip it entirely.
+
+        :param stream: when True, the file is a BundleStream that builds the tarball
+        in a background thread as it is read. When False, the tarball is written to a
+        temporary file. Defaults to the CONNECT_STREAM_BUNDLE environment variable.
+        :return: a BundleFile containing the bundle tarball.
+        """
+        if stream is None:
+            stream = stream_bundle_enabled()
+        # Fail now, as tarfile would, rather than once the upload has started.
+        for _, path, _, _ in self._members:
+            if path is not None:
+                os.lstat(path)
+        return cast(typing.IO[bytes], BundleFile(self, stream))
+
+    def _materialize(
+        self,
+        stream: bool,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        cache_writer: Optional[BundleCacheWriter] = None,
+        digest: Optional[str] = None,
+    ) -> typing.IO[bytes]:
+        def produce(fileobj: IO[bytes]) -> None:
+            if cache_writer is None:
+                self.write(fileobj, compression_level)
+                return
+            try:
+                self.write(cast(IO[bytes], _TeeWriter(fileobj, cache_writer)), compression_level)
+            except BaseException:
+                cache_writer.discard()
+                raise
+            # Only cache the tarball under the digest if it has the files the digest was computed from.
+            if self.written_digest() == digest:
+                cache_writer.commit()
+            else:
+                cache_writer.discard()
+
+        if stream:
+            return cast(typing.IO[bytes], BundleStream(produce))
+        bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
+        produce(cast(IO[bytes], bundle_file))
+        bundle_file.seek(0)
+        return bundle_file
+
+
+class _TeeWriter:
+    """Writes everything to both a file object and a bundle cache writer."""
+
+    def __init__(self, fileobj: IO[bytes], cache_writer: BundleCacheWriter) -> None:
+        self._fileobj = fileobj
+        self._cache_writer = cache_writer
+
+    def write(self, data: bytes) -> int:
+        self._cache_writer.write(data)
+        return self._fileobj.write(data)
+
+    def flush(self) -> None:
+        self._fileobj.flush()
+
+
+class BundleFile(io.RawIOBase):
+    """
+    The tarball for a BundleArchive, built the first time it is read.
+
+    When a cache is set, a tarball with the same digest and compression level is
+    read from the cache instead of being built, and a newly built one is added to it.
+    """
+
+    def __init__(self, archive: BundleArchive, stream: bool) -> None:
+        super().__init__()
+        self.archive = archive
+        self.cache: Optional[BundleCache] = None
+        self.compression_level = DEFAULT_COMPRESSION_LEVEL
+        self._stream = stream
+        self._file: typing.IO[bytes] | None = None
+        self._digest: Optional[str] = None
+        self._digested = False
+
+    def digest(self) -> Optional[str]:
+        """The digest of the archive's contents; see BundleArchive.digest. Computed once."""
+        if not self._digested:
+            self._digest = self.archive.digest()
+            self._digested = True
+        return self._digest
+
+    def _open(self) -> typing.IO[bytes]:
+        if self._file is not None:
+            return self._file
+        digest = self.digest() if self.cache is not None else None
+        if self.cache is None or digest is None:
+            self._file = self.archive._materialize(self._stream, self.compression_level)
+            return self._file
+
+        key = self.cache.key(digest, self.compression_level, source_date_epoch())
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.log(VERBOSE, "Using cached bundle %s", self.cache.path(key))
+            self._file = cached
+        else:
+            self._file = self.archive._materialize(self._stream, self.compression_level, self.cache.writer(key), digest)
+        return self._file
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._open().seekable()
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return self._open().read(-1 if size is None else size)
+
+    def readinto(self, b) -> int:
+        return self._open().readinto(b)  # pyright: ignore[reportAttributeAccessIssue]
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._open().seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._open().tell()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        super().close()
+
+
 class Bundle:
     def __init__(self) -> None:
         self.file_paths: set[str] = set()
@@ -387,23 +866,26 @@ class Bundle:
     def discard_file(self, filepath: str) -> None:
         self.file_paths.discard(filepath)
 
-    def to_file(self, deploy_dir: str) -> typing.IO[bytes]:
-        bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
-        with tarfile.open(mode="w:gz", fileobj=bundle_file) as bundle:
-            for fp in self.file_paths:
-                if Path(fp).name in self.buffer:
-                    continue
-                rel_path = Path(fp).relative_to(deploy_dir)
-                logger.log(VERBOSE, "Adding file: %s", fp)
-                bundle.add(fp, arcname=rel_path)
-            for k, v in self.buffer.items():
-                buf = io.BytesIO(to_bytes(v))
-                file_info = tarfile.TarInfo(k)
-                file_info.size = len(buf.getvalue())
-                logger.log(VERBOSE, "Adding file: %s", k)
-                bundle.addfile(file_info, buf)
-        bundle_file.seek(0)
-        return bundle_file
+    def to_file(
+        self,
+        deploy_dir: str,
+        checksums: Optional[Mapping[str, str]] = None,
+        use_checksum_cache: bool = True,
+    ) -> typing.IO[bytes]:
+        bundle = BundleArchive(deploy_dir, checksums, use_checksum_cache)
+        for fp in sorted(self.file_paths):
+            if Path(fp).name in self.buffer:
+                continue
+            rel_path = Path(fp).relative_to(deploy_dir)
+            logger.log(VERBOSE, "Adding file: %s", fp)
+            bundle.add(fp, arcname=str(rel_path))
+        for k, v in self.buffer.items():
+            buf = io.BytesIO(to_bytes(v))
+            file_info = tarfile.TarInfo(k)
+            file_info.size = len(buf.getvalue())
+            logger.log(VERBOSE, "Adding file: %s", k)
+            bundle.addfile(file_info, buf)
+        return bundle.to_file()
 
     def add_to_buffer(self, key: str, value: str):
         self.buffer[key] = value
@@ -451,11 +933,37 @@ def manifest_add_file(manifest: ManifestData, rel_path: str, base_dir: str) -> N
     manifest["files"][manifestPath] = {"checksum": file_checksum(path)}
 
 
+def manifest_add_files(
+    manifest: ManifestData,
+    rel_paths: Sequence[str],
+    base_dir: str,
+    use_checksum_cache: bool = True,
+) -> None:
+    """Add the specified files to the manifest files section, hashing them concurrently.
+
+    Files are added in the order given, exactly as repeated calls to
+    manifest_add_file would add them.
+    """
+    rel_paths = list(rel_paths)
+    base_is_dir = os.path.isdir(base_dir)
+    paths = [join(base_dir, rel_path) if base_is_dir else rel_path for rel_path in rel_paths]
+    if "files" not in manifest:
+        manifest["files"] = {}
+    cache = ChecksumCache(base_dir) if use_checksum_cache and base_is_dir else None
+    for rel_path, checksum in zip(rel_paths, file_checksums(paths, cache=cache)):
+        manifest["files"][Path(rel_path).as_posix()] = {"checksum": checksum}
+
+
 def manifest_add_buffer(manifest: ManifestData, filename: str, buf: str | bytes) -> None:
     """Add the specified in-memory buffer to the manifest files section"""
     manifest["files"][filename] = {"checksum": buffer_checksum(buf)}
 
 
+def manifest_checksums(manifest: ManifestData) -> dict[str, str]:
+    """The checksum of each file in the manifest files section, by path."""
+    return {path: entry["checksum"] for path, entry in manifest.get("files", {}).items()}
+
+
 def make_hasher():
     try:
         return hashlib.md5()
@@ -466,19 +974,125 @@ def make_hasher():
         return hashlib.md5(usedforsecurity=False)
 
 
+def bundle_size_and_checksum(bundle: typing.IO[bytes]) -> tuple[typing.IO[bytes], int, str]:
+    """
+    The size and md5 hex digest of a bundle tarball, computed in one pass over it in
+    fixed-size chunks. A tarball that can't be rewound, such as a BundleStream, is
+    copied to a temporary file during the same pass.
+
+    :param bundle: the tarball, positioned at its start.
+    :return: the tarball to upload (the given one, rewound, or the temporary copy),
+    its size and its md5 hex digest.
+    """
+    m = make_hasher()
+    size = 0
+    seekable = bundle.seekable()
+    if seekable:
+        start = bundle.tell()
+        target = None
+    else:
+        target = tempfile.TemporaryFile(prefix="rsc_bundle")
+    for chunk in iter(lambda: bundle.read(_CHECKSUM_CHUNK_SIZE), b""):
+        m.update(chunk)
+        size += len(chunk)
+        if target is not None:
+            target.write(chunk)
+    if target is None:
+        bundle.seek(start)
+        return bundle, size, m.hexdigest()
+    bundle.close()
+    target.seek(0)
+    return cast(typing.IO[bytes], target), size, m.hexdigest()
+
+
 def file_checksum(path: str | Path) -> str:
     """Calculate the md5 hex digest of the specified file"""
     with open(path, "rb") as f:
         m = make_hasher()
-        chunk_size = 64 * 1024
 
-        chunk = f.read(chunk_size)
-        while chunk:
-            m.update(chunk)
-            chunk = f.read(chunk_size)
+        size = os.fstat(f.fileno()).st_size
+        if size >= _CHECKSUM_MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    m.update(mapped)
+                return m.hexdigest()
+            except (OSError, ValueError):
+                # Not every file can be mapped (e.g. on some network filesystems).
+                f.seek(0)
+
+        buffer = bytearray(min(_CHECKSUM_CHUNK_SIZE, max(size, 1)))
+        view = memoryview(buffer)
+        n = f.readinto(buffer)
+        while n:
+            m.update(view[:n])
+            n = f.readinto(buffer)
         return m.hexdigest()
 
 
+def checksum_workers() -> int:
+    """
+    The number of threads used to checksum files, from the CONNECT_CHECKSUM_WORKERS
+    environment variable. Defaults to the same size ThreadPoolExecutor would pick.
+    """
+    value = os.environ.get(CONNECT_CHECKSUM_WORKERS)
+    if value is None or value.strip() == "":
+        return min(32, (os.cpu_count() or 1) + 4)
+    try:
+        workers = int(value)
+    except ValueError:
+        raise RSConnectException("%s must be an integer, not %r." % (CONNECT_CHECKSUM_WORKERS, value))
+    if workers < 1:
+        raise RSConnectException("%s must be at least 1." % CONNECT_CHECKSUM_WORKERS)
+    return workers
+
+
+def bundle_cache() -> Optional[BundleCache]:
+    """Return the local bundle cache, or None if its size is 0."""
+    if bundle_cache_size() == 0:
+        return None
+    return BundleCache()
+
+
+def file_checksums(
+    paths: Sequence[str | Path],
+    workers: Optional[int] = None,
+    cache: Optional[ChecksumCache] = None,
+) -> list[str]:
+    """
+    Calculate the md5 hex digests of the specified files, in the same order.
+
+    hashlib releases the GIL while hashing, so the files are read and hashed on a
+    pool of threads (see checksum_workers); a single worker hashes them serially.
+    When a cache is given, files whose size, mtime and inode match a cached entry
+    are not read at all, and the checksums of the others are added to it.
+    """
+    paths = list(paths)
+    checksums: list[Optional[str]] = [None] * len(paths)
+    stats: dict[int, os.stat_result] = {}
+    if cache is not None:
+        for i, path in enumerate(paths):
+            stats[i] = os.stat(path)
+            checksums[i] = cache.get(str(path), stats[i])
+    missing = [i for i, checksum in enumerate(checksums) if checksum is None]
+
+    if workers is None:
+        workers = checksum_workers()
+    workers = min(workers, len(missing))
+    if workers <= 1:
+        computed = [file_checksum(paths[i]) for i in missing]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rsc_checksum") as executor:
+            computed = list(executor.map(file_checksum, [paths[i] for i in missing]))
+
+    for i, checksum in zip(missing, computed):
+        checksums[i] = checksum
+        if cache is not None:
+            cache.set(str(paths[i]), stats[i], checksum)
+    if cache is not None:
+        cache.save()
+    return typing.cast("list[str]", checksums)
+
+
 def buffer_checksum(buf: str | bytes) -> str:
     """Calculate the md5 hex digest of a buffer (str or bytes)"""
     m = make_hasher()
@@ -495,7 +1109,7 @@ def to_bytes(s: str | bytes) -> bytes:
     return s
 
 
-def bundle_add_file(bundle: tarfile.TarFile, rel_path: str, base_dir: str) -> None:
+def bundle_add_file(bundle: tarfile.TarFile | BundleArchive, rel_path: str, base_dir: str) -> None:
     """Add the specified file to the tarball.
 
     The file path is relative to the notebook directory.
@@ -505,7 +1119,7 @@ def bundle_add_file(bundle: tarfile.TarFile, rel_path: str, base_dir: str) -> No
     bundle.add(path, arcname=rel_path)
 
 
-def bundle_add_buffer(bundle: tarfile.TarFile, filename: str, contents: str | bytes) -> None:
+def bundle_add_buffer(bundle: tarfile.TarFile | BundleArchive, filename: str, contents: str | bytes) -> None:
     """Add an in-memory buffer to the tarball.
 
     `contents` may be a string or bytes object
@@ -614,12 +1228,14 @@ def make_notebook_source_bundle(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> IO[bytes]:
     """Create a bundle containing the specified notebook and python environment.
 
     Returns a file-like object containing the bundle tarball.
 
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     """
     if extra_files is None:
         extra_files = []
@@ -651,23 +1267,20 @@ def make_notebook_source_bundle(
         skip = [nb_name, environment.filename, "manifest.json"]
         extra_files = sorted(list(set(extra_files) - set(skip)))
 
-    for rel_path in extra_files:
-        manifest_add_file(manifest, rel_path, base_dir)
+    manifest_add_files(manifest, extra_files, base_dir, use_checksum_cache=use_checksum_cache)
 
     logger.debug("manifest: %r", manifest)
 
-    bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
-    with tarfile.open(mode="w:gz", fileobj=bundle_file) as bundle:
-        # add the manifest first in case we want to partially untar the bundle for inspection
-        bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
-        bundle_add_buffer(bundle, environment.filename, environment.contents)
-        bundle_add_file(bundle, nb_name, base_dir)
+    bundle = BundleArchive(base_dir, manifest_checksums(manifest), use_checksum_cache=use_checksum_cache)
+    # add the manifest first in case we want to partially untar the bundle for inspection
+    bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
+    bundle_add_buffer(bundle, environment.filename, environment.contents)
+    bundle_add_file(bundle, nb_name, base_dir)
 
-        for rel_path in extra_files:
-            bundle_add_file(bundle, rel_path, base_dir)
+    for rel_path in extra_files:
+        bundle_add_file(bundle, rel_path, base_dir)
 
-    bundle_file.seek(0)
-    return bundle_file
+    return bundle.to_file()
 
 
 def make_quarto_source_bundle(
@@ -681,6 +1294,7 @@ def make_quarto_source_bundle(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> typing.IO[bytes]:
     """
     Create a bundle containing the specified Quarto content and (optional)
@@ -689,6 +1303,7 @@ def make_quarto_source_bundle(
     Returns a file-like object containing the bundle tarball.
 
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     """
     manifest, relevant_files = make_quarto_manifest(
         file_or_directory,
@@ -701,25 +1316,21 @@ def make_quarto_source_bundle(
         env_management_py,
         env_management_r,
         r_environment,
+        use_checksum_cache=use_checksum_cache,
     )
-    bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
-
     base_dir = file_or_directory
     if not isdir(file_or_directory):
         base_dir = dirname(file_or_directory)
 
-    with tarfile.open(mode="w:gz", fileobj=bundle_file) as bundle:
-        bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
-        if environment:
-            bundle_add_buffer(bundle, environment.filename, environment.contents)
-
-        for rel_path in relevant_files:
-            bundle_add_file(bundle, rel_path, base_dir)
+    bundle = BundleArchive(base_dir, manifest_checksums(manifest), use_checksum_cache=use_checksum_cache)
+    bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
+    if environment:
+        bundle_add_buffer(bundle, environment.filename, environment.contents)
 
-    # rewind file pointer
-    bundle_file.seek(0)
+    for rel_path in relevant_files:
+        bundle_add_file(bundle, rel_path, base_dir)
 
-    return bundle_file
+    return bundle.to_file()
 
 
 def make_html_manifest(
@@ -769,17 +1380,14 @@ def make_notebook_html_bundle(
     nb_name = basename(filename)
     filename = splitext(nb_name)[0] + ".html"
 
-    bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
-    with tarfile.open(mode="w:gz", fileobj=bundle_file) as bundle:
-        bundle_add_buffer(bundle, filename, output)
+    bundle = BundleArchive()
+    bundle_add_buffer(bundle, filename, output)
 
-        # manifest
-        manifest = make_html_manifest(filename)
-        bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
+    # manifest
+    manifest = make_html_manifest(filename)
+    bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
 
-    # rewind file pointer
-    bundle_file.seek(0)
-    return bundle_file
+    return bundle.to_file()
 
 
 def keep_manifest_specified_file(relative_path: str, ignore_path_set: set[Path] = directories_to_ignore) -> bool:
@@ -944,7 +1552,7 @@ def open_bundle(bundle_path: str | Path) -> typing.IO[bytes]:
     return open(bundle_path, "rb")
 
 
-def make_manifest_bundle(manifest_path: str | Path) -> typing.IO[bytes]:
+def make_manifest_bundle(manifest_path: str | Path, use_checksum_cache: bool = True) -> typing.IO[bytes]:
     """Create a bundle, given a manifest.
 
     :return: a file-like object containing the bundle tarball.
@@ -958,23 +1566,19 @@ def make_manifest_bundle(manifest_path: str | Path) -> typing.IO[bytes]:
         # this will be created
         files.remove("manifest.json")
 
-    bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
-    with tarfile.open(mode="w:gz", fileobj=bundle_file) as bundle:
-        # add the manifest first in case we want to partially untar the bundle for inspection
-        bundle_add_buffer(bundle, "manifest.json", raw_manifest)
-
-        for rel_path in files:
-            bundle_add_file(bundle, rel_path, base_dir)
+    bundle = BundleArchive(base_dir, use_checksum_cache=use_checksum_cache)
+    # add the manifest first in case we want to partially untar the bundle for inspection
+    bundle_add_buffer(bundle, "manifest.json", raw_manifest)
 
-    # rewind file pointer
-    bundle_file.seek(0)
+    for rel_path in files:
+        bundle_add_file(bundle, rel_path, base_dir)
 
-    return bundle_file
+    return bundle.to_file()
 
 
 def create_glob_set(directory: str | Path, excludes: Sequence[str]) -> GlobSet:
     """
-    Takes a list of glob strings and produces a GlobSet for path matching.
+    Takes a list of glob strings and produces a compiled GlobSet for path matching.
 
     **Note:** we don't use Python's glob support because it takes way too
     long to run when large file trees are involved in conjunction with the
@@ -993,7 +1597,7 @@ def create_glob_set(directory: str | Path, excludes: Sequence[str]) -> GlobSet:
                 file_pattern = join(file_pattern, "**/*")
             work.append(file_pattern)
 
-    return GlobSet(work)
+    return GlobSet(work, compiled=True)
 
 
 def make_api_manifest(
@@ -1007,6 +1611,7 @@ def make_api_manifest(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> tuple[ManifestData, list[str]]:
     """
     Makes a manifest for an API.
@@ -1023,6 +1628,7 @@ def make_api_manifest(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: the manifest and a list of the files involved.
     """
     if is_environment_dir(directory):
@@ -1051,9 +1657,7 @@ def make_api_manifest(
     )
 
     manifest_add_buffer(manifest, environment.filename, environment.contents)
-
-    for rel_path in relevant_files:
-        manifest_add_file(manifest, rel_path, directory)
+    manifest_add_files(manifest, relevant_files, directory, use_checksum_cache=use_checksum_cache)
 
     return manifest, relevant_files
 
@@ -1063,6 +1667,7 @@ def create_html_manifest(
     entrypoint: Optional[str],
     extra_files: Sequence[str],
     excludes: Sequence[str],
+    use_checksum_cache: bool = True,
 ) -> Manifest:
     """
     Creates and writes a manifest.json file for the given path.
@@ -1075,6 +1680,7 @@ def create_html_manifest(
     portion of the entry point file name will be used to derive one. Previous default = None.
     :param extra_files: any extra files that should be included in the manifest. Previous default = None.
     :param excludes: a sequence of glob patterns that will exclude matched files.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: the manifest data structure.
     """
     if not path:
@@ -1110,8 +1716,7 @@ def create_html_manifest(
     manifest.deploy_dir = deploy_dir
 
     file_list = create_file_list(path, extra_files, excludes, use_abspath=True)
-    for abs_path in file_list:
-        manifest.add_file(abs_path)
+    manifest.add_files(file_list, use_checksum_cache=use_checksum_cache)
 
     return manifest
 
@@ -1121,6 +1726,7 @@ def make_tensorflow_manifest(
     extra_files: Sequence[str],
     excludes: Sequence[str],
     image: Optional[str] = None,
+    use_checksum_cache: bool = True,
 ) -> ManifestData:
     """
     Creates and writes a manifest.json file for the given path.
@@ -1129,6 +1735,7 @@ def make_tensorflow_manifest(
     :param extra_files: any extra files that should be included in the manifest. Previous default = None.
     :param excludes: a sequence of glob patterns that will exclude matched files.
     :param image: the optional docker image to be specified for off-host execution. Default = None.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: the manifest data structure.
     """
     if not directory:
@@ -1146,8 +1753,7 @@ def make_tensorflow_manifest(
     )
 
     file_list = create_file_list(directory, extra_files, excludes)
-    for rel_path in file_list:
-        manifest_add_file(manifest, rel_path, directory)
+    manifest_add_files(manifest, file_list, directory, use_checksum_cache=use_checksum_cache)
     return manifest
 
 
@@ -1156,6 +1762,7 @@ def make_html_bundle(
     entrypoint: Optional[str],
     extra_files: Sequence[str],
     excludes: Sequence[str],
+    use_checksum_cache: bool = True,
 ) -> typing.IO[bytes]:
     """
     Create an html bundle, given a path and/or entrypoint.
@@ -1166,6 +1773,7 @@ def make_html_bundle(
     :param entrypoint: the main entry point.
     :param extra_files: a sequence of any extra files to include in the bundle.
     :param excludes: a sequence of glob patterns that will exclude matched files.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: a file-like object containing the bundle tarball.
     """
 
@@ -1174,6 +1782,7 @@ def make_html_bundle(
         entrypoint=entrypoint,
         extra_files=extra_files,
         excludes=excludes,
+        use_checksum_cache=use_checksum_cache,
     )
 
     if manifest.data.get("files") is None:
@@ -1192,7 +1801,9 @@ def make_html_bundle(
     manifest_flattened_copy_data = manifest.get_flattened_copy().data
     bundle.add_to_buffer("manifest.json", json.dumps(manifest_flattened_copy_data, indent=2))
 
-    return bundle.to_file(manifest.deploy_dir)
+    return bundle.to_file(
+        manifest.deploy_dir, manifest_checksums(manifest_flattened_copy_data), use_checksum_cache=use_checksum_cache
+    )
 
 
 def make_tensorflow_bundle(
@@ -1200,6 +1811,7 @@ def make_tensorflow_bundle(
     extra_files: Sequence[str],
     excludes: Sequence[str],
     image: Optional[str] = None,
+    use_checksum_cache: bool = True,
 ) -> typing.IO[bytes]:
     """
     Create an html bundle, given a path and/or entrypoint.
@@ -1210,6 +1822,7 @@ def make_tensorflow_bundle(
     :param extra_files: a sequence of any extra files to include in the bundle.
     :param excludes: a sequence of glob patterns that will exclude matched files.
     :param image: the optional docker image to be specified for off-host execution. Default = None.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: a file-like object containing the bundle tarball.
     """
 
@@ -1218,6 +1831,7 @@ def make_tensorflow_bundle(
         extra_files=extra_files,
         excludes=excludes,
         image=image,
+        use_checksum_cache=use_checksum_cache,
     )
 
     if not manifest.get("files"):
@@ -1229,7 +1843,7 @@ def make_tensorflow_bundle(
 
     bundle.add_to_buffer("manifest.json", json.dumps(manifest, indent=2))
 
-    return bundle.to_file(directory)
+    return bundle.to_file(directory, manifest_checksums(manifest), use_checksum_cache=use_checksum_cache)
 
 
 def create_file_list(
@@ -1259,24 +1873,67 @@ def create_file_list(
         file_set.add(path_to_add)
         return sorted(file_set)
 
-    for cur_dir, _, files in os.walk(path):
-        if Path(cur_dir) in exclude_paths:
-            continue
-        if any(parent in exclude_paths for parent in Path(cur_dir).parents):
+    for cur_path, rel_path in _walk_files(path, exclude_paths, glob_set, set(extra_files)):
+        file_set.add(abspath(cur_path) if use_abspath else rel_path)
+
+    return sorted(file_set)
+
+
+def _walk_files(
+    path: str,
+    exclude_paths: set[Path],
+    glob_set: GlobSet,
+    extra_files: set[str],
+) -> typing.Iterator[tuple[str, str]]:
+    """
+    Yield a (path, relative path) pair for each file under the given directory
+    that isn't excluded, in a single pass over the tree.
+
+    Excluded and ignored directories are pruned before they are read, and paths
+    are compared as normalized strings (the form pathlib would give them) rather
+    than by building Path objects for every file. Like os.walk, symbolic links to
+    directories are not followed and unreadable directories are skipped.
+    """
+    root = Path(path)
+    if root in exclude_paths or any(parent in exclude_paths for parent in root.parents):
+        return
+    # Paths under the walked directory are compared against the excludes as given
+    # (e.g. "venv" when walking "."), and relative paths against both the excludes
+    # and the directories that are never bundled.
+    exclude_keys = {str(p) for p in exclude_paths}
+    ignore_keys = exclude_keys | {str(p) for p in directories_to_ignore}
+    if "." in ignore_keys:
+        return
+    extra_dirs = {str(parent) for extra in extra_files for parent in Path(extra).parents}
+
+    # (directory as passed to os.path.join, its normalized form, normalized relative form)
+    stack = [(path, str(root), "")]
+    while stack:
+        cur_dir, cur_key, rel_dir = stack.pop()
+        try:
+            with os.scandir(cur_dir) as it:
+                entries = list(it)
+        except OSError:
             continue
-        for file in files:
-            cur_path = os.path.join(cur_dir, file)
-            rel_path = relpath(cur_path, path)
+        for entry in entries:
+            cur_path = os.path.join(cur_dir, entry.name)
+            key = entry.name if cur_key == "." else os.path.join(cur_key, entry.name)
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
 
-            if Path(cur_path) in exclude_paths:
+            if key in exclude_keys or rel_path in ignore_keys:
                 continue
-            if keep_manifest_specified_file(rel_path, exclude_paths | directories_to_ignore) and (
-                rel_path in extra_files or not glob_set.matches(cur_path)
-            ):
-                path_to_add = abspath(cur_path) if use_abspath else rel_path
-                file_set.add(path_to_add)
-
-    return sorted(file_set)
+            if is_dir:
+                if entry.is_symlink():
+                    continue
+                if rel_path not in extra_dirs and glob_set.matches_all_under(key):
+                    continue
+                stack.append((cur_path, key, rel_path))
+            elif rel_path in extra_files or not glob_set.matches(key):
+                yield cur_path, rel_path
 
 
 def infer_entrypoint(path: str, mimetype: str) -> str | None:
@@ -1398,6 +2055,7 @@ def make_voila_bundle(
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
     multi_notebook: bool = False,
+    use_checksum_cache: bool = True,
 ) -> typing.IO[bytes]:
     """
     Create an voila bundle, given a path and/or entrypoint.
@@ -1417,6 +2075,7 @@ def make_voila_bundle(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: a file-like object containing the bundle tarball.
     """
 
@@ -1432,6 +2091,7 @@ def make_voila_bundle(
         env_management_r=env_management_r,
         r_environment=r_environment,
         multi_notebook=multi_notebook,
+        use_checksum_cache=use_checksum_cache,
     )
 
     if manifest.data.get("files") is None:
@@ -1452,7 +2112,9 @@ def make_voila_bundle(
         manifest_flattened_copy_data["metadata"]["entrypoint"] = ""
     bundle.add_to_buffer("manifest.json", json.dumps(manifest_flattened_copy_data, indent=2))
 
-    return bundle.to_file(manifest.deploy_dir)
+    return bundle.to_file(
+        manifest.deploy_dir, manifest_checksums(manifest_flattened_copy_data), use_checksum_cache=use_checksum_cache
+    )
 
 
 def make_api_bundle(
@@ -1466,6 +2128,7 @@ def make_api_bundle(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> typing.IO[bytes]:
     """
     Create an API bundle, given a directory path and a manifest.
@@ -1482,6 +2145,7 @@ def make_api_bundle(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: a file-like object containing the bundle tarball.
     """
     manifest, relevant_files = make_api_manifest(
@@ -1495,20 +2159,16 @@ def make_api_bundle(
         env_management_py,
         env_management_r,
         r_environment,
+        use_checksum_cache=use_checksum_cache,
     )
-    bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
-
-    with tarfile.open(mode="w:gz", fileobj=bundle_file) as bundle:
-        bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
-        bundle_add_buffer(bundle, environment.filename, environment.contents)
+    bundle = BundleArchive(directory, manifest_checksums(manifest), use_checksum_cache=use_checksum_cache)
+    bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
+    bundle_add_buffer(bundle, environment.filename, environment.contents)
 
-        for rel_path in relevant_files:
-            bundle_add_file(bundle, rel_path, directory)
-
-    # rewind file pointer
-    bundle_file.seek(0)
+    for rel_path in relevant_files:
+        bundle_add_file(bundle, rel_path, directory)
 
-    return bundle_file
+    return bundle.to_file()
 
 
 def make_nodejs_manifest(
@@ -1519,6 +2179,7 @@ def make_nodejs_manifest(
     excludes: Sequence[str],
     image: Optional[str] = None,
     env_management_node: Optional[bool] = None,
+    use_checksum_cache: bool = True,
 ) -> tuple[ManifestData, list[str]]:
     """
     Makes a manifest for a Node.js application.
@@ -1530,6 +2191,7 @@ def make_nodejs_manifest(
     :param excludes: a sequence of glob patterns that will exclude matched files.
     :param image: optional docker image for off-host execution.
     :param env_management_node: False prevents Connect from managing the Node.js environment.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: the manifest and a list of the files involved.
     """
     extra_files = list(extra_files or [])
@@ -1571,8 +2233,7 @@ def make_nodejs_manifest(
             manifest_environment["environment_management"] = {"node": env_management_node}
         manifest["environment"] = manifest_environment
 
-    for rel_path in relevant_files:
-        manifest_add_file(manifest, rel_path, directory)
+    manifest_add_files(manifest, relevant_files, directory, use_checksum_cache=use_checksum_cache)
 
     return manifest, relevant_files
 
@@ -1585,6 +2246,7 @@ def make_nodejs_bundle(
     excludes: Sequence[str],
     image: Optional[str] = None,
     env_management_node: Optional[bool] = None,
+    use_checksum_cache: bool = True,
 ) -> typing.IO[bytes]:
     """
     Create a Node.js application bundle, given a directory path.
@@ -1596,6 +2258,7 @@ def make_nodejs_bundle(
     :param excludes: a sequence of glob patterns that will exclude matched files.
     :param image: optional docker image for off-host execution.
     :param env_management_node: False prevents Connect from managing the Node.js environment.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: a file-like object containing the bundle tarball.
     """
     manifest, relevant_files = make_nodejs_manifest(
@@ -1606,18 +2269,15 @@ def make_nodejs_bundle(
         excludes,
         image,
         env_management_node,
+        use_checksum_cache=use_checksum_cache,
     )
-    bundle_file = tempfile.TemporaryFile(prefix="rsc_bundle")
+    bundle = BundleArchive(directory, manifest_checksums(manifest), use_checksum_cache=use_checksum_cache)
+    bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
 
-    with tarfile.open(mode="w:gz", fileobj=bundle_file) as bundle:
-        bundle_add_buffer(bundle, "manifest.json", json.dumps(manifest, indent=2))
-
-        for rel_path in relevant_files:
-            bundle_add_file(bundle, rel_path, directory)
-
-    bundle_file.seek(0)
+    for rel_path in relevant_files:
+        bundle_add_file(bundle, rel_path, directory)
 
-    return bundle_file
+    return bundle.to_file()
 
 
 def _create_quarto_file_list(
@@ -1660,6 +2320,7 @@ def make_quarto_manifest(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> tuple[ManifestData, list[str]]:
     """
     Makes a manifest for a Quarto project.
@@ -1676,6 +2337,7 @@ def make_quarto_manifest(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: the manifest and a list of the files involved.
     """
     if environment:
@@ -1730,8 +2392,7 @@ def make_quarto_manifest(
     if environment:
         manifest_add_buffer(manifest, environment.filename, environment.contents)
 
-    for rel_path in relevant_files:
-        manifest_add_file(manifest, rel_path, base_dir)
+    manifest_add_files(manifest, relevant_files, base_dir, use_checksum_cache=use_checksum_cache)
 
     return manifest, relevant_files
 
@@ -1942,6 +2603,7 @@ def create_notebook_manifest_and_environment_file(
     image: Optional[str] = None,
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
+    use_checksum_cache: bool = True,
 ) -> None:
     """
     Creates and writes a manifest.json file for the given notebook entry point file.
@@ -1965,6 +2627,7 @@ def create_notebook_manifest_and_environment_file(
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return:
     """
     if (
@@ -1978,6 +2641,7 @@ def create_notebook_manifest_and_environment_file(
             image,
             env_management_py,
             env_management_r,
+            use_checksum_cache=use_checksum_cache,
         )
         or force
     ):
@@ -1995,6 +2659,7 @@ def write_notebook_manifest_json(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> bool:
     """
     Creates and writes a manifest.json file for the given entry point file.  If
@@ -2017,6 +2682,7 @@ def write_notebook_manifest_json(
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: whether or not the environment file (requirements.txt, environment.yml,
     etc.) that goes along with the manifest exists.
     """
@@ -2052,8 +2718,7 @@ def write_notebook_manifest_json(
     manifest_add_file(manifest_data, file_name, directory)
     manifest_add_buffer(manifest_data, environment.filename, environment.contents)
 
-    for rel_path in extra_files:
-        manifest_add_file(manifest_data, rel_path, directory)
+    manifest_add_files(manifest_data, extra_files, directory, use_checksum_cache=use_checksum_cache)
 
     write_manifest_json(manifest_path, manifest_data)
 
@@ -2081,6 +2746,7 @@ def create_voila_manifest(
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
     multi_notebook: bool = False,
+    use_checksum_cache: bool = True,
 ) -> Manifest:
     """
     Creates and writes a manifest.json file for the given path.
@@ -2100,6 +2766,7 @@ def create_voila_manifest(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: the manifest data structure.
     """
     if not path:
@@ -2154,8 +2821,7 @@ def create_voila_manifest(
     manifest.add_to_buffer(join(deploy_dir, environment.filename), environment.contents)
 
     file_list = create_file_list(path, extra_files, excludes, use_abspath=True)
-    for abs_path in file_list:
-        manifest.add_file(abs_path)
+    manifest.add_files(file_list, use_checksum_cache=use_checksum_cache)
     return manifest
 
 
@@ -2171,6 +2837,7 @@ def write_voila_manifest_json(
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
     multi_notebook: bool = False,
+    use_checksum_cache: bool = True,
 ) -> bool:
     """
     Creates and writes a manifest.json file for the given path.
@@ -2190,6 +2857,7 @@ def write_voila_manifest_json(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: whether the manifest was written.
     """
     manifest = create_voila_manifest(
@@ -2204,6 +2872,7 @@ def write_voila_manifest_json(
         env_management_r=env_management_r,
         r_environment=r_environment,
         multi_notebook=multi_notebook,
+        use_checksum_cache=use_checksum_cache,
     )
 
     if manifest.entrypoint is None:
@@ -2229,6 +2898,7 @@ def create_api_manifest_and_environment_file(
     image: Optional[str] = None,
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
+    use_checksum_cache: bool = True,
 ) -> None:
     """
     Creates and writes a manifest.json file for the given Python API entry point.  If
@@ -2249,6 +2919,7 @@ def create_api_manifest_and_environment_file(
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return:
     """
     if (
@@ -2262,6 +2933,7 @@ def create_api_manifest_and_environment_file(
             image,
             env_management_py,
             env_management_r,
+            use_checksum_cache=use_checksum_cache,
         )
         or force
     ):
@@ -2279,6 +2951,7 @@ def write_api_manifest_json(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> bool:
     """
     Creates and writes a manifest.json file for the given entry point file.  If
@@ -2298,6 +2971,7 @@ def write_api_manifest_json(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     :return: whether or not the environment file (requirements.txt, environment.yml,
     etc.) that goes along with the manifest exists.
     """
@@ -2313,6 +2987,7 @@ def write_api_manifest_json(
         env_management_py,
         env_management_r,
         r_environment,
+        use_checksum_cache=use_checksum_cache,
     )
     manifest_path = join(directory, "manifest.json")
 
@@ -2329,6 +3004,7 @@ def write_nodejs_manifest_json(
     excludes: Sequence[str],
     image: Optional[str] = None,
     env_management_node: Optional[bool] = None,
+    use_checksum_cache: bool = True,
 ) -> None:
     """
     Creates and writes a manifest.json file for a Node.js application.
@@ -2340,6 +3016,7 @@ def write_nodejs_manifest_json(
     :param excludes: a sequence of glob patterns that will exclude matched files.
     :param image: the optional docker image for off-host execution.
     :param env_management_node: False prevents Connect from managing the Node.js environment.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     """
     extra_files = validate_extra_files(directory, extra_files)
     manifest, _ = make_nodejs_manifest(
@@ -2350,6 +3027,7 @@ def write_nodejs_manifest_json(
         excludes,
         image,
         env_management_node,
+        use_checksum_cache=use_checksum_cache,
     )
     manifest_path = join(directory, "manifest.json")
 
@@ -2408,6 +3086,7 @@ def write_quarto_manifest_json(
     env_management_py: Optional[bool] = None,
     env_management_r: Optional[bool] = None,
     r_environment: Optional[REnvironment] = None,
+    use_checksum_cache: bool = True,
 ) -> None:
     """
     Creates and writes a manifest.json file for the given Quarto project.
@@ -2424,6 +3103,7 @@ def write_quarto_manifest_json(
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param r_environment: optional R dependencies detected from renv.lock to add to the manifest.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     """
 
     manifest, _ = make_quarto_manifest(
@@ -2437,6 +3117,7 @@ def write_quarto_manifest_json(
         env_management_py,
         env_management_r,
         r_environment,
+        use_checksum_cache=use_checksum_cache,
     )
 
     base_dir = file_or_directory
@@ -2451,6 +3132,7 @@ def write_tensorflow_manifest_json(
     extra_files: Sequence[str],
     excludes: Sequence[str],
     image: Optional[str] = None,
+    use_checksum_cache: bool = True,
 ) -> None:
     """
     Creates and writes a manifest.json file for the given TensorFlow content.
@@ -2460,6 +3142,7 @@ def write_tensorflow_manifest_json(
     :param extra_files: Any extra files to include in the manifest.
     :param excludes: A sequence of glob patterns to exclude when enumerating files to bundle.
     :param image: the optional docker image to be specified for off-host execution. Default = None.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     """
 
     manifest = make_tensorflow_manifest(
@@ -2467,6 +3150,7 @@ def write_tensorflow_manifest_json(
         extra_files,
         excludes,
         image,
+        use_checksum_cache=use_checksum_cache,
     )
     manifest_path = join(directory, "manifest.json")
     write_manifest_json(manifest_path, manifest)
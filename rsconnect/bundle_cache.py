@@ -0,0 +1,220 @@
+"""
+A local, content-addressed cache of bundle tarballs.
+
+Deploying the same files to several servers (or several times to one) produces
+identical bundles. Tarballs are kept in the ``bundles`` directory under the
+configuration directory, named by a key derived from the bundle's digest and the
+settings used to compress it, and are reused instead of being built again. The
+total size of the cache is capped; the least recently used bundles are evicted
+first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from os.path import join
+from typing import IO, NamedTuple, Optional
+
+from .exception import RSConnectException
+from .log import logger
+from .metadata import config_dirname
+
+CONNECT_BUNDLE_CACHE_SIZE = "CONNECT_BUNDLE_CACHE_SIZE"
+DEFAULT_BUNDLE_CACHE_SIZE = 1024 * 1024 * 1024
+
+# Bump when the way bundles are built changes, so older tarballs aren't reused.
+_BUNDLE_FORMAT_VERSION = 3
+_BUNDLE_SUFFIX = ".tar.gz"
+_TEMP_PREFIX = ".tmp"
+# Partially written bundles older than this were left behind by a process that died.
+_STALE_TEMP_SECONDS = 24 * 60 * 60
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """Parse a size in bytes, optionally with a K, M, G or T suffix (e.g. ``500M``)."""
+    match = re.match(r"^\s*(\d+)\s*([KMGT]?)i?B?\s*$", value, re.IGNORECASE)
+    if match is None:
+        raise RSConnectException("Invalid size %r; use a number of bytes, optionally followed by K, M or G." % value)
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]
+
+
+def bundle_cache_size() -> int:
+    """
+    The maximum total size of the bundle cache, from the CONNECT_BUNDLE_CACHE_SIZE
+    environment variable. Defaults to 1 GiB; 0 disables the cache.
+    """
+    value = os.environ.get(CONNECT_BUNDLE_CACHE_SIZE)
+    if value is None or value.strip() == "":
+        return DEFAULT_BUNDLE_CACHE_SIZE
+    try:
+        return parse_size(value)
+    except RSConnectException:
+        raise RSConnectException("%s must be a size such as 500M, not %r." % (CONNECT_BUNDLE_CACHE_SIZE, value))
+
+
+class BundleCacheEntry(NamedTuple):
+    key: str
+    path: str
+    size: int
+    last_used: float
+
+
+class BundleCacheWriter:
+    """
+    Receives a bundle tarball as it is built. The bundle only becomes visible in the
+    cache once commit() is called; failing to write it is not an error.
+    """
+
+    def __init__(self, cache: BundleCache, key: str) -> None:
+        self._cache = cache
+        self._key = key
+        self._file: Optional[IO[bytes]] = None
+        try:
+            os.makedirs(cache.directory, exist_ok=True)
+            self._file = tempfile.NamedTemporaryFile(dir=cache.directory, prefix=_TEMP_PREFIX, delete=False)
+        except OSError as error:
+            logger.debug("Unable to cache the bundle: %s", error)
+
+    @property
+    def failed(self) -> bool:
+        return self._file is None
+
+    def write(self, data: bytes) -> int:
+        if self._file is not None:
+            try:
+                self._file.write(data)
+            except OSError as error:
+                logger.debug("Unable to cache the bundle: %s", error)
+                self.discard()
+        return len(data)
+
+    def commit(self) -> bool:
+        """Add the bundle to the cache, evicting older bundles if the cache is full."""
+        if self._file is None:
+            return False
+        try:
+            self._file.close()
+            os.replace(self._file.name, self._cache.path(self._key))
+        except OSError as error:
+            logger.debug("Unable to cache the bundle: %s", error)
+            self.discard()
+            return False
+        self._file = None
+        self._cache.prune()
+        return True
+
+    def discard(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+            os.unlink(self._file.name)
+        except OSError:
+            pass
+        self._file = None
+
+
+class BundleCache:
+    """
+    :param directory: where bundles are stored. Defaults to ``bundles`` in the
+    configuration directory.
+    :param max_size: the maximum total size of the cached bundles, in bytes.
+    Defaults to bundle_cache_size().
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_size: Optional[int] = None) -> None:
+        self.directory = directory if directory is not None else join(config_dirname(), "bundles")
+        self.max_size = max_size if max_size is not None else bundle_cache_size()
+
+    @staticmethod
+    def key(digest: str, compression_level: int, source_date_epoch: Optional[int] = None) -> str:
+        """
+        The cache key of a bundle with the given digest, compressed at the given level,
+        with modification times clamped to source_date_epoch.
+        """
+        material = "%d\0%s\0%d\0%s" % (_BUNDLE_FORMAT_VERSION, digest, compression_level, source_date_epoch)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return join(self.directory, key + _BUNDLE_SUFFIX)
+
+    def get(self, key: str) -> Optional[IO[bytes]]:
+        """Open the cached bundle with the given key, or return None if there isn't one."""
+        path = self.path(key)
+        try:
+            bundle_file = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            # The modification time records when the bundle was last used.
+            os.utime(path)
+        except OSError:
+            pass
+        return bundle_file
+
+    def writer(self, key: str) -> BundleCacheWriter:
+        return BundleCacheWriter(self, key)
+
+    def entries(self) -> list[BundleCacheEntry]:
+        """The cached bundles, most recently used first."""
+        entries: list[BundleCacheEntry] = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(_BUNDLE_SUFFIX) or name.startswith(_TEMP_PREFIX):
+                continue
+            path = join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append(BundleCacheEntry(name[: -len(_BUNDLE_SUFFIX)], path, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry.last_used, reverse=True)
+        return entries
+
+    def prune(self, max_size: Optional[int] = None) -> list[BundleCacheEntry]:
+        """
+        Remove the least recently used bundles until the cache is no larger than
+        max_size (default: the cache's own limit).
+
+        :return: the bundles that were removed.
+        """
+        if max_size is None:
+            max_size = self.max_size
+        self._remove_stale_temp_files()
+        removed: list[BundleCacheEntry] = []
+        total = 0
+        for entry in self.entries():
+            total += entry.size
+            if total <= max_size:
+                continue
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                continue
+            removed.append(entry)
+        return removed
+
+    def _remove_stale_temp_files(self) -> None:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        cutoff = time.time() - _STALE_TEMP_SECONDS
+        for name in names:
+            if not name.startswith(_TEMP_PREFIX):
+                continue
+            path = join(self.directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.unlink(path)
+            except OSError:
+                pass
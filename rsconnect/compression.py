@@ -0,0 +1,197 @@
+"""
+Block-parallel gzip compression for bundle tarballs.
+
+The output is a single standard gzip member, so Connect reads it like any other
+``.tar.gz``. Following pigz, the input is cut into blocks that are deflated
+independently on a pool of threads (zlib releases the GIL). Each block is primed
+with the 32 KiB of input before it, so back-references still reach across block
+boundaries, and is ended with a sync flush so the compressed blocks can simply be
+concatenated. Because every block has its own compressor, the compression level
+can change between blocks; files that are already compressed are stored as-is.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from os.path import splitext
+from typing import IO, Deque, Optional
+
+from .exception import RSConnectException
+
+CONNECT_COMPRESSION_WORKERS = "CONNECT_COMPRESSION_WORKERS"
+
+DEFAULT_COMPRESSION_LEVEL = 9
+STORE_ONLY = 0
+
+# Files with these extensions are already compressed, so deflating them costs time
+# and gains (almost) nothing.
+PRECOMPRESSED_EXTENSIONS = frozenset(
+    [
+        ".7z",
+        ".avif",
+        ".br",
+        ".bz2",
+        ".feather",
+        ".gif",
+        ".gz",
+        ".jar",
+        ".jpeg",
+        ".jpg",
+        ".lz4",
+        ".mkv",
+        ".mov",
+        ".mp3",
+        ".mp4",
+        ".ogg",
+        ".onnx",
+        ".parquet",
+        ".png",
+        ".rds",
+        ".tgz",
+        ".webm",
+        ".webp",
+        ".whl",
+        ".woff",
+        ".woff2",
+        ".xz",
+        ".zip",
+        ".zst",
+    ]
+)
+
+_BLOCK_SIZE = 128 * 1024
+_WINDOW_SIZE = 32 * 1024
+
+
+def is_precompressed(filename: str) -> bool:
+    """Whether the file's extension marks it as already compressed."""
+    return splitext(filename)[1].lower() in PRECOMPRESSED_EXTENSIONS
+
+
+def compression_workers() -> int:
+    """
+    The number of threads used to compress bundles, from the CONNECT_COMPRESSION_WORKERS
+    environment variable. Defaults to the number of CPUs.
+    """
+    value = os.environ.get(CONNECT_COMPRESSION_WORKERS)
+    if value is None or value.strip() == "":
+        return os.cpu_count() or 1
+    try:
+        workers = int(value)
+    except ValueError:
+        raise RSConnectException("%s must be an integer, not %r." % (CONNECT_COMPRESSION_WORKERS, value))
+    if workers < 1:
+        raise RSConnectException("%s must be at least 1." % CONNECT_COMPRESSION_WORKERS)
+    return workers
+
+
+def _deflate_block(data: bytes, level: int, zdict: bytes, final: bool) -> bytes:
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter:
+    """
+    A write-only file object that gzips everything written to it into fileobj.
+
+    :param fileobj: where the compressed data is written. It is not closed.
+    :param level: the zlib compression level, 0 (store only) to 9.
+    :param workers: the number of compression threads; 1 compresses inline.
+    """
+
+    def __init__(
+        self,
+        fileobj: IO[bytes],
+        level: int = DEFAULT_COMPRESSION_LEVEL,
+        workers: Optional[int] = None,
+        block_size: int = _BLOCK_SIZE,
+    ) -> None:
+        self._fileobj = fileobj
+        self._level = level
+        self._block_size = block_size
+        self._buffer = bytearray()
+        self._window = b""
+        self._crc = 0
+        self._size = 0
+        self._closed = False
+
+        workers = compression_workers() if workers is None else workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rsc_gzip") if workers > 1 else None
+        # Bound the number of blocks in flight so memory use doesn't grow with the bundle.
+        self._max_pending = 2 * workers
+        self._pending: Deque[Future[bytes]] = deque()
+
+        # mtime is left at 0 so the same input always produces the same output.
+        xfl = 2 if level == 9 else 4 if level == 1 else 0
+        self._fileobj.write(struct.pack("<BBBBIBB", 0x1F, 0x8B, zlib.DEFLATED, 0, 0, xfl, 255))
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def set_level(self, level: int) -> None:
+        """Compress data written from now on at a different level."""
+        if level != self._level:
+            self._submit(final=False)
+            self._level = level
+
+    def write(self, data: bytes) -> int:
+        if self._closed:
+            raise ValueError("write to closed file")
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            self._submit(final=False, size=self._block_size)
+        return len(data)
+
+    def tell(self) -> int:
+        """The number of uncompressed bytes written so far."""
+        return self._size
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._submit(final=True)
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+            self._fileobj.write(struct.pack("<II", self._crc, self._size & 0xFFFFFFFF))
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ParallelGzipWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _submit(self, final: bool, size: Optional[int] = None) -> None:
+        if size is None:
+            size = len(self._buffer)
+        if size == 0 and not final:
+            return
+        block = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        zdict = self._window
+        self._window = (self._window + block)[-_WINDOW_SIZE:]
+
+        if self._executor is None:
+            self._fileobj.write(_deflate_block(block, self._level, zdict, final))
+            return
+        self._pending.append(self._executor.submit(_deflate_block, block, self._level, zdict, final))
+        # Write out finished blocks, in order, and wait for the oldest when too many are queued.
+        while self._pending and (self._pending[0].done() or len(self._pending) > self._max_pending):
+            self._fileobj.write(self._pending.popleft().result())
@@ -0,0 +1,499 @@
+"""
+An asyncio counterpart to the HTTP support in http_support
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import ssl
+import time
+from http import client as http
+from typing import IO, Any, List, Mapping, Optional, Tuple, cast
+
+from .http_support import (
+    CookieJar,
+    HTTPResponse,
+    HTTPServer,
+    JsonData,
+    _decode_body,
+    _decoders,
+    _get_proxy_for_host,
+    _ssl_context,
+)
+from .http_timing import RequestTiming
+from .log import logger
+from .timeouts import get_request_timeout
+
+# The largest response head (status line and headers) that is accepted.
+_MAX_HEAD_SIZE = 1024 * 1024
+
+# The size of the chunks in which file-like request bodies are sent.
+_BODY_CHUNK_SIZE = 64 * 1024
+
+
+class _AsyncResponse(object):
+    """
+    The status line and headers of a response, with the parts of the
+    http.client.HTTPResponse interface that HTTPResponse and CookieJar use.
+    """
+
+    def __init__(self, version: str, status: int, reason: str, headers: List[Tuple[str, str]]):
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self._headers = headers
+
+    def getheader(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        values = [value for key, value in self._headers if key.lower() == name.lower()]
+        return ", ".join(values) if values else default
+
+    def getheaders(self) -> List[Tuple[str, str]]:
+        return self._headers
+
+    def will_close(self) -> bool:
+        connection = (self.getheader("Connection") or "").lower()
+        if self.version == "HTTP/1.0":
+            return "keep-alive" not in connection
+        return "close" in connection
+
+
+class _Connection(object):
+    """An open connection to the server, and when it was last used."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def usable(self, idle_timeout: float) -> bool:
+        if self.writer.is_closing() or self.reader.at_eof():
+            return False
+        return time.monotonic() - self.last_used < idle_timeout
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncHTTPServer(HTTPServer):
+    """
+    This class provides the means to invoke HTTP requests against a server from
+    asyncio code. Requests are coroutines, so a single thread can have many of them
+    in flight.
+
+    Authorization, cookies, redirects, compressed responses, retries, rate limiting
+    and request timing hooks work the same way as for HTTPServer. Up to
+    max_connections connections are opened to the server, and kept alive for
+    reuse between requests.
+    """
+
+    # How long an idle connection is kept for reuse, in seconds.
+    idle_timeout = 30.0
+
+    def __init__(
+        self,
+        url: str,
+        disable_tls_check: bool = False,
+        ca_data: Optional[str | bytes] = None,
+        cookies: Optional[CookieJar] = None,
+        max_connections: int = 100,
+    ):
+        """
+        Constructs an AsyncHTTPServer object.
+
+        :param url: the base URL to interact with.
+        :param disable_tls_check: notes whether TLS validation should be enforced.  Only
+        relevant on HTTPS URLs.
+        :param ca_data: any certificate authority data to use in specifying client side
+        certificates.
+        :param cookies: an optional cookie jar.
+        :param max_connections: the most connections to have open to the server at once.
+        """
+        super().__init__(url, disable_tls_check, ca_data, cookies)
+        if self._url.hostname is None:
+            raise ValueError("The URL does not contain a hostname.")
+        self._max_connections = max_connections
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: List[_Connection] = []
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with an AsyncHTTPServer.")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args: object):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close every idle connection."""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        for conn in idle:
+            try:
+                await conn.writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    def _bind_loop(self) -> asyncio.Semaphore:
+        """
+        The semaphore limiting open connections. Connections can't be shared between
+        event loops, so they are dropped when the client is used from a new one.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._slots is None:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self._max_connections)
+        return self._slots
+
+    async def _open_connection(self) -> _Connection:
+        host = cast(str, self._url.hostname)
+        timeout = get_request_timeout() or None
+        if self._url.scheme == "http":
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, self._url.port or http.HTTP_PORT, limit=_MAX_HEAD_SIZE),
+                timeout,
+            )
+            return _Connection(reader, writer)
+
+        context = _ssl_context(self._disable_tls_check, self._ca_data)
+        port = self._url.port or http.HTTPS_PORT
+        # As with HTTPServer, a server with its own CA bundle is connected to directly.
+        proxy_host, proxy_port = _get_proxy_for_host(host) if self._ca_data is None else (None, None)
+        if proxy_host is None:
+            connect = asyncio.open_connection(host, port, ssl=context, server_hostname=host, limit=_MAX_HEAD_SIZE)
+        else:
+            sock = await asyncio.wait_for(self._open_tunnel(proxy_host, cast(int, proxy_port), host, port), timeout)
+            connect = asyncio.open_connection(sock=sock, ssl=context, server_hostname=host, limit=_MAX_HEAD_SIZE)
+        reader, writer = await asyncio.wait_for(connect, timeout)
+        return _Connection(reader, writer)
+
+    async def _open_tunnel(self, proxy_host: str, proxy_port: int, host: str, port: int) -> socket.socket:
+        """Open a socket through an HTTPS proxy to the given host, as http.client's set_tunnel does."""
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(proxy_host, proxy_port, type=socket.SOCK_STREAM)
+        family, type_, proto, _, address = infos[0]
+        sock = socket.socket(family, type_, proto)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, address)
+            lines = [f"CONNECT {host}:{port} HTTP/1.1", f"Host: {host}:{port}"]
+            for key, value in (self._proxy_headers or {}).items():
+                lines.append(f"{key}: {value}")
+            await loop.sock_sendall(sock, ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            head = b""
+            while b"\r\n\r\n" not in head:
+                data = await loop.sock_recv(sock, 4096)
+                if not data:
+                    raise http.RemoteDisconnected("The proxy closed the connection.")
+                head += data
+            status_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+            parts = status_line.split(" ", 2)
+            if len(parts) < 2 or parts[1] != "200":
+                raise OSError(f"Tunnel connection failed: {status_line}")
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def _acquire_idle(self) -> Optional[_Connection]:
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.usable(self.idle_timeout):
+                return conn
+            conn.close()
+        return None
+
+    async def get(
+        self,
+        path: str,
+        query_params: Optional[Mapping[str, JsonData]] = None,
+        decode_response: bool = True,
+    ) -> JsonData | HTTPResponse:
+        return await self.request("GET", path, query_params, decode_response=decode_response)
+
+    async def post(
+        self,
+        path: str,
+        query_params: Optional[Mapping[str, JsonData]] = None,
+        body: str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> JsonData | HTTPResponse:
+        return await self.request("POST", path, query_params, body, headers=headers or {})
+
+    async def patch(
+        self,
+        path: str,
+        query_params: Optional[Mapping[str, JsonData]] = None,
+        body: str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None = None,
+    ) -> JsonData | HTTPResponse:
+        return await self.request("PATCH", path, query_params, body)
+
+    async def put(
+        self,
+        path: str,
+        query_params: Optional[Mapping[str, JsonData]] = None,
+        body: str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None = None,
+        headers: Optional[Mapping[str, str]] = None,
+        decode_response: bool = True,
+    ) -> JsonData | HTTPResponse:
+        return await self.request(
+            "PUT", path, query_params=query_params, body=body, headers=headers or {}, decode_response=decode_response
+        )
+
+    async def delete(
+        self,
+        path: str,
+        query_params: Optional[Mapping[str, JsonData]] = None,
+        body: str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None = None,
+        decode_response: bool = True,
+    ) -> JsonData | HTTPResponse:
+        return await self.request("DELETE", path, query_params, body, decode_response=decode_response)
+
+    async def request(  # pyright: ignore[reportIncompatibleMethodOverride]
+        self,
+        method: str,
+        path: str,
+        query_params: Optional[Mapping[str, JsonData]] = None,
+        body: str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None = None,
+        maximum_redirects: int = 5,
+        decode_response: bool = True,
+        headers: Optional[Mapping[str, str]] = None,
+        raw_response: bool = False,
+    ) -> JsonData | HTTPResponse:
+        path, body, extra_headers, can_retry, body_position = self._prepare_request(method, path, body, headers)
+
+        retries = 0
+        while True:
+            request_headers = {**extra_headers, **self.get_extra_headers(path, method, body)}
+            started = await self.rate_limiter.acquire_async()
+            response = None
+            try:
+                response = await self._do_request(
+                    method, path, query_params, body, maximum_redirects, request_headers, decode_response, raw_response
+                )
+            finally:
+                self.rate_limiter.release(started, response)
+            delay = self._retry_delay(method, path, response, retries, can_retry)
+            if delay is None:
+                return response
+            retries += 1
+            await asyncio.sleep(delay)
+            if body_position is not None:
+                body.seek(body_position)  # type: ignore
+
+    async def _do_request(  # pyright: ignore[reportIncompatibleMethodOverride]
+        self,
+        method: str,
+        path: str,
+        query_params: Optional[Mapping[str, JsonData]],
+        body: str | bytes | IO[bytes] | None,
+        maximum_redirects: int,
+        extra_headers: dict[str, str],
+        decode_response: bool = True,
+        raw_response: bool = False,
+    ) -> JsonData | HTTPResponse:
+        full_uri = self._full_uri(path, query_params)
+        headers = self._request_headers(extra_headers)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        timing: Optional[RequestTiming] = None
+
+        try:
+            self._log_request(method, full_uri, headers, body)
+
+            slots = self._bind_loop()
+            async with slots:
+                # Time the request from when it gets a connection, as HTTPServer does.
+                timing = RequestTiming(method, full_uri)
+                response, response_body = await self._exchange(method, full_uri, headers, body, timing)
+
+            encoding = (response.getheader("Content-Encoding") or "").strip().lower()
+            if encoding in _decoders:
+                response_body = _decode_body(encoding, [response_body])
+            if decode_response:
+                response_body = response_body.decode("utf-8").strip()  # pyright: ignore[reportAssignmentType]
+            timing.lap("receive")
+            timing.finish(response.status)
+            self._log_response(response, response_body)
+
+            next_url = self._redirect_target(response, maximum_redirects)
+            if next_url is not None:
+                redirect_extra_headers = self.get_extra_headers(next_url, "GET", body)
+                return await self._do_request(
+                    "GET",
+                    next_url,
+                    query_params,
+                    body,
+                    maximum_redirects - 1,
+                    {**extra_headers, **redirect_extra_headers},
+                    decode_response,
+                    raw_response,
+                )
+
+            return self._response_result(full_uri, cast(http.HTTPResponse, response), response_body, raw_response)
+        except asyncio.TimeoutError:
+            logger.debug("The HTTP request timed out.", exc_info=True)
+            if timing is not None:
+                timing.finish(None)
+            return HTTPResponse(full_uri, exception=socket.timeout("timed out"))
+        except (
+            http.HTTPException,
+            ssl.CertificateError,
+            IOError,
+            OSError,
+            socket.error,
+            socket.herror,
+            socket.gaierror,
+            socket.timeout,
+        ) as exception:
+            logger.debug("An exception occurred processing the HTTP request.", exc_info=True)
+            if timing is not None:
+                timing.finish(None)
+            return HTTPResponse(full_uri, exception=exception)
+
+    async def _exchange(
+        self,
+        method: str,
+        full_uri: str,
+        headers: dict[str, str],
+        body: bytes | IO[bytes] | None,
+        timing: RequestTiming,
+    ) -> Tuple[_AsyncResponse, bytes]:
+        """
+        Send a request and read its response on an idle connection, or a new one if
+        there is none. A request on a reused connection that the server has closed in
+        the meantime is sent again on a new connection, if it failed while being sent
+        or is safe to repeat.
+        """
+        timeout = get_request_timeout() or None
+        conn = self._acquire_idle()
+        reused = conn is not None
+        body_position = body.tell() if hasattr(body, "seekable") and body.seekable() else None  # type: ignore
+        while True:
+            if conn is None:
+                conn = await self._open_connection()
+                timing.lap("connect")
+            sent = False
+            try:
+                await asyncio.wait_for(self._send(conn, method, full_uri, headers, body), timeout)
+                sent = True
+                timing.lap("send")
+                response = await asyncio.wait_for(self._read_head(conn), timeout)
+                timing.lap("wait")
+                response_body = await asyncio.wait_for(self._read_body(conn, method, response), timeout)
+                break
+            except (http.RemoteDisconnected, ConnectionResetError, BrokenPipeError, ConnectionAbortedError):
+                conn.close()
+                if not reused or (hasattr(body, "read") and body_position is None):
+                    raise
+                # Once the whole request was sent, the server may have acted on it
+                # before closing the connection.
+                if sent and not self.retry_policy.is_idempotent(method, headers):
+                    raise
+                logger.debug("The reused connection was closed by the server; reconnecting.")
+                if body_position is not None:
+                    body.seek(body_position)  # type: ignore
+                conn, reused = None, False
+            except BaseException:
+                conn.close()
+                raise
+
+        if response.will_close() or response.getheader("Content-Length") is None and not self._is_chunked(response):
+            conn.close()
+        else:
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+        return response, response_body
+
+    async def _send(
+        self, conn: _Connection, method: str, full_uri: str, headers: dict[str, str], body: bytes | IO[bytes] | None
+    ):
+        lower_keys = {key.lower() for key in headers}
+        lines = [f"{method} {full_uri} HTTP/1.1"]
+        if "host" not in lower_keys:
+            port = self._url.port
+            lines.append(f"Host: {self._url.hostname}" + (f":{port}" if port else ""))
+        chunked = False
+        if isinstance(body, bytes):
+            if "content-length" not in lower_keys:
+                lines.append(f"Content-Length: {len(body)}")
+        elif body is not None and not ({"content-length", "transfer-encoding"} & lower_keys):
+            lines.append("Transfer-Encoding: chunked")
+            chunked = True
+        elif body is None and method in ("POST", "PUT", "PATCH"):
+            lines.append("Content-Length: 0")
+        for key, value in headers.items():
+            lines.append(f"{key}: {value}")
+
+        writer = conn.writer
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if isinstance(body, bytes):
+            writer.write(body)
+        elif body is not None:
+            for chunk in iter(lambda: body.read(_BODY_CHUNK_SIZE), b""):
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _read_head(self, conn: _Connection) -> _AsyncResponse:
+        while True:
+            try:
+                head = await conn.reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError as error:
+                if not error.partial:
+                    raise http.RemoteDisconnected("Remote end closed connection without response")
+                raise http.IncompleteRead(error.partial)
+            except asyncio.LimitOverrunError:
+                raise http.LineTooLong("response head")
+            lines = head.decode("latin-1").split("\r\n")
+            parts = lines[0].split(" ", 2)
+            if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+                raise http.BadStatusLine(lines[0])
+            headers: List[Tuple[str, str]] = []
+            for line in lines[1:]:
+                if ":" in line:
+                    key, value = line.split(":", 1)
+                    headers.append((key.strip(), value.strip()))
+            status = int(parts[1])
+            # Skip informational responses, e.g. 100 Continue.
+            if 100 <= status < 200:
+                continue
+            return _AsyncResponse(parts[0], status, parts[2] if len(parts) > 2 else "", headers)
+
+    @staticmethod
+    def _is_chunked(response: _AsyncResponse) -> bool:
+        return "chunked" in (response.getheader("Transfer-Encoding") or "").lower()
+
+    async def _read_body(self, conn: _Connection, method: str, response: _AsyncResponse) -> bytes:
+        reader = conn.reader
+        if method == "HEAD" or response.status in (204, 304):
+            return b""
+        try:
+            if self._is_chunked(response):
+                chunks: List[bytes] = []
+                while True:
+                    size_line = await reader.readuntil(b"\r\n")
+                    size = int(size_line.split(b";", 1)[0].strip(), 16)
+                    if size == 0:
+                        # Skip any trailers.
+                        while await reader.readuntil(b"\r\n") != b"\r\n":
+                            pass
+                        return b"".join(chunks)
+                    chunks.append(await reader.readexactly(size))
+                    await reader.readexactly(2)
+            length = response.getheader("Content-Length")
+            if length is not None:
+                return await reader.readexactly(int(length))
+            return await reader.read()
+        except asyncio.IncompleteReadError as error:
+            raise http.IncompleteRead(error.partial)
+        except ValueError as error:
+            raise http.HTTPException(f"Invalid response framing: {error}")
@@ -4,19 +4,31 @@ HTTP support wrappers and utility functions
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import functools
+import hashlib
+import io
 import json
 import os
+import random
+import select
 import socket
 import ssl
+import threading
+import time
+import zlib
+from collections import deque
 from http import client as http
+from email.utils import parsedate_to_datetime
 from http.cookies import SimpleCookie
-from typing import IO, Any, Dict, List, Mapping, Optional, Tuple, Union, cast
-from urllib.parse import urlencode, urljoin, urlparse
+from typing import IO, Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple, Union, cast
+from urllib.parse import ParseResult, urlencode, urljoin, urlparse
 from warnings import warn
 
 from . import VERSION
-from .log import logger
+from .http_timing import RequestTiming
+from .log import VERBOSE, logger
 from .timeouts import get_request_timeout
 
 # A union type that describes types that can be converted to and from JSON.
@@ -33,6 +45,47 @@ JsonData = Union[
 
 _user_agent = f"RSConnectPython/{VERSION}"
 
+HTTPConnectionType = Union[http.HTTPConnection, http.HTTPSConnection]
+
+
+class _TimedHTTPConnection(http.HTTPConnection):
+    """
+    An HTTPConnection that records how long resolving the host name and connecting
+    took in `connect_timings`, for the request that opens it.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.connect_timings: Dict[str, float] = {}
+        self._create_connection = self._timed_create_connection
+
+    def _timed_create_connection(
+        self, address: Tuple[str, int], timeout: Optional[float], source_address: Optional[Tuple[str, int]] = None
+    ) -> socket.socket:
+        # Like socket.create_connection(), but resolving the name separately.
+        start = time.perf_counter()
+        addresses = socket.getaddrinfo(address[0], address[1], 0, socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        self.connect_timings["dns"] = resolved - start
+        error: Optional[OSError] = None
+        for family, type_, proto, _, sockaddr in addresses:
+            # Connect to the resolved address as is; it keeps an IPv6 address's flow
+            # info and scope ID, and doesn't need resolving again.
+            sock = socket.socket(family, type_, proto)
+            try:
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:  # type: ignore[attr-defined]
+                    sock.settimeout(timeout)
+                if source_address is not None:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+            except OSError as exc:
+                sock.close()
+                error = exc
+                continue
+            self.connect_timings["connect"] = time.perf_counter() - resolved
+            return sock
+        raise error if error is not None else OSError(f"Unable to resolve {address[0]}")
+
 
 # noinspection PyUnusedLocal,PyUnresolvedReferences
 def _create_plain_connection(
@@ -54,7 +107,7 @@ def _create_plain_connection(
     """
     timeout = get_request_timeout()
     logger.debug(f"The HTTPConnection timeout is set to '{timeout}' seconds")
-    return http.HTTPConnection(host_name, port=(port or http.HTTP_PORT), timeout=timeout)
+    return _TimedHTTPConnection(host_name, port=(port or http.HTTP_PORT), timeout=timeout)
 
 
 def _get_proxy():
@@ -82,6 +135,112 @@ def _get_proxy_headers(*args: object, **kwargs: object):
     return proxyHeaders
 
 
+@functools.lru_cache(maxsize=None)
+def _ssl_context(disable_tls_check: bool, ca_data: Optional[str | bytes]) -> ssl.SSLContext:
+    """
+    The SSL context for connections with the given TLS settings. Contexts are
+    shared, so certificate authorities are loaded once and TLS sessions negotiated
+    on one connection can be resumed on the next.
+    """
+    if ca_data is not None:
+        return ssl.create_default_context(cadata=ca_data)
+    if disable_tls_check:
+        return ssl._create_unverified_context()
+    # The same context http.client would create for each connection.
+    context = ssl._create_default_https_context()
+    context.set_alpn_protocols(["http/1.1"])
+    if context.post_handshake_auth is not None:
+        context.post_handshake_auth = True
+    return context
+
+
+class _TLSSessionCache(object):
+    """
+    The most recent TLS session for each server, so that new connections can resume
+    it with an abbreviated handshake, and counts of full and resumed handshakes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[Any, ...], ssl.SSLSession] = {}
+        self.handshakes = 0
+        self.resumptions = 0
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[ssl.SSLSession]:
+        with self._lock:
+            return self._sessions.get(key)
+
+    def put(self, key: Tuple[Any, ...], session: Optional[ssl.SSLSession]):
+        if session is not None:
+            with self._lock:
+                self._sessions[key] = session
+
+    def record(self, resumed: bool) -> Tuple[int, int]:
+        with self._lock:
+            if resumed:
+                self.resumptions += 1
+            else:
+                self.handshakes += 1
+            return self.handshakes, self.resumptions
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self.handshakes = self.resumptions = 0
+
+
+_tls_sessions = _TLSSessionCache()
+
+
+class _ResumableHTTPSConnection(http.HTTPSConnection, _TimedHTTPConnection):
+    """
+    An HTTPSConnection that resumes the last TLS session with the same server, when
+    the server allows it, and records how long the TLS handshake took.
+    """
+
+    def _session_key(self) -> Tuple[Any, ...]:
+        host = self._tunnel_host or self.host  # pyright: ignore[reportAttributeAccessIssue]
+        port = self._tunnel_port if self._tunnel_host else self.port  # pyright: ignore[reportAttributeAccessIssue]
+        return host, port, id(self._context)  # pyright: ignore[reportAttributeAccessIssue]
+
+    def connect(self):
+        http.HTTPConnection.connect(self)
+        key = self._session_key()
+        start = time.perf_counter()
+        sock = self._context.wrap_socket(  # pyright: ignore[reportAttributeAccessIssue]
+            self.sock, server_hostname=key[0], session=_tls_sessions.get(key)
+        )
+        self.connect_timings["tls"] = time.perf_counter() - start
+        self.sock = sock
+        if not isinstance(sock, ssl.SSLSocket):
+            return
+        handshakes, resumptions = _tls_sessions.record(sock.session_reused)
+        logger.debug(
+            f"TLS {'session resumed' if sock.session_reused else 'handshake'} with {key[0]}:{key[1]} "
+            f"({handshakes} full handshakes, {resumptions} resumptions so far)"
+        )
+        _tls_sessions.put(key, sock.session)
+
+    def close(self):
+        # With TLS 1.3 the session ticket arrives after the handshake, so remember
+        # the session again once the connection has been used.
+        if isinstance(self.sock, ssl.SSLSocket):
+            try:
+                _tls_sessions.put(self._session_key(), self.sock.session)
+            except (OSError, ValueError):
+                pass
+        super().close()
+
+
+def _get_proxy_for_host(host_name: str) -> Tuple[Optional[str], Optional[int]]:
+    """The host and port of the HTTPS proxy to use to reach the given host, if any."""
+    no_proxy = os.environ.get("no_proxy", os.environ.get("NO_PROXY", "#"))
+    if any([host_name.endswith(host) for host in no_proxy.split(",")]):
+        return None, None
+    _, _, proxyHost, proxyPort = _get_proxy()
+    return proxyHost, proxyPort
+
+
 # noinspection PyUnresolvedReferences
 def _create_ssl_connection(
     host_name: str,
@@ -102,47 +261,191 @@ def _create_ssl_connection(
     if ca_data is not None and disable_tls_check:
         raise ValueError("Cannot both disable TLS checking and provide a custom certificate")
 
-    no_proxy = os.environ.get("no_proxy", os.environ.get("NO_PROXY", "#"))
-    if any([host_name.endswith(host) for host in no_proxy.split(",")]):
-        proxyHost, proxyPort = None, None
-    else:
-        _, _, proxyHost, proxyPort = _get_proxy()
+    proxyHost, proxyPort = _get_proxy_for_host(host_name)
     headers = _get_proxy_headers()
     timeout = get_request_timeout()
     logger.debug(f"The HTTPSConnection timeout is set to '{timeout}' seconds")
+    context = _ssl_context(disable_tls_check, ca_data)
     if ca_data is not None:
-        return http.HTTPSConnection(
+        return _ResumableHTTPSConnection(
             host_name,
             port=(port or http.HTTPS_PORT),
             timeout=timeout,
-            context=ssl.create_default_context(cadata=ca_data),
+            context=context,
         )
-    elif disable_tls_check:
-        if proxyHost is not None:
-            tmp = http.HTTPSConnection(
-                proxyHost,
-                port=proxyPort,
-                timeout=timeout,
-                context=ssl._create_unverified_context(),
-            )
-            tmp.set_tunnel(host_name, (port or http.HTTPS_PORT), headers=headers)
-        else:
-            tmp = http.HTTPSConnection(
-                host_name,
-                port=(port or http.HTTPS_PORT),
-                timeout=timeout,
-                context=ssl._create_unverified_context(),
-            )
-        return tmp
     else:
         if proxyHost is not None:
-            tmp = http.HTTPSConnection(proxyHost, port=proxyPort, timeout=timeout)
+            tmp = _ResumableHTTPSConnection(proxyHost, port=proxyPort, timeout=timeout, context=context)
             tmp.set_tunnel(host_name, (port or http.HTTPS_PORT), headers=headers)
         else:
-            tmp = http.HTTPSConnection(host_name, port=(port or http.HTTPS_PORT), timeout=timeout)
+            tmp = _ResumableHTTPSConnection(host_name, port=(port or http.HTTPS_PORT), timeout=timeout, context=context)
         return tmp
 
 
+def _is_connection_dropped(conn: HTTPConnectionType) -> bool:
+    """
+    Whether an idle connection can no longer be used. An idle socket that is
+    readable has either been closed by the server or has unexpected data on it.
+    """
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of idle keep-alive connections, shared by every HTTPServer in
+    the process, so that consecutive requests to a server (even from different
+    client objects) reuse one TCP connection and TLS session instead of
+    handshaking again.
+
+    Connections are keyed by everything that went into creating them: the scheme,
+    host and port, the TLS settings, the proxy configuration and the timeout.
+
+    :param max_idle_per_host: the most idle connections kept for each key; extra
+    connections are closed when they are released.
+    :param idle_timeout: how long, in seconds, an idle connection is kept. Servers and
+    load balancers close idle connections themselves, usually after a minute or so.
+    """
+
+    def __init__(self, max_idle_per_host: int = 4, idle_timeout: float = 30.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[Any, ...], List[Tuple[HTTPConnectionType, float]]] = {}
+
+    def acquire(
+        self, key: Tuple[Any, ...], factory: Callable[[], HTTPConnectionType]
+    ) -> Tuple[HTTPConnectionType, bool]:
+        """
+        Get a connection for the given key, reusing an idle one if possible.
+
+        :return: the connection, and whether it was reused.
+        """
+        expired: List[HTTPConnectionType] = []
+        conn: Optional[HTTPConnectionType] = None
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, released_at = idle.pop()
+                if now - released_at > self.idle_timeout or _is_connection_dropped(candidate):
+                    expired.append(candidate)
+                else:
+                    conn = candidate
+                    break
+        for stale in expired:
+            stale.close()
+        if conn is not None:
+            logger.debug(f"Reusing a connection to {key[1]}:{key[2]}")
+            return conn, True
+        return factory(), False
+
+    def release(self, key: Tuple[Any, ...], conn: HTTPConnectionType):
+        """Return a connection whose last response has been read in full to the pool."""
+        if conn.sock is None:
+            # Closed, e.g. because the server answered with "Connection: close".
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def clear(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+
+_connection_pool = ConnectionPool()
+
+# Errors that mean a reused keep-alive connection was closed by the server, most
+# likely before our request reached it. The request is sent once more on a new
+# connection if it failed while being sent, or if it is safe to repeat.
+_stale_connection_errors = (http.RemoteDisconnected, ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+# The content codings we accept in responses, and the zlib window bits to decode each.
+_accept_encoding = "gzip, deflate"
+_decoders = {"gzip": 16 + zlib.MAX_WBITS, "x-gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+# The size of the chunks in which compressed response bodies are read and decoded.
+_DECODE_CHUNK_SIZE = 64 * 1024
+
+
+class _TransferStats(object):
+    """Counts the bytes received for compressed responses, and what they decoded to."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.received = 0
+        self.decoded = 0
+
+    def record(self, received: int, decoded: int) -> Tuple[int, int]:
+        with self._lock:
+            self.received += received
+            self.decoded += decoded
+            return self.received, self.decoded
+
+    def clear(self):
+        with self._lock:
+            self.received = self.decoded = 0
+
+
+_transfer_stats = _TransferStats()
+
+
+def _read_response_body(response: http.HTTPResponse) -> bytes:
+    """
+    Read the body of a response, decoding it as it is read if it was sent with
+    gzip or deflate content coding.
+    """
+    encoding = (response.getheader("Content-Encoding") or "").strip().lower()
+    if encoding not in _decoders:
+        return response.read()
+    return _decode_body(encoding, iter(lambda: response.read(_DECODE_CHUNK_SIZE), b""))
+
+
+def _decode_body(encoding: str, chunks: Iterable[bytes]) -> bytes:
+    """Decode the chunks of a response body sent with the given content coding."""
+    wbits = _decoders[encoding]
+    decompressor = zlib.decompressobj(wbits)
+    received = 0
+    decoded: List[bytes] = []
+    try:
+        for chunk in chunks:
+            if received == 0 and encoding == "deflate":
+                # Some servers send raw deflate data without the zlib wrapper.
+                try:
+                    decoded.append(decompressor.decompress(chunk))
+                except zlib.error:
+                    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                    decoded.append(decompressor.decompress(chunk))
+            else:
+                decoded.append(decompressor.decompress(chunk))
+            received += len(chunk)
+        decoded.append(decompressor.flush())
+    except zlib.error as error:
+        raise http.HTTPException(f"Unable to decode the {encoding} response body: {error}") from error
+
+    body = b"".join(decoded)
+    total_received, total_decoded = _transfer_stats.record(received, len(body))
+    logger.debug(
+        f"Decoded a {encoding} response body of {received} bytes to {len(body)} bytes "
+        f"({len(body) - received} bytes saved; {total_decoded - total_received} bytes saved so far)"
+    )
+    return body
+
+
 def append_to_path(uri: str, path: str):
     """
     This is a helper function for appending a path to a URI (i.e, just the path portion
@@ -161,6 +464,46 @@ def append_to_path(uri: str, path: str):
     return uri
 
 
+def _multipart_form_data_segments(
+    fields: Mapping[str, Union[str, Tuple[str, Union[bytes, IO[bytes]], str]]],
+    boundary: str,
+) -> List[Union[bytes, IO[bytes]]]:
+    """
+    The pieces of a multipart/form-data body: the encoded headers and text fields as
+    bytes, and the content of file fields as given (bytes or a file object).
+    """
+    segments: List[Union[bytes, IO[bytes]]] = []
+    pending: List[bytes] = []
+
+    for field_name, field_value in fields.items():
+        pending.append(f"--{boundary}".encode("utf-8"))
+
+        if isinstance(field_value, tuple):
+            # File field
+            filename, file_content, content_type = field_value
+            disposition = f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"'
+            pending.append(disposition.encode("utf-8"))
+            pending.append(f"Content-Type: {content_type}".encode("utf-8"))
+            pending.append(b"")
+            if isinstance(file_content, bytes):
+                pending.append(file_content)
+            else:
+                segments.append(b"\r\n".join(pending) + b"\r\n")
+                segments.append(file_content)
+                pending = [b""]
+        else:
+            # Plain text field
+            disposition = f'Content-Disposition: form-data; name="{field_name}"'
+            pending.append(disposition.encode("utf-8"))
+            pending.append(b"")
+            pending.append(field_value.encode("utf-8"))
+
+    pending.append(f"--{boundary}--".encode("utf-8"))
+    pending.append(b"")
+    segments.append(b"\r\n".join(pending))
+    return segments
+
+
 def create_multipart_form_data(
     fields: Dict[str, Union[str, Tuple[str, bytes, str]]],
     boundary: Optional[str] = None,
@@ -179,35 +522,123 @@ def create_multipart_form_data(
     if boundary is None:
         boundary = secrets.token_hex(16)
 
-    body_parts = []
+    body = b"".join(cast(List[bytes], _multipart_form_data_segments(fields, boundary)))
+    content_type = f"multipart/form-data; boundary={boundary}"
 
-    for field_name, field_value in fields.items():
-        body_parts.append(f"--{boundary}".encode("utf-8"))
+    return body, content_type
 
-        if isinstance(field_value, tuple):
-            # File field
-            filename, file_content, content_type = field_value
-            disposition = f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"'
-            body_parts.append(disposition.encode("utf-8"))
-            body_parts.append(f"Content-Type: {content_type}".encode("utf-8"))
-            body_parts.append(b"")
-            body_parts.append(file_content)
-        else:
-            # Plain text field
-            disposition = f'Content-Disposition: form-data; name="{field_name}"'
-            body_parts.append(disposition.encode("utf-8"))
-            body_parts.append(b"")
-            body_parts.append(field_value.encode("utf-8"))
 
-    body_parts.append(f"--{boundary}--".encode("utf-8"))
-    body_parts.append(b"")
+def create_multipart_form_data_stream(
+    fields: Dict[str, Union[str, Tuple[str, Union[bytes, IO[bytes]], str]]],
+    boundary: Optional[str] = None,
+) -> Tuple[MultipartFormDataStream, str]:
+    """
+    Create a multipart/form-data body that is read from the file fields' file objects
+    as it is sent, so files are never held in memory, and its content-type header.
 
-    body = b"\r\n".join(body_parts)
+    :param fields: Dictionary of field names to values, as for create_multipart_form_data,
+        except that file content may also be a binary file object.
+    :param boundary: Optional boundary string. If not provided, one will be generated.
+    :return: Tuple of (body stream, content-type header value)
+    """
+    import secrets
+
+    if boundary is None:
+        boundary = secrets.token_hex(16)
+
+    body = MultipartFormDataStream(_multipart_form_data_segments(fields, boundary))
     content_type = f"multipart/form-data; boundary={boundary}"
 
     return body, content_type
 
 
+class MultipartFormDataStream(io.RawIOBase):
+    """
+    A read-only file-like multipart/form-data body, made of encoded headers and the
+    file objects of file fields, which are read from as the body is read.
+
+    When every file object is seekable, so is the body, and its length is known.
+    """
+
+    def __init__(self, segments: List[Union[bytes, IO[bytes]]]):
+        super().__init__()
+        self._segments = segments
+        # The position of each file object at which its content starts.
+        self._starts: Dict[int, int] = {}
+        self._sizes: Optional[List[int]] = []
+        for index, segment in enumerate(segments):
+            if isinstance(segment, bytes):
+                size = len(segment)
+            elif segment.seekable():
+                self._starts[index] = segment.tell()
+                size = segment.seek(0, io.SEEK_END) - self._starts[index]
+                segment.seek(self._starts[index])
+            else:
+                self._sizes = None
+                break
+            self._sizes.append(size)
+        self._index = 0
+        self._offset = 0
+        self._position = 0
+
+    @property
+    def length(self) -> Optional[int]:
+        """The length of the body, or None if a file object isn't seekable."""
+        return sum(self._sizes) if self._sizes is not None else None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._sizes is not None
+
+    def readinto(self, b) -> int:
+        view = memoryview(b).cast("B")
+        while self._index < len(self._segments) and len(view) > 0:
+            segment = self._segments[self._index]
+            if isinstance(segment, bytes):
+                n = min(len(view), len(segment) - self._offset)
+                view[:n] = segment[self._offset : self._offset + n]
+            elif hasattr(segment, "readinto"):
+                n = segment.readinto(view)  # pyright: ignore[reportAttributeAccessIssue]
+            else:
+                data = segment.read(len(view))
+                n = len(data)
+                view[:n] = data
+            if not n:
+                self._index += 1
+                self._offset = 0
+                continue
+            self._offset += n
+            self._position += n
+            return n
+        return 0
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if self._sizes is None:
+            raise io.UnsupportedOperation("seek")
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += sum(self._sizes)
+        position = max(offset, 0)
+        remaining = position
+        self._index = 0
+        while self._index < len(self._sizes) and remaining >= self._sizes[self._index]:
+            remaining -= self._sizes[self._index]
+            self._index += 1
+        self._offset = remaining
+        # Rewind the file objects that will be read again.
+        for index, start in self._starts.items():
+            if index >= self._index:
+                self._segments[index].seek(start + (remaining if index == self._index else 0))  # type: ignore
+        self._position = position
+        return position
+
+
 class HTTPResponse(object):
     """
     This class represents the result of executing an HTTP request.
@@ -265,12 +696,336 @@ class HTTPResponse(object):
         return self._response.getheader(name)
 
 
+# The size of the chunks in which downloaded response bodies are written to disk.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class _DownloadSink(object):
+    """
+    Receives the body of a successful response to HTTPServer.download, writing it to
+    a partial file one chunk at a time instead of holding it in memory.
+    """
+
+    def __init__(
+        self,
+        part_path: str,
+        offset: int,
+        hasher: Optional[Any] = None,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ):
+        self.part_path = part_path
+        self.offset = offset
+        self.hasher = hasher
+        self.progress = progress
+        self.received = 0
+        self.total: Optional[int] = None
+        self.started = False
+        self.complete = False
+        self._file: Optional[IO[bytes]] = None
+
+    def start(self, response: http.HTTPResponse):
+        """Open the partial file, appending to it if the server honored our Range request."""
+        self.started = True
+        resumed = response.status == 206 and self.offset > 0
+        if resumed:
+            if self.hasher is not None:
+                with open(self.part_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                        self.hasher.update(chunk)
+            self.received = self.offset
+            logger.debug(f"Resuming the download into {self.part_path} at byte {self.offset}")
+        self._file = open(self.part_path, "ab" if resumed else "wb")
+        length = response.getheader("Content-Length")
+        if length is not None and length.isdigit():
+            self.total = self.received + int(length)
+
+    def write(self, chunk: bytes):
+        cast(IO[bytes], self._file).write(chunk)
+        if self.hasher is not None:
+            self.hasher.update(chunk)
+        self.received += len(chunk)
+        if self.progress is not None:
+            self.progress(self.received, self.total)
+
+    def copy(self, response: http.HTTPResponse):
+        """Copy the whole response body into the partial file."""
+        self.start(response)
+        for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK_SIZE), b""):
+            self.write(chunk)
+        self.complete = True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a request that failed with a connection error or a transient
+    error status (429, 502, 503 or 504 by default) should be sent again, and how long
+    to wait first.
+
+    Only idempotent methods are retried, and POST requests that carry an
+    Idempotency-Key header. The wait is the server's Retry-After, if it sent one, or
+    otherwise a random time up to an exponentially growing cap ("full jitter"), so
+    that many clients retrying at once don't all come back at the same moment.
+    """
+
+    # The connection errors that are worth trying again, unlike e.g. a DNS lookup or
+    # certificate verification failure.
+    retry_exceptions = (ConnectionError, socket.timeout, http.IncompleteRead, http.BadStatusLine)
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        statuses: Tuple[int, ...] = (429, 502, 503, 504),
+        methods: Tuple[str, ...] = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE"),
+        log_level: int = VERBOSE,
+    ):
+        """
+        :param max_retries: how many times a request may be retried.
+        :param backoff: the cap on the wait before the first retry, in seconds. It
+        doubles for each retry after that.
+        :param max_backoff: the most to wait before any retry, in seconds, including
+        waits asked for by Retry-After.
+        :param statuses: the response statuses to retry.
+        :param methods: the methods that are always safe to retry.
+        :param log_level: the level retries are logged at.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.methods = methods
+        self.log_level = log_level
+
+    def allows(self, method: str, headers: Mapping[str, str]) -> bool:
+        """Whether a request with the given method and headers may be retried at all."""
+        return self.max_retries > 0 and self.is_idempotent(method, headers)
+
+    def is_idempotent(self, method: str, headers: Mapping[str, str]) -> bool:
+        """Whether sending a request with the given method and headers twice does no harm."""
+        if method.upper() in self.methods:
+            return True
+        return method.upper() == "POST" and any(key.lower() == "idempotency-key" for key in headers)
+
+    def delay(self, response: JsonData | HTTPResponse, retries: int) -> Optional[float]:
+        """
+        How long to wait before retrying a request that got the given response, or
+        None if it shouldn't be retried.
+
+        :param response: the result of the request.
+        :param retries: how many times the request has been retried already.
+        """
+        if retries >= self.max_retries or not isinstance(response, HTTPResponse):
+            return None
+        if response.exception is not None:
+            if not isinstance(response.exception, self.retry_exceptions):
+                return None
+        elif getattr(response, "status", None) not in self.statuses:
+            return None
+        else:
+            retry_after = self._retry_after(response.getheader("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**retries))
+
+    @staticmethod
+    def _retry_after(value: Optional[str]) -> Optional[float]:
+        """The number of seconds a Retry-After header asks us to wait, or None."""
+        if value is None:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when is None:
+            return None
+        return max(0.0, when.timestamp() - time.time())
+
+
+class RateLimiter(object):
+    """
+    Paces the requests made to one server by every HTTPServer in the process, so that
+    bulk operations, such as building many content items in parallel, don't set off
+    the server's own throttling.
+
+    Requests are paced with a token bucket that refills at `rate` tokens per second
+    and holds up to `burst` of them, and at most `max_in_flight` requests are sent at
+    once. Either limit may be None, for no limit.
+
+    When the server answers 429 Too Many Requests, new requests wait for as long as
+    its Retry-After asks and the rate is halved (starting from the observed rate, if
+    there was no limit). Each successful response then raises it a little, up to the
+    configured rate, so throughput settles just below what the server accepts.
+    """
+
+    # The slowest the rate is ever throttled to, in requests per second.
+    min_rate = 0.5
+
+    # How often a coroutine waiting for a request to finish looks again, in seconds.
+    async_poll_interval = 0.05
+
+    def __init__(self, rate: Optional[float] = None, max_in_flight: Optional[int] = None):
+        """
+        :param rate: the most requests to start per second, on average.
+        :param max_in_flight: the most requests to have outstanding at once.
+        """
+        self._cond = threading.Condition()
+        self._rate = rate
+        self._current_rate = rate
+        self._max_in_flight = max_in_flight
+        self._tokens = self._burst()
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._throttled_at = 0.0
+        self._recent_starts: Deque[float] = deque()
+        self.throttled = 0
+
+    @property
+    def rate(self) -> Optional[float]:
+        """The rate requests are currently paced at, after any throttling."""
+        return self._current_rate
+
+    def configure(self, rate: Optional[float], max_in_flight: Optional[int]):
+        """Change the limits. Throttling is reset, unless the limits are unchanged."""
+        with self._cond:
+            if (rate, max_in_flight) == (self._rate, self._max_in_flight):
+                return
+            self._rate = self._current_rate = rate
+            self._max_in_flight = max_in_flight
+            self._tokens = self._burst()
+            self._cond.notify_all()
+
+    def _burst(self) -> float:
+        # A second's worth of requests may be sent at once.
+        return max(1.0, self._current_rate or 0.0)
+
+    def _refill(self, now: float):
+        if self._current_rate is not None:
+            self._tokens = min(self._burst(), self._tokens + (now - self._updated) * self._current_rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        Wait until a request may be sent.
+
+        :return: the time the request was let through, to pass to release().
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._try_acquire(now)
+                if wait == 0:
+                    return now
+                self._cond.wait(wait)
+
+    async def acquire_async(self) -> float:
+        """
+        Wait until a request may be sent, without blocking the event loop.
+
+        :return: the time the request was let through, to pass to release().
+        """
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                wait = self._try_acquire(now)
+            if wait == 0:
+                return now
+            # A release can't wake a coroutine, so one waiting for it looks again soon.
+            await asyncio.sleep(self.async_poll_interval if wait is None else wait)
+
+    def _try_acquire(self, now: float) -> Optional[float]:
+        """
+        Let a request through, if it may be sent now. Must be called with the lock held.
+
+        :return: 0 if the request was let through; otherwise how long to wait before
+        trying again, or None to wait for a request to finish.
+        """
+        self._refill(now)
+        if self._paused_until > now:
+            return self._paused_until - now
+        if self._max_in_flight is not None and self._in_flight >= self._max_in_flight:
+            return None
+        if self._current_rate is not None and self._tokens < 1:
+            return (1 - self._tokens) / self._current_rate
+        if self._current_rate is not None:
+            self._tokens -= 1
+        self._in_flight += 1
+        self._recent_starts.append(now)
+        while self._recent_starts[0] < now - 1:
+            self._recent_starts.popleft()
+        return 0
+
+    def release(self, started: float, response: Optional[JsonData | HTTPResponse]):
+        """
+        Note that a request has finished, adjusting the rate to how the server answered.
+
+        :param started: what acquire() returned for the request.
+        :param response: the result of the request, if there was one.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            status = getattr(response, "status", None) if isinstance(response, HTTPResponse) else 200
+            if status == 429:
+                self._throttle(started, cast(HTTPResponse, response).getheader("Retry-After"))
+            elif status is not None and status < 400 and self._current_rate is not None:
+                if self._rate is None or self._current_rate < self._rate:
+                    # Additive increase: about one request per second more, per second.
+                    self._current_rate += 1 / self._current_rate
+                    if self._rate is not None:
+                        self._current_rate = min(self._current_rate, self._rate)
+            self._cond.notify_all()
+
+    def _throttle(self, started: float, retry_after: Optional[str]):
+        now = time.monotonic()
+        pause = RetryPolicy._retry_after(retry_after)
+        if pause is not None:
+            self._paused_until = max(self._paused_until, now + pause)
+        if started < self._throttled_at:
+            # Sent before the last slowdown; that already accounted for it.
+            return
+        observed = len([start for start in self._recent_starts if start >= now - 1])
+        current = self._current_rate if self._current_rate is not None else float(observed)
+        self._current_rate = max(self.min_rate, current / 2)
+        self._tokens = min(self._tokens, 0.0)
+        self._throttled_at = now
+        self.throttled += 1
+        logger.log(
+            VERBOSE, f"The server is throttling requests; slowing down to {self._current_rate:.1f} requests per second."
+        )
+
+
+# Rate limiters are shared by every HTTPServer talking to the same server.
+_rate_limiters: Dict[Tuple[Any, ...], RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _rate_limiter_for(url: ParseResult) -> RateLimiter:
+    key = (url.scheme, url.hostname, url.port)
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = _rate_limiters[key] = RateLimiter()
+        return limiter
+
+
 class HTTPServer(object):
     """
     This class provides the means to simply and directly invoke HTTP requests against a
     server.
     """
 
+    # How requests that fail with a transient error are retried.
+    retry_policy = RetryPolicy()
+
     def __init__(
         self,
         url: str,
@@ -299,8 +1054,10 @@ class HTTPServer(object):
         self._ca_data = ca_data
         self._cookies = cookies if cookies is not None else CookieJar()
         self._headers = {"User-Agent": _user_agent}
-        self._conn = None
+        self._conn: Optional[HTTPConnectionType] = None
+        self._conn_reused = False
         self._proxy_headers = _get_proxy_headers()
+        self.rate_limiter = _rate_limiter_for(self._url)
 
         self._inject_cookies()
 
@@ -329,16 +1086,37 @@ class HTTPServer(object):
         if self._url.hostname is None:
             raise ValueError("The URL does not contain a hostname.")
 
-        factory = _connection_factory[self._url.scheme]
-        self._conn = factory(
+        self._conn, self._conn_reused = _connection_pool.acquire(self._pool_key(), self._new_connection)
+        return self
+
+    def __exit__(self, *args: object):
+        if self._conn is not None:
+            _connection_pool.release(self._pool_key(), self._conn)
+            self._conn = None
+
+    def _pool_key(self) -> Tuple[Any, ...]:
+        proxy_settings = tuple(os.environ.get(name) for name in ("https_proxy", "HTTPS_PROXY", "no_proxy", "NO_PROXY"))
+        return (
+            self._url.scheme,
             self._url.hostname,
             self._url.port,
             self._disable_tls_check,
             self._ca_data,
+            proxy_settings,
+            get_request_timeout(),
         )
-        return self
 
-    def __exit__(self, *args: object):
+    def _new_connection(self) -> HTTPConnectionType:
+        factory = _connection_factory[self._url.scheme]
+        return factory(
+            cast(str, self._url.hostname),
+            self._url.port,
+            self._disable_tls_check,
+            self._ca_data,
+        )
+
+    def _discard_connection(self):
+        """Close the current connection rather than returning it to the pool."""
         if self._conn is not None:
             self._conn.close()
             self._conn = None
@@ -351,6 +1129,67 @@ class HTTPServer(object):
     ) -> JsonData | HTTPResponse:
         return self.request("GET", path, query_params, decode_response=decode_response)
 
+    def download(
+        self,
+        path: str,
+        destination: str,
+        query_params: Optional[Mapping[str, JsonData]] = None,
+        hasher: Optional[Any] = None,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+        resume: bool = True,
+    ) -> JsonData | HTTPResponse:
+        """
+        Download the body of a GET request to a file, copying it from the socket in
+        fixed-size chunks so it is never held in memory.
+
+        The body is written to a partial file next to the destination, which is
+        renamed once the download completes. If a download is interrupted, the partial
+        file is kept and the next download of the same path continues from where it
+        left off, using a Range request.
+
+        :param path: the path to download.
+        :param destination: the file to write the body to.
+        :param query_params: any query parameters for the request.
+        :param hasher: an optional hashlib-style object, updated with the body as it is
+        downloaded, so the checksum is available without reading the file again.
+        :param progress: an optional callback, called with the number of bytes received
+        so far and the total size (None if unknown) after each chunk.
+        :param resume: whether to continue from an existing partial file.
+        :return: the response. Its body is None when it was written to the destination.
+        """
+        part_path = self._partial_download_path(path, destination, query_params)
+        offset = os.path.getsize(part_path) if resume and os.path.isfile(part_path) else 0
+        # Downloads are written to disk as received, and Range offsets count encoded
+        # bytes, so ask for the body as it is.
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        sink = _DownloadSink(part_path, offset, hasher, progress)
+        try:
+            response = self.request(
+                "GET", path, query_params, decode_response=False, headers=headers, response_sink=sink
+            )
+        finally:
+            sink.close()
+
+        if isinstance(response, HTTPResponse) and response.status == 416 and offset:
+            # The partial file can't be continued (it may already be complete); start over.
+            os.remove(part_path)
+            return self.download(path, destination, query_params, hasher, progress, resume=False)
+        if sink.complete:
+            os.replace(part_path, destination)
+        elif os.path.isfile(part_path):
+            logger.debug(f"The download was interrupted; {sink.received} bytes were kept in {part_path}")
+        return response
+
+    def _partial_download_path(
+        self, path: str, destination: str, query_params: Optional[Mapping[str, JsonData]] = None
+    ) -> str:
+        """The partial file for a download, named after the URL so that a different download is never resumed."""
+        key = self._get_full_path(path) + "?" + urlencode(query_params or {}, doseq=True)
+        return f"{destination}.{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}.part"
+
     def post(
         self,
         path: str,
@@ -402,14 +1241,86 @@ class HTTPServer(object):
         maximum_redirects: int = 5,
         decode_response: bool = True,
         headers: Optional[Mapping[str, str]] = None,
+        response_sink: Optional[_DownloadSink] = None,
+        raw_response: bool = False,
     ) -> JsonData | HTTPResponse:
+        path, body, extra_headers, can_retry, body_position = self._prepare_request(method, path, body, headers)
+
+        retries = 0
+        while True:
+            request_headers = {**extra_headers, **self.get_extra_headers(path, method, body)}
+            started = self.rate_limiter.acquire()
+            response = None
+            try:
+                response = self._do_request(
+                    method,
+                    path,
+                    query_params,
+                    body,
+                    maximum_redirects,
+                    request_headers,
+                    decode_response,
+                    response_sink,
+                    raw_response,
+                )
+            finally:
+                self.rate_limiter.release(started, response)
+            # Once part of a body has been written, a later download resumes from it instead.
+            resumable = response_sink is None or not response_sink.started
+            delay = self._retry_delay(method, path, response, retries, can_retry and resumable)
+            if delay is None:
+                return response
+            retries += 1
+            time.sleep(delay)
+            if body_position is not None:
+                body.seek(body_position)  # type: ignore
+
+    def _prepare_request(
+        self,
+        method: str,
+        path: str,
+        body: str | bytes | IO[bytes] | Mapping[str, Any] | list[Any] | None,
+        headers: Optional[Mapping[str, str]],
+    ) -> Tuple[str, str | bytes | IO[bytes] | None, Mapping[str, str], bool, Optional[int]]:
+        """
+        The full path, the body (JSON-encoded if it is a mapping or list) and its
+        headers, whether the request may be retried, and where a file-like body
+        must be rewound to before a retry.
+        """
         path = self._get_full_path(path)
         extra_headers = headers or {}
         if isinstance(body, (Mapping, list)):
             body = json.dumps(body).encode("utf-8")
-            extra_headers = {"Content-Type": "application/json; charset=utf-8"}
-        extra_headers = {**extra_headers, **self.get_extra_headers(path, method, body)}
-        return self._do_request(method, path, query_params, body, maximum_redirects, extra_headers, decode_response)
+            extra_headers = {**extra_headers, "Content-Type": "application/json; charset=utf-8"}
+        can_retry = self.retry_policy.allows(method, extra_headers)
+        body_position = None
+        if hasattr(body, "read"):
+            # A file-like body can only be sent again if it can be rewound.
+            if hasattr(body, "seekable") and body.seekable():  # type: ignore
+                body_position = body.tell()  # type: ignore
+            else:
+                can_retry = False
+        return path, cast("str | bytes | IO[bytes] | None", body), extra_headers, can_retry, body_position
+
+    def _retry_delay(
+        self, method: str, path: str, response: JsonData | HTTPResponse, retries: int, can_retry: bool
+    ) -> Optional[float]:
+        """How long to wait before trying a request again, or None to return its response."""
+        delay = self.retry_policy.delay(response, retries) if can_retry else None
+        if delay is None:
+            if retries > 0:
+                logger.log(self.retry_policy.log_level, f"{method} {path} finished after {retries} retries.")
+            return None
+        if isinstance(response, HTTPResponse) and response.exception is not None:
+            reason = str(response.exception) or type(response.exception).__name__
+        else:
+            reason = f"{cast(HTTPResponse, response).status} {cast(HTTPResponse, response).reason}"
+        logger.log(
+            self.retry_policy.log_level,
+            f"{method} {path} failed ({reason}); retry {retries + 1} of {self.retry_policy.max_retries} "
+            f"in {delay:.1f} seconds.",
+        )
+        return delay
 
     def get_extra_headers(self, url: str, method: str, body: str | bytes | IO[bytes] | None) -> dict[str, str]:
         return {}
@@ -423,25 +1334,24 @@ class HTTPServer(object):
         maximum_redirects: int,
         extra_headers: dict[str, str],
         decode_response: bool = True,
+        response_sink: Optional[_DownloadSink] = None,
+        raw_response: bool = False,
     ) -> JsonData | HTTPResponse:
-        full_uri = path
-        if query_params is not None:
-            full_uri = f"{path}?{urlencode(query_params, doseq=True)}"
-        headers = self._headers.copy()
-        if self._proxy_headers:
-            headers.update(self._proxy_headers)
-        if extra_headers is not None:
-            headers.update(extra_headers)
+        full_uri = self._full_uri(path, query_params)
+        headers = self._request_headers(extra_headers)
         local_connection = False
+        timing = RequestTiming(method, full_uri)
+
+        # File-like bodies (e.g. a bundle that is still being built) are sent with
+        # chunked transfer encoding, so they never need to be read into memory or
+        # have their size known up front.
+        encode_chunked = False
+        if hasattr(body, "read") and not any(key.lower() in ("content-length", "transfer-encoding") for key in headers):
+            headers["Transfer-Encoding"] = "chunked"
+            encode_chunked = True
 
         try:
-            if logger.is_debugging():
-                logger.debug(f"Request: {method} {full_uri}")
-                logger.debug("Headers:")
-                for key, value in headers.items():
-                    logger.debug(f"--> {key}: {value}")
-                logger.debug("Body:")
-                logger.debug(f"--> {body if body is not None else '<no body>'}")
+            self._log_request(method, full_uri, headers, body)
 
             # if we weren't called under a `with` statement, we'll need to manage the
             # connection here.
@@ -450,57 +1360,59 @@ class HTTPServer(object):
                 local_connection = True
 
             # At this point we know that self._conn is not None.
-            conn = cast(Union[http.HTTPConnection, http.HTTPSConnection], self._conn)
+            conn = cast(HTTPConnectionType, self._conn)
+            body_position = body.tell() if hasattr(body, "seekable") and body.seekable() else None  # type: ignore
 
             try:
-                conn.request(method, full_uri, body, headers)
-
-                response = conn.getresponse()
-                response_body = response.read()
-                if decode_response:
-                    response_body = response_body.decode("utf-8").strip()
-
-                if logger.is_debugging():
-                    logger.debug(f"Response: {response.status} {response.reason}")
-                    logger.debug("Headers:")
-                    for key, value in response.getheaders():
-                        logger.debug(f"--> {key}: {value}")
-                    logger.debug("Body:")
-                    if response.getheader("Content-Type", "").startswith("application/json"):
-                        # Only print JSON responses.
-                        # Otherwise we end up dumping entire web pages to the log.
-                        try:
-                            logger.debug(f"--> {response_body}")
-                        except json.JSONDecodeError:
-                            logger.debug("--> <invalid JSON>")
-                    else:
-                        logger.debug("--> <non-json-response>")
+                sent = False
+                try:
+                    conn.request(method, full_uri, body, headers, encode_chunked=encode_chunked)
+                    sent = True
+                    timing.lap("send")
+                    response = conn.getresponse()
+                except _stale_connection_errors:
+                    if not self._conn_reused or (hasattr(body, "read") and body_position is None):
+                        raise
+                    # Once the whole request was sent, the server may have acted on it
+                    # before closing the connection.
+                    if sent and not self.retry_policy.is_idempotent(method, headers):
+                        raise
+                    # The server closed the idle connection we reused; try again on a new one.
+                    logger.debug("The reused connection was closed by the server; reconnecting.")
+                    conn.close()
+                    conn = self._conn = self._new_connection()
+                    self._conn_reused = False
+                    if body_position is not None:
+                        body.seek(body_position)  # type: ignore
+                    conn.request(method, full_uri, body, headers, encode_chunked=encode_chunked)
+                    timing.lap("send")
+                    response = conn.getresponse()
+                timing.lap("wait")
+                timing.connected(getattr(conn, "connect_timings", {}))
+                # Any further request on this connection is no longer the first.
+                self._conn_reused = True
+
+                if response_sink is not None and 200 <= response.status <= 299:
+                    # Stream the body to disk rather than reading it into memory.
+                    response_sink.copy(response)
+                    response_body = None
+                else:
+                    response_body = _read_response_body(response)
+                    if decode_response:
+                        response_body = response_body.decode("utf-8").strip()
+                timing.lap("receive")
+                timing.finish(response.status)
+                self._log_response(response, response_body)
+            except BaseException:
+                # The connection is in an unknown state, so it mustn't be reused.
+                self._discard_connection()
+                raise
             finally:
                 if local_connection:
                     self.__exit__()
 
-            # Handle any redirects.
-            if 300 <= response.status < 400:
-                if maximum_redirects == 0:
-                    raise http.CannotSendRequest("Too many redirects")
-
-                location = response.getheader("Location")
-
-                if location is None:
-                    raise http.CannotSendRequest("Redirect response missing Location header")
-
-                # Assume the redirect location will always be on the same domain.
-                if location.startswith("http"):
-                    parsed_location = urlparse(location)
-                    if parsed_location.query:
-                        next_url = f"{parsed_location.path}?{parsed_location.query}"
-                    else:
-                        next_url = parsed_location.path
-                else:
-                    next_url = location
-
-                logger.debug(f"--> Redirected to: {urljoin(self._url.geturl(), location)}")
-
+            next_url = self._redirect_target(response, maximum_redirects)
+            if next_url is not None:
                 redirect_extra_headers = self.get_extra_headers(next_url, "GET", body)
                 return self._do_request(
                     "GET",
@@ -509,11 +1421,12 @@ class HTTPServer(object):
                     body,
                     maximum_redirects - 1,
                     {**extra_headers, **redirect_extra_headers},
+                    decode_response,
+                    response_sink,
+                    raw_response,
                 )
 
-            self._handle_set_cookie(response)
-
-            return self._tweak_response(HTTPResponse(full_uri, response=response, body=response_body))
+            return self._response_result(full_uri, response, response_body, raw_response)
         except (
             http.HTTPException,
             ssl.CertificateError,
@@ -525,8 +1438,91 @@ class HTTPServer(object):
             socket.timeout,
         ) as exception:
             logger.debug("An exception occurred processing the HTTP request.", exc_info=True)
+            timing.finish(None)
             return HTTPResponse(full_uri, exception=exception)
 
+    @staticmethod
+    def _full_uri(path: str, query_params: Optional[Mapping[str, JsonData]]) -> str:
+        if query_params is None:
+            return path
+        return f"{path}?{urlencode(query_params, doseq=True)}"
+
+    def _request_headers(self, extra_headers: Optional[Mapping[str, str]]) -> dict[str, str]:
+        """The headers to send: the client's own, any proxy headers and those of the request."""
+        headers = self._headers.copy()
+        if self._proxy_headers:
+            headers.update(self._proxy_headers)
+        if extra_headers is not None:
+            headers.update(extra_headers)
+        if not any(key.lower() == "accept-encoding" for key in headers):
+            headers["Accept-Encoding"] = _accept_encoding
+        return headers
+
+    @staticmethod
+    def _log_request(method: str, full_uri: str, headers: Mapping[str, str], body: object):
+        if not logger.is_debugging():
+            return
+        logger.debug(f"Request: {method} {full_uri}")
+        logger.debug("Headers:")
+        for key, value in headers.items():
+            logger.debug(f"--> {key}: {value}")
+        logger.debug("Body:")
+        if body is None:
+            logger.debug("--> <no body>")
+        elif hasattr(body, "read"):
+            logger.debug("--> <streamed body>")
+        else:
+            logger.debug(f"--> {body}")
+
+    @staticmethod
+    def _log_response(response: Any, response_body: object):
+        if not logger.is_debugging():
+            return
+        logger.debug(f"Response: {response.status} {response.reason}")
+        logger.debug("Headers:")
+        for key, value in response.getheaders():
+            logger.debug(f"--> {key}: {value}")
+        logger.debug("Body:")
+        if (response.getheader("Content-Type") or "").startswith("application/json"):
+            # Only print JSON responses.
+            # Otherwise we end up dumping entire web pages to the log.
+            logger.debug(f"--> {response_body}")
+        else:
+            logger.debug("--> <non-json-response>")
+
+    def _redirect_target(self, response: Any, maximum_redirects: int) -> Optional[str]:
+        """
+        The path to follow a redirect response to, or None if the response isn't a
+        redirect. 304 Not Modified, the answer to a conditional request, isn't one.
+        """
+        if not 300 <= response.status < 400 or response.status == 304:
+            return None
+        if maximum_redirects == 0:
+            raise http.CannotSendRequest("Too many redirects")
+
+        location = response.getheader("Location")
+
+        if location is None:
+            raise http.CannotSendRequest("Redirect response missing Location header")
+
+        logger.debug(f"--> Redirected to: {urljoin(self._url.geturl(), location)}")
+
+        # Assume the redirect location will always be on the same domain.
+        if location.startswith("http"):
+            parsed_location = urlparse(location)
+            if parsed_location.query:
+                return f"{parsed_location.path}?{parsed_location.query}"
+            return parsed_location.path
+        return location
+
+    def _response_result(
+        self, full_uri: str, response: http.HTTPResponse, response_body: Optional[str | bytes], raw_response: bool
+    ) -> JsonData | HTTPResponse:
+        """Store the response's cookies and wrap it up as the result of the request."""
+        self._handle_set_cookie(response)
+        result = HTTPResponse(full_uri, response=response, body=response_body)
+        return result if raw_response else self._tweak_response(result)
+
     # noinspection PyMethodMayBeStatic
     def _tweak_response(self, response: HTTPResponse) -> JsonData | HTTPResponse:
         return response
@@ -0,0 +1,257 @@
+"""
+Timing of HTTP requests: how long each phase of a request took, and hooks to
+aggregate those timings into per-endpoint latency histograms or write them to a
+trace file.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# The phases of a request, in the order they happen. "dns", "connect" and "tls" are
+# only seen by requests that open a new connection; "send" covers writing the
+# request, "wait" the time until the response headers arrive (together, the time to
+# first byte) and "receive" reading the response body.
+PHASES = ("dns", "connect", "tls", "send", "wait", "receive")
+
+
+class RequestTiming(object):
+    """
+    How long each phase of one HTTP request took, in seconds. The phases are
+    measured by calling lap() as each one ends.
+    """
+
+    def __init__(self, method: str, path: str):
+        """
+        :param method: the HTTP method of the request.
+        :param path: the path (and query) of the request.
+        """
+        self.method = method
+        self.path = path
+        self.status: Optional[int] = None
+        self.started = time.time()
+        self.thread = threading.get_ident()
+        self.duration = 0.0
+        self.phases: Dict[str, float] = {}
+        self._start = self._lap = time.perf_counter()
+        self._finished = False
+
+    @property
+    def endpoint(self) -> str:
+        """The method and path of the request, with IDs replaced by placeholders."""
+        return f"{self.method} {endpoint_template(self.path)}"
+
+    def lap(self, phase: str):
+        """Attribute the time since the previous lap (or the start) to a phase."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._lap
+        self._lap = now
+
+    def connected(self, connect_timings: Dict[str, float]):
+        """
+        Move the time spent opening the connection, which happens while the request
+        is being sent, out of the "send" phase.
+
+        :param connect_timings: the seconds spent on each connection phase.
+        """
+        for phase, seconds in connect_timings.items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            if "send" in self.phases:
+                self.phases["send"] = max(0.0, self.phases["send"] - seconds)
+        connect_timings.clear()
+
+    def finish(self, status: Optional[int]):
+        """
+        Note that the request is over and pass its timing to the hooks.
+
+        :param status: the response status, or None if the request failed.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        self.status = status
+        self.duration = time.perf_counter() - self._start
+        for hook in tuple(_hooks):
+            hook(self)
+
+
+_hooks: List[Callable[[RequestTiming], None]] = []
+
+
+def add_request_timing_hook(hook: Callable[[RequestTiming], None]):
+    """
+    Call a function with the RequestTiming of every finished HTTP request. Hooks are
+    called from the thread that made the request.
+    """
+    _hooks.append(hook)
+
+
+def remove_request_timing_hook(hook: Callable[[RequestTiming], None]):
+    """Stop calling a function added with add_request_timing_hook()."""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+_guid_segment = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+# Numeric IDs, and the random 16 character IDs Connect gives tasks.
+_id_segment = re.compile(r"^(\d+|[A-Za-z0-9]{16})$")
+
+
+def endpoint_template(path: str) -> str:
+    """
+    The path with its query removed and its IDs replaced by placeholders, so that
+    requests for different items of the same kind are counted together.
+    """
+    segments = path.split("?", 1)[0].split("/")
+    for index, segment in enumerate(segments):
+        if _guid_segment.match(segment):
+            segments[index] = "{guid}"
+        elif _id_segment.match(segment):
+            segments[index] = "{id}"
+    return "/".join(segments)
+
+
+# The upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+class LatencyHistogram(object):
+    """The distribution of the durations of requests to one endpoint."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, fraction: float) -> float:
+        """
+        An upper bound on the given percentile (as a fraction, e.g. 0.95): the bound
+        of the bucket it falls in, or the slowest request if that is less.
+        """
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(bound, self.max)
+        return self.max
+
+
+class RequestTimingStats(object):
+    """
+    A request timing hook that collects a latency histogram per endpoint, and the
+    total time spent in each phase.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, LatencyHistogram] = {}
+        self.phases: Dict[str, float] = {}
+
+    def __call__(self, timing: RequestTiming):
+        with self._lock:
+            self.endpoints.setdefault(timing.endpoint, LatencyHistogram()).add(timing.duration)
+            for phase, seconds in timing.phases.items():
+                self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def clear(self):
+        with self._lock:
+            self.endpoints = {}
+            self.phases = {}
+
+    def summary(self) -> List[str]:
+        """A table of the endpoints, slowest in total first, and the time per phase."""
+        with self._lock:
+            rows: List[Tuple[str, LatencyHistogram]] = sorted(self.endpoints.items(), key=lambda item: -item[1].total)
+            phases = dict(self.phases)
+        if not rows:
+            return []
+        width = max(len("Endpoint"), *(len(endpoint) for endpoint, _ in rows))
+        columns = ("Count", "Total", "Mean", "p50", "p95", "Max")
+        lines = [f"{'Endpoint':<{width}}" + "".join(f"{column:>9}" for column in columns)]
+        for endpoint, histogram in rows:
+            values = (
+                histogram.total,
+                histogram.total / histogram.count,
+                histogram.percentile(0.5),
+                histogram.percentile(0.95),
+                histogram.max,
+            )
+            lines.append(f"{endpoint:<{width}}{histogram.count:>9}" + "".join(f"{value:>8.3f}s" for value in values))
+        if phases:
+            lines.append(
+                "Time by phase: " + ", ".join(f"{phase} {phases[phase]:.3f}s" for phase in PHASES if phase in phases)
+            )
+        return lines
+
+
+class TraceFile(object):
+    """
+    A request timing hook that collects each request, and its phases, as trace
+    events and writes them as a JSON file in the Trace Event Format, which Chrome's
+    about:tracing and Perfetto (https://ui.perfetto.dev) can open.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: the file to write the trace to.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, object]] = []
+        self._pid = os.getpid()
+
+    def __call__(self, timing: RequestTiming):
+        start = timing.started * 1e6
+        events: List[Dict[str, object]] = [
+            {
+                "name": timing.endpoint,
+                "cat": "http",
+                "ph": "X",
+                "ts": start,
+                "dur": timing.duration * 1e6,
+                "pid": self._pid,
+                "tid": timing.thread,
+                "args": {"path": timing.path, "status": timing.status},
+            }
+        ]
+        for phase in PHASES:
+            if phase in timing.phases:
+                duration = timing.phases[phase] * 1e6
+                events.append(
+                    {
+                        "name": phase,
+                        "cat": "http",
+                        "ph": "X",
+                        "ts": start,
+                        "dur": duration,
+                        "pid": self._pid,
+                        "tid": timing.thread,
+                    }
+                )
+                start += duration
+        with self._lock:
+            self._events.extend(events)
+
+    def write(self):
+        """Write the events collected so far to the trace file."""
+        with self._lock:
+            trace = {"traceEvents": list(self._events), "displayTimeUnit": "ms"}
+        with open(self.path, "w") as f:
+            json.dump(trace, f)
@@ -8,6 +8,7 @@ import subprocess
 import sys
 import tempfile
 import textwrap
+import time
 import traceback
 from functools import wraps
 from os.path import abspath, dirname, exists, isdir, join
@@ -116,11 +117,14 @@ from .bundle import (
     write_tensorflow_manifest_json,
     write_voila_manifest_json,
 )
+from .bundle_cache import BundleCache, parse_size
+from .compression import DEFAULT_COMPRESSION_LEVEL
 from .environment_node import NodeEnvironment
 from .environment_r import REnvironment
 from .environment import Environment, PackageInstaller, fake_module_file_from_directory
 from .exception import RSConnectException
 from .git_metadata import detect_git_metadata
+from .http_timing import TraceFile, add_request_timing_hook, remove_request_timing_hook
 from .json_web_token import (
     TokenGenerator,
     parse_client_response,
@@ -458,10 +462,64 @@ def publish_args(func: Callable[P, T]) -> Callable[P, T]:
     return wrapper
 
 
+def upload_args(func: Callable[P, T]) -> Callable[P, T]:
+    """Options controlling how a local bundle is built and uploaded, for the commands that build one."""
+
+    @click.option(
+        "--compression-level",
+        type=click.IntRange(1, 9),
+        default=DEFAULT_COMPRESSION_LEVEL,
+        help=(
+            "Gzip compression level for the bundle, from 1 (fastest) to 9 (smallest, the default). "
+            "Files that are already compressed, such as images, parquet and zip files, are always stored as-is."
+        ),
+    )
+    @click.option(
+        "--force-upload",
+        is_flag=True,
+        help=(
+            "Always upload a new bundle. By default, when redeploying content whose files "
+            "are unchanged since the last deployment, the previously uploaded bundle is "
+            "deployed again instead."
+        ),
+    )
+    @click.option(
+        "--no-bundle-cache",
+        is_flag=True,
+        help=(
+            "Always build the bundle. By default, bundles are kept in a local cache and a bundle "
+            "with the same files and settings is reused, e.g. when deploying to several servers."
+        ),
+    )
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
 def content_args(func: Callable[P, T]) -> Callable[P, T]:
     return publish_args(metadata_args(func))
 
 
+def bundle_args(func: Callable[P, T]) -> Callable[P, T]:
+    """Options controlling how manifests and bundles are built from local files."""
+
+    @click.option(
+        "--no-checksum-cache",
+        is_flag=True,
+        help=(
+            "Checksum every file, ignoring checksums cached by earlier runs for files "
+            "whose size and modification time haven't changed."
+        ),
+    )
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
 # This callback handles the "shorthand" --disable-env-management option.
 # If the shorthand flag is provided, then it takes precendence over the R and Python flags.
 # This callback also inverts the --disable-env-management-r and
@@ -532,7 +590,20 @@ def runtime_environment_args(func: Callable[P, T]) -> Callable[P, T]:
 
 @click.group(no_args_is_help=True)
 @click.option("--future", "-u", is_flag=True, hidden=True, help="Enables future functionality.")
-def cli(future: bool):
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False),
+    help="Write the timings of the HTTP requests made to this file, in the JSON trace format that "
+    "Chrome tracing and Perfetto (https://ui.perfetto.dev) open.",
+)
+@click.option(
+    "--no-server-cache",
+    is_flag=True,
+    help="Ask the server for its settings and Python versions, ignoring what earlier commands cached. "
+    "By default these are reused for up to an hour.",
+)
+@click.pass_context
+def cli(ctx: click.Context, future: bool, trace_file: Optional[str], no_server_cache: bool):
     """
     This command line tool may be used to deploy various types of content to Posit
     Connect and shinyapps.io.
@@ -553,6 +624,18 @@ def cli(future: bool):
     global future_enabled
     future_enabled = future
 
+    ctx.meta["rsconnect.no_server_cache"] = no_server_cache
+
+    if trace_file:
+        trace = TraceFile(trace_file)
+        add_request_timing_hook(trace)
+
+        def write_trace():
+            remove_request_timing_hook(trace)
+            trace.write()
+
+        ctx.call_on_close(write_trace)
+
 
 @cli.command(help="Show the version of the rsconnect-python package.")
 def version():
@@ -695,6 +778,17 @@ def bootstrap(
     default=False,
     help="Mark this server as the default (used when -n/--name and -s/--server are not specified).",
 )
+@click.option(
+    "--rate-limit",
+    type=click.FloatRange(min=0, min_open=True),
+    help="The most API requests per second to make to this Posit Connect server. "
+    "Requests are slowed down further whenever the server asks for it.",
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    help="The most API requests to have outstanding at once against this Posit Connect server.",
+)
 @click.pass_context
 def add(
     ctx: click.Context,
@@ -708,6 +802,8 @@ def add(
     token: Optional[str],
     secret: Optional[str],
     set_default: bool,
+    rate_limit: Optional[float],
+    max_in_flight: Optional[int],
     verbose: int,
 ):
     set_verbosity(verbose)
@@ -770,6 +866,8 @@ def add(
                 server,
                 api_key=api_key,
                 snowflake_connection_name=snowflake_connection_name,
+                rate_limit=rate_limit,
+                max_in_flight=max_in_flight,
                 set_as_default=set_default,
             )
             if old_server:
@@ -790,6 +888,8 @@ def add(
                 api_key=real_server_rsc.api_key,
                 insecure=real_server_rsc.insecure,
                 ca_data=real_server_rsc.ca_data,
+                rate_limit=rate_limit,
+                max_in_flight=max_in_flight,
                 set_as_default=set_default,
             )
 
@@ -836,6 +936,10 @@ def list_servers(verbose: int):
                     click.echo("    Insecure mode (TLS host/certificate validation disabled)")
                 if server.get("ca_cert"):
                     click.echo("    Client TLS certificate data provided")
+                if server.get("rate_limit"):
+                    click.echo("    At most %g API requests per second" % server["rate_limit"])
+                if server.get("max_in_flight"):
+                    click.echo("    At most %d API requests at once" % server["max_in_flight"])
                 if server.get("snowflake_connection_name"):
                     snowflake_connection_name = server.get("snowflake_connection_name")
                     if snowflake_connection_name:
@@ -1417,6 +1521,8 @@ def _warn_on_ignored_requirements(directory: str, requirements_file_name: str):
 @server_args
 @spcs_args
 @content_args
+@upload_args
+@bundle_args
 @runtime_environment_args
 @click.option(
     "--static",
@@ -1509,6 +1615,10 @@ def deploy_notebook(
     package_installer: Optional[PackageInstaller] = None,
     metadata: tuple[str, ...] = tuple(),
     no_metadata: bool = False,
+    no_checksum_cache: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -1544,6 +1654,9 @@ def deploy_notebook(
         title=title,
         disable_env_management=disable_env_management,
         env_vars=env_vars,
+        force_upload=force_upload,
+        compression_level=compression_level,
+        use_bundle_cache=not no_bundle_cache,
     )
 
     # Prepare metadata for upload
@@ -1574,6 +1687,7 @@ def deploy_notebook(
             env_management_py=env_management_py,
             env_management_r=env_management_r,
             r_environment=r_environment,
+            use_checksum_cache=not no_checksum_cache,
         )
     ce.deploy_bundle(activate=not ce.should_deploy_as_draft(draft, no_verify)).save_deployed_info().emit_task_log()
     if not no_verify:
@@ -1593,6 +1707,8 @@ def deploy_notebook(
 @server_args
 @spcs_args
 @content_args
+@upload_args
+@bundle_args
 @runtime_environment_args
 @click.option(
     "--entrypoint",
@@ -1693,6 +1809,10 @@ def deploy_voila(
     package_installer: Optional[PackageInstaller] = None,
     metadata: tuple[str, ...] = tuple(),
     no_metadata: bool = False,
+    no_checksum_cache: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -1722,6 +1842,9 @@ def deploy_voila(
         title=title,
         disable_env_management=disable_env_management,
         env_vars=env_vars,
+        force_upload=force_upload,
+        compression_level=compression_level,
+        use_bundle_cache=not no_bundle_cache,
     )
 
     # Prepare metadata for upload
@@ -1746,6 +1869,7 @@ def deploy_voila(
         env_management_r=env_management_r,
         r_environment=r_environment,
         multi_notebook=multi_notebook,
+        use_checksum_cache=not no_checksum_cache,
     ).deploy_bundle(activate=not ce.should_deploy_as_draft(draft, no_verify)).save_deployed_info().emit_task_log()
     if not no_verify:
         ce.verify_deployment()
@@ -1768,6 +1892,7 @@ def deploy_voila(
 @server_args
 @spcs_args
 @content_args
+@upload_args
 @cloud_shinyapps_args
 @click.argument("file", type=click.Path(exists=True, dir_okay=True, file_okay=True))
 @shinyapps_deploy_args
@@ -1795,6 +1920,9 @@ def deploy_manifest(
     draft: bool,
     metadata: tuple[str, ...] = tuple(),
     no_metadata: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -1820,6 +1948,9 @@ def deploy_manifest(
         title=title,
         visibility=visibility,
         env_vars=env_vars,
+        force_upload=force_upload,
+        compression_level=compression_level,
+        use_bundle_cache=not no_bundle_cache,
     )
 
     # Prepare metadata for upload
@@ -1954,6 +2085,8 @@ def deploy_bundle(
 @server_args
 @spcs_args
 @content_args
+@upload_args
+@bundle_args
 @cloud_shinyapps_args
 @click.option(
     "--requirements-file",
@@ -2003,6 +2136,10 @@ def deploy_pyproject(
     exclude_renv: bool,
     metadata: tuple[str, ...] = tuple(),
     no_metadata: bool = False,
+    no_checksum_cache: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -2112,6 +2249,7 @@ def deploy_pyproject(
         }
     else:
         raise RSConnectException(f"Unsupported app_mode '{target.configured_app_mode}' in [tool.rsconnect]")
+    bundle_kwargs["use_checksum_cache"] = not no_checksum_cache
 
     ce = RSConnectExecutor(
         ctx=ctx,
@@ -2130,6 +2268,9 @@ def deploy_pyproject(
         title=effective_title,
         visibility=visibility,
         env_vars=env_vars,
+        force_upload=force_upload,
+        compression_level=compression_level,
+        use_bundle_cache=not no_bundle_cache,
     )
 
     server_version = None
@@ -2262,6 +2403,8 @@ def deploy_git(
 @server_args
 @spcs_args
 @content_args
+@upload_args
+@bundle_args
 @runtime_environment_args
 @click.option(
     "--exclude",
@@ -2355,6 +2498,10 @@ def deploy_quarto(
     package_installer: Optional[PackageInstaller],
     metadata: tuple[str, ...] = tuple(),
     no_metadata: bool = False,
+    no_checksum_cache: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -2401,6 +2548,9 @@ def deploy_quarto(
         title=title,
         disable_env_management=disable_env_management,
         env_vars=env_vars,
+        force_upload=force_upload,
+        compression_level=compression_level,
+        use_bundle_cache=not no_bundle_cache,
     )
 
     # Prepare metadata for upload
@@ -2425,6 +2575,7 @@ def deploy_quarto(
             env_management_py=env_management_py,
             env_management_r=env_management_r,
             r_environment=r_environment,
+            use_checksum_cache=not no_checksum_cache,
         )
         .deploy_bundle(activate=not ce.should_deploy_as_draft(draft, no_verify))
         .save_deployed_info()
@@ -2451,6 +2602,8 @@ def deploy_quarto(
 @server_args
 @spcs_args
 @content_args
+@upload_args
+@bundle_args
 @click.option(
     "--image",
     "-I",
@@ -2496,6 +2649,10 @@ def deploy_tensorflow(
     draft: bool,
     metadata: tuple[str, ...] = tuple(),
     no_metadata: bool = False,
+    no_checksum_cache: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -2516,6 +2673,9 @@ def deploy_tensorflow(
         app_id=app_id,
         title=title,
         env_vars=env_vars,
+        force_upload=force_upload,
+        compression_level=compression_level,
+        use_bundle_cache=not no_bundle_cache,
     )
 
     # Prepare metadata for upload
@@ -2534,6 +2694,7 @@ def deploy_tensorflow(
             extra_files,
             exclude,
             image=image,
+            use_checksum_cache=not no_checksum_cache,
         )
         .deploy_bundle(activate=not ce.should_deploy_as_draft(draft, no_verify))
         .save_deployed_info()
@@ -2556,6 +2717,8 @@ def deploy_tensorflow(
 @server_args
 @spcs_args
 @content_args
+@upload_args
+@bundle_args
 @cloud_shinyapps_args
 @click.option(
     "--entrypoint",
@@ -2605,6 +2768,10 @@ def deploy_html(
     connect_server: Optional[api.RSConnectServer] = None,
     metadata: tuple[str, ...] = tuple(),
     no_metadata: bool = False,
+    no_checksum_cache: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -2642,6 +2809,9 @@ def deploy_html(
             app_id=app_id,
             title=title,
             env_vars=env_vars,
+            force_upload=force_upload,
+            compression_level=compression_level,
+            use_bundle_cache=not no_bundle_cache,
         )
 
     # Prepare metadata for upload
@@ -2661,6 +2831,7 @@ def deploy_html(
             entrypoint,
             extra_files,
             exclude,
+            use_checksum_cache=not no_checksum_cache,
         )
         .deploy_bundle(activate=not ce.should_deploy_as_draft(draft, no_verify))
         .save_deployed_info()
@@ -2720,6 +2891,8 @@ def generate_deploy_python(
     @server_args
     @spcs_args
     @content_args
+    @upload_args
+    @bundle_args
     @cloud_shinyapps_args
     @runtime_environment_args
     @click.option(
@@ -2821,6 +2994,10 @@ def generate_deploy_python(
         package_installer: Optional[PackageInstaller],
         metadata: tuple[str, ...],
         no_metadata: bool,
+        no_checksum_cache: bool = False,
+        force_upload: bool = False,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        no_bundle_cache: bool = False,
     ):
         set_verbosity(verbose)
         entrypoint = validate_entry_point(entrypoint, directory)
@@ -2860,6 +3037,9 @@ def generate_deploy_python(
             visibility=visibility,
             disable_env_management=disable_env_management,
             env_vars=env_vars,
+            force_upload=force_upload,
+            compression_level=compression_level,
+            use_bundle_cache=not no_bundle_cache,
         )
 
         if isinstance(ce.client, RSConnectClient):
@@ -2898,6 +3078,7 @@ def generate_deploy_python(
             env_management_py=env_management_py,
             env_management_r=env_management_r,
             r_environment=r_environment,
+            use_checksum_cache=not no_checksum_cache,
         )
         ce.deploy_bundle(activate=not ce.should_deploy_as_draft(draft, no_verify))
         ce.save_deployed_info()
@@ -2937,6 +3118,8 @@ generate_deploy_python(app_mode=AppModes.PYTHON_PANEL, min_version="2025.10.0")
 @server_args
 @spcs_args
 @content_args
+@upload_args
+@bundle_args
 @cloud_shinyapps_args
 @click.option(
     "--image",
@@ -3012,6 +3195,10 @@ def deploy_nodejs(
     draft: bool,
     metadata: tuple[str, ...],
     no_metadata: bool,
+    no_checksum_cache: bool = False,
+    force_upload: bool = False,
+    compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+    no_bundle_cache: bool = False,
 ):
     set_verbosity(verbose)
     entrypoint = validate_node_entry_point(entrypoint, directory)
@@ -3041,6 +3228,9 @@ def deploy_nodejs(
         visibility=visibility,
         disable_env_management=None,
         env_vars=env_vars,
+        force_upload=force_upload,
+        compression_level=compression_level,
+        use_bundle_cache=not no_bundle_cache,
     )
 
     if isinstance(ce.client, RSConnectClient):
@@ -3061,6 +3251,7 @@ def deploy_nodejs(
         exclude,
         image=image,
         env_management_node=env_management_node,
+        use_checksum_cache=not no_checksum_cache,
     )
     ce.deploy_bundle(activate=not ce.should_deploy_as_draft(draft, no_verify))
     ce.save_deployed_info()
@@ -3160,6 +3351,7 @@ def write_manifest():
     type=click.Path(exists=True, dir_okay=False, file_okay=True),
 )
 @runtime_environment_args
+@bundle_args
 @click.pass_context
 def write_manifest_notebook(
     ctx: click.Context,
@@ -3179,6 +3371,7 @@ def write_manifest_notebook(
     hide_tagged_input: Optional[bool] = None,
     package_installer: Optional[PackageInstaller] = None,
     requirements_file: Optional[str] = None,
+    no_checksum_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -3216,6 +3409,7 @@ def write_manifest_notebook(
             env_management_py,
             env_management_r,
             r_environment,
+            use_checksum_cache=not no_checksum_cache,
         )
 
     if environment_file_exists and not generate_env:
@@ -3297,6 +3491,7 @@ def write_manifest_notebook(
     help=("Set the manifest for multi-notebook mode."),
 )
 @runtime_environment_args
+@bundle_args
 @click.pass_context
 def write_manifest_voila(
     ctx: click.Context,
@@ -3317,6 +3512,7 @@ def write_manifest_voila(
     multi_notebook: bool,
     package_installer: Optional[PackageInstaller] = None,
     requirements_file: Optional[str] = None,
+    no_checksum_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -3363,6 +3559,7 @@ def write_manifest_voila(
             env_management_r,
             r_environment,
             multi_notebook,
+            use_checksum_cache=not no_checksum_cache,
         )
 
 
@@ -3438,6 +3635,7 @@ def write_manifest_voila(
     type=click.Path(exists=True, dir_okay=False, file_okay=True),
 )
 @runtime_environment_args
+@bundle_args
 @click.pass_context
 def write_manifest_quarto(
     ctx: click.Context,
@@ -3457,6 +3655,7 @@ def write_manifest_quarto(
     exclude_renv: bool,
     package_installer: Optional[PackageInstaller],
     requirements_file: Optional[str],
+    no_checksum_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -3521,6 +3720,7 @@ def write_manifest_quarto(
             env_management_py,
             env_management_r,
             r_environment,
+            use_checksum_cache=not no_checksum_cache,
         )
 
 
@@ -3560,6 +3760,7 @@ def write_manifest_quarto(
     "even when an renv.lock file is present (in the content directory or at RENV_PATHS_LOCKFILE).",
 )
 @click.argument("directory", type=click.Path(exists=True, dir_okay=True, file_okay=False))
+@bundle_args
 @cli_exception_handler
 @click.pass_context
 def write_manifest_pyproject(
@@ -3569,6 +3770,7 @@ def write_manifest_pyproject(
     verbose: int,
     exclude_renv: bool,
     directory: str,
+    no_checksum_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -3646,6 +3848,7 @@ def write_manifest_pyproject(
                 env_management_py=None,
                 env_management_r=None,
                 r_environment=r_environment,
+                use_checksum_cache=not no_checksum_cache,
             )
     elif app_mode == AppModes.JUPYTER_NOTEBOOK:  # This is "jupyter-static"
         environment = inspect_python_environment()
@@ -3661,6 +3864,7 @@ def write_manifest_pyproject(
                 env_management_py=None,
                 env_management_r=None,
                 r_environment=r_environment,
+                use_checksum_cache=not no_checksum_cache,
             )
     elif app_mode == AppModes.JUPYTER_VOILA:
         environment = inspect_python_environment()
@@ -3677,6 +3881,7 @@ def write_manifest_pyproject(
                 env_management_r=None,
                 r_environment=r_environment,
                 multi_notebook=False,
+                use_checksum_cache=not no_checksum_cache,
             )
     elif app_mode in (AppModes.STATIC_QUARTO, AppModes.SHINY_QUARTO):
         path = str(Path(directory) / entrypoint)
@@ -3702,6 +3907,7 @@ def write_manifest_pyproject(
                 env_management_py=None,
                 env_management_r=None,
                 r_environment=r_environment,
+                use_checksum_cache=not no_checksum_cache,
             )
 
     # The manifest references environment.filename (e.g. a requirements.txt
@@ -3753,6 +3959,7 @@ def write_manifest_pyproject(
     help="Target image to be used during content build and execution. "
     "This option is only applicable if the Connect server is configured to use off-host execution.",
 )
+@bundle_args
 @click.pass_context
 def write_manifest_tensorflow(
     ctx: click.Context,
@@ -3762,6 +3969,7 @@ def write_manifest_tensorflow(
     directory: str,
     extra_files: tuple[str, ...],
     image: Optional[str],
+    no_checksum_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -3778,6 +3986,7 @@ def write_manifest_tensorflow(
             extra_files,
             exclude,
             image,
+            use_checksum_cache=not no_checksum_cache,
         )
 
 
@@ -3863,6 +4072,7 @@ def generate_write_manifest_python(
         type=click.Path(exists=True, dir_okay=False, file_okay=True),
     )
     @runtime_environment_args
+    @bundle_args
     @click.pass_context
     def manifest_writer(
         ctx: click.Context,
@@ -3882,6 +4092,7 @@ def generate_write_manifest_python(
         exclude_renv: bool,
         package_installer: Optional[PackageInstaller],
         requirements_file: Optional[str],
+        no_checksum_cache: bool = False,
     ):
         resolved_requirements_file = resolve_requirements_file(directory, requirements_file, force_generate)
         _write_framework_manifest(
@@ -3901,6 +4112,7 @@ def generate_write_manifest_python(
             exclude_renv,
             package_installer=package_installer,
             requirements_file=resolved_requirements_file,
+            use_checksum_cache=not no_checksum_cache,
         )
 
     return manifest_writer
@@ -3969,6 +4181,7 @@ generate_write_manifest_python(AppModes.PYTHON_PANEL)
     nargs=-1,
     type=click.Path(exists=True, dir_okay=False, file_okay=True),
 )
+@bundle_args
 @click.pass_context
 def write_manifest_nodejs(
     ctx: click.Context,
@@ -3981,6 +4194,7 @@ def write_manifest_nodejs(
     extra_files: tuple[str, ...],
     image: Optional[str],
     env_management_node: Optional[bool],
+    no_checksum_cache: bool = False,
 ):
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -4004,6 +4218,7 @@ def write_manifest_nodejs(
             exclude,
             image,
             env_management_node,
+            use_checksum_cache=not no_checksum_cache,
         )
 
 
@@ -4025,6 +4240,7 @@ def _write_framework_manifest(
     exclude_renv: bool = False,
     package_installer: Optional[PackageInstaller] = None,
     requirements_file: Optional[str] = None,
+    use_checksum_cache: bool = True,
 ):
     """
     A common function for writing manifests for APIs as well as Dash, Streamlit, Bokeh, and Panel apps.
@@ -4044,6 +4260,7 @@ def _write_framework_manifest(
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
     :param env_management_r: False prevents Connect from managing the R environment for this bundle.
         The server administrator is responsible for installing packages in the runtime environment. Default = None.
+    :param use_checksum_cache: whether to reuse and update the cached checksums of unchanged files.
     """
     set_verbosity(verbose)
     output_params(ctx, locals().items())
@@ -4081,6 +4298,7 @@ def _write_framework_manifest(
             env_management_py,
             env_management_r,
             r_environment,
+            use_checksum_cache=use_checksum_cache,
         )
 
     generate_env = resolved_requirements_file is None
@@ -4289,11 +4507,7 @@ def content_bundle_download(
         if exists(output) and not overwrite:
             raise RSConnectException("The output file already exists: %s" % output)
 
-        result = download_bundle(ce.remote_server, guid)
-        if not isinstance(result.response_body, bytes):
-            raise RSConnectException("The response body must be bytes (not string or None).")
-        with open(output, "wb") as f:
-            f.write(result.response_body)
+        download_bundle(ce.remote_server, guid, output)
 
 
 @content.command(
@@ -4357,11 +4571,7 @@ def content_get_lockfile(
             raise RSConnectException("The output file already exists: %s, maybe you want to --overwrite?" % output)
 
         logger.info("Downloading %s for content %s" % (output, guid))
-        result = download_lockfile(ce.remote_server, guid)
-        if not isinstance(result.response_body, bytes):
-            raise RSConnectException("The response body must be bytes (not string or None).")
-        with open(output, "wb") as f:
-            f.write(result.response_body)
+        download_lockfile(ce.remote_server, guid, output)
 
 
 @content.command(
@@ -5826,6 +6036,74 @@ def integration_templates_show(
         json.dump(result, sys.stdout, indent=2)
 
 
+@cli.group(name="bundle", no_args_is_help=True, help="Manage local bundles.")
+def bundle_group():
+    pass
+
+
+@bundle_group.group(
+    name="cache",
+    no_args_is_help=True,
+    help=(
+        "Manage the local bundle cache. Bundles built for deployment are kept in the cache and reused "
+        "when the same files are deployed again, e.g. to another server. Set CONNECT_BUNDLE_CACHE_SIZE "
+        "to change its maximum size (default 1G; 0 disables the cache)."
+    ),
+)
+def bundle_cache_group():
+    pass
+
+
+def _format_size(size: float) -> str:
+    for unit in ["B", "KiB", "MiB"]:
+        if size < 1024:
+            return "%d B" % size if unit == "B" else "%.1f %s" % (size, unit)
+        size /= 1024
+    return "%.1f GiB" % size
+
+
+@bundle_cache_group.command(name="ls", short_help="List the bundles in the local bundle cache.")
+@click.option("--verbose", "-v", count=True, help="Enable verbose output. Use -vv for very verbose (debug) output.")
+def bundle_cache_ls(verbose: int):
+    set_verbosity(verbose)
+    with cli_feedback(""):
+        cache = BundleCache()
+        entries = cache.entries()
+        click.echo("Bundle cache in %s" % cache.directory)
+        if not entries:
+            click.echo("The bundle cache is empty.")
+            return
+        click.echo()
+        for entry in entries:
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.last_used))
+            click.echo("%s  %10s  last used %s" % (entry.key, _format_size(entry.size), last_used))
+        click.echo()
+        click.echo(
+            "%d bundles, %s of %s"
+            % (len(entries), _format_size(sum(entry.size for entry in entries)), _format_size(cache.max_size))
+        )
+
+
+@bundle_cache_group.command(
+    name="prune",
+    short_help="Remove bundles from the local bundle cache.",
+    help=(
+        "Remove the least recently used bundles from the local bundle cache until it is no larger "
+        "than --max-size, which defaults to the cache's maximum size. Use --max-size 0 to empty the cache."
+    ),
+)
+@click.option("--max-size", help="The size to shrink the cache to, e.g. 500M or 2G.")
+@click.option("--verbose", "-v", count=True, help="Enable verbose output. Use -vv for very verbose (debug) output.")
+def bundle_cache_prune(max_size: Optional[str], verbose: int):
+    set_verbosity(verbose)
+    with cli_feedback(""):
+        cache = BundleCache()
+        removed = cache.prune(parse_size(max_size) if max_size is not None else None)
+        for entry in removed:
+            logger.log(VERBOSE, "Removed bundle %s", entry.key)
+        click.echo("Removed %d bundles (%s)." % (len(removed), _format_size(sum(entry.size for entry in removed))))
+
+
 if __name__ == "__main__":
     cli()
     click.echo()
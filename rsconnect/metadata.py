@@ -11,6 +11,7 @@ import json
 import os
 import shutil
 import sys
+import time
 from datetime import datetime, timezone
 from io import BufferedWriter
 from os.path import abspath, basename, dirname, exists, join
@@ -263,6 +264,8 @@ class ServerDataDict(TypedDict):
     oauth_access_token: NotRequired[str]
     oauth_refresh_token: NotRequired[str]
     oauth_token_expiry: NotRequired[float]
+    rate_limit: NotRequired[float]
+    max_in_flight: NotRequired[int]
     default: NotRequired[bool]
 
 
@@ -288,6 +291,8 @@ class ServerData:
         oauth_access_token: Optional[str] = None,
         oauth_refresh_token: Optional[str] = None,
         oauth_token_expiry: Optional[float] = None,
+        rate_limit: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
     ):
         self.name = name
         self.url = url
@@ -303,6 +308,8 @@ class ServerData:
         self.oauth_access_token = oauth_access_token
         self.oauth_refresh_token = oauth_refresh_token
         self.oauth_token_expiry = oauth_token_expiry
+        self.rate_limit = rate_limit
+        self.max_in_flight = max_in_flight
 
 
 class ServerStore(DataStore[ServerDataDict]):
@@ -376,6 +383,8 @@ class ServerStore(DataStore[ServerDataDict]):
         oauth_access_token: Optional[str] = None,
         oauth_refresh_token: Optional[str] = None,
         oauth_token_expiry: Optional[float] = None,
+        rate_limit: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
         set_as_default: bool = False,
     ):
         """
@@ -394,6 +403,8 @@ class ServerStore(DataStore[ServerDataDict]):
         :param oauth_access_token: OAuth access token (fallback when keyring unavailable).
         :param oauth_refresh_token: OAuth refresh token (fallback when keyring unavailable).
         :param oauth_token_expiry: OAuth token expiry as unix timestamp.
+        :param rate_limit: the most API requests to make per second.
+        :param max_in_flight: the most API requests to have outstanding at once.
         :param set_as_default: mark this server as the default.
         """
         existing = self._get_by_key(name)
@@ -424,6 +435,10 @@ class ServerStore(DataStore[ServerDataDict]):
             target_data = dict(token=token, secret=secret)
 
         entry = {**common_data, **target_data}
+        if rate_limit is not None:
+            entry["rate_limit"] = rate_limit
+        if max_in_flight is not None:
+            entry["max_in_flight"] = max_in_flight
         if set_as_default or was_default:
             entry["default"] = True
         self._set(name, entry)  # type: ignore
@@ -514,6 +529,8 @@ class ServerStore(DataStore[ServerDataDict]):
                 oauth_access_token=entry.get("oauth_access_token"),
                 oauth_refresh_token=entry.get("oauth_refresh_token"),
                 oauth_token_expiry=entry.get("oauth_token_expiry"),
+                rate_limit=entry.get("rate_limit"),
+                max_in_flight=entry.get("max_in_flight"),
             )
         else:
             return ServerData(
@@ -523,6 +540,102 @@ class ServerStore(DataStore[ServerDataDict]):
             )
 
 
+class ServerInfoCacheEntry(TypedDict):
+    data: object
+    etag: NotRequired[str]
+    fetched: float
+
+
+class ServerInfoCache(DataStore[ServerInfoCacheEntry]):
+    """
+    Defines a store of what Connect servers report about themselves, such as their
+    settings (including the version, which decides the features used when
+    deploying) and the versions of Python they have installed. These rarely
+    change, so each deploy reuses them rather than asking the server again.
+
+    Entries are keyed by a hash of the server URL, the credential used and the API
+    path. An entry is used as-is for `ttl` seconds after it was fetched. After
+    that it is revalidated with If-None-Match, if the server sent an ETag for it,
+    or fetched again.
+
+    The cache is written to the user's config directory as `server_info.json`.
+    """
+
+    DEFAULT_TTL = 60 * 60
+
+    def __init__(self, base_dir: Optional[str] = None, ttl: float = DEFAULT_TTL):
+        super(ServerInfoCache, self).__init__(join(base_dir or config_dirname(), "server_info.json"), chmod=True)
+        self.ttl = ttl
+
+    @staticmethod
+    def key(url: str, credential: Optional[str], path: str) -> str:
+        """
+        Return the key of the entry for a path on a server.
+
+        :param url: the server URL.
+        :param credential: the API key (or other credential) the request is made with.
+        :param path: the API path of the request.
+        """
+        return sha1("\n".join([_normalize_server_url(url), credential or "", path]))
+
+    def load(self):
+        # The cache is only an optimization, so a damaged file is simply discarded.
+        try:
+            super(ServerInfoCache, self).load()
+        except (OSError, ValueError):
+            logger.debug("Ignoring unreadable server info cache %s" % self._primary_path)
+            self._data = {}
+        if not isinstance(self._data, dict):
+            self._data = {}
+
+    def get(self, key: str) -> Optional[ServerInfoCacheEntry]:
+        """
+        Return the cached entry for a key, whether or not it is still fresh.
+
+        :param key: the key returned by key().
+        """
+        entry = self._data.get(key)
+        if not isinstance(entry, dict) or "data" not in entry:
+            return None
+        return entry
+
+    def is_fresh(self, entry: ServerInfoCacheEntry) -> bool:
+        """Whether an entry was fetched less than `ttl` seconds ago."""
+        return 0 <= time.time() - entry.get("fetched", 0) < self.ttl
+
+    def set(self, key: str, data: object, etag: Optional[str] = None):
+        """
+        Remember a response, or that a cached one is still current, and save the cache.
+
+        :param key: the key returned by key().
+        :param data: the decoded JSON response.
+        :param etag: the ETag the server sent with the response, if any.
+        """
+        entry: ServerInfoCacheEntry = {"data": data, "fetched": time.time()}
+        if etag:
+            entry["etag"] = etag
+        with self._lock:
+            self._data[key] = entry
+            self.save()
+
+    def save(self, open: Callable[..., BufferedWriter] = open):
+        """
+        Write the cache to disk, dropping entries that have been stale for a long
+        time, e.g. for API keys no longer in use. Failing to write the cache is not
+        an error.
+        """
+        expired = time.time() - 10 * self.ttl
+        self._data = {
+            key: entry
+            for key, entry in self._data.items()
+            if isinstance(entry, dict) and entry.get("fetched", 0) >= expired
+        }
+        try:
+            super(ServerInfoCache, self).save(open)
+        except OSError as e:
+            logger.debug("Unable to save the server info cache: %s" % e)
+
+
 def sha1(s: str):
     m = hashlib.sha1()
     b = s.encode("utf-8")
@@ -539,6 +652,8 @@ class AppMetadata(TypedDict):
     title: str
     app_mode: str
     app_store_version: int
+    bundle_id: NotRequired[str]
+    bundle_digest: NotRequired[str]
 
 
 class AppStore(DataStore[AppMetadata]):
@@ -558,6 +673,7 @@ class AppStore(DataStore[AppMetadata]):
     * Title
     * App mode
     * App store file version
+    * ID and content digest of the uploaded bundle, if known
 
     The metadata file for an app is written in the same directory as the app's
     entry point file, if that directory is writable.  Otherwise, it is stored
@@ -598,6 +714,8 @@ class AppStore(DataStore[AppMetadata]):
         app_guid: str,
         title: str,
         app_mode: AppMode | str,
+        bundle_id: Optional[str] = None,
+        bundle_digest: Optional[str] = None,
     ):
         """
         Remember the metadata for the app last deployed to the specified server.
@@ -609,20 +727,23 @@ class AppStore(DataStore[AppMetadata]):
         :param app_guid: the UUID of the application.
         :param title: the title of the application.
         :param app_mode: the mode of the application.
+        :param bundle_id: the ID of the bundle that was deployed.
+        :param bundle_digest: the digest of the deployed bundle's contents.
         ."""
-        self._set(
-            server_url,
-            {
-                "server_url": server_url,
-                "filename": filename,
-                "app_url": app_url,
-                "app_id": app_id,
-                "app_guid": app_guid,
-                "title": title,
-                "app_mode": app_mode.name() if isinstance(app_mode, AppMode) else app_mode,
-                "app_store_version": self.version,
-            },
-        )
+        metadata: AppMetadata = {
+            "server_url": server_url,
+            "filename": filename,
+            "app_url": app_url,
+            "app_id": app_id,
+            "app_guid": app_guid,
+            "title": title,
+            "app_mode": app_mode.name() if isinstance(app_mode, AppMode) else app_mode,
+            "app_store_version": self.version,
+        }
+        if bundle_id is not None and bundle_digest is not None:
+            metadata["bundle_id"] = bundle_id
+            metadata["bundle_digest"] = bundle_digest
+        self._set(server_url, metadata)
 
     def resolve(self, server: str, app_id: Optional[str], app_mode: Optional[AppMode]):
         metadata = self.get(server)
@@ -643,6 +764,104 @@ class AppStore(DataStore[AppMetadata]):
         return app_id, app_mode, app_store_version
 
 
+class ChecksumCacheEntry(TypedDict):
+    size: int
+    mtime_ns: int
+    inode: int
+    checksum: str
+    used: float
+
+
+class ChecksumCache(DataStore[ChecksumCacheEntry]):
+    """
+    Defines a store of file checksums, so that files which haven't changed since
+    the last deploy or manifest write don't need to be read and hashed again.
+
+    Entries are keyed by absolute file path and are only used when the file's
+    size, modification time (in nanoseconds) and inode all still match. The cache
+    holds at most `max_entries` files; the least recently used entries are
+    dropped when it is saved. Using an entry doesn't by itself cause the cache to
+    be written again, so a run that finds every checksum cached writes nothing.
+
+    The cache describes files on this machine, so it is kept out of the deployed
+    directory, in the user's config directory under `checksums/{hash}.json`.
+    """
+
+    # A file modified this recently could change again without its mtime
+    # changing, so its checksum is not cached.
+    _RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+    def __init__(self, directory: str, base_dir: Optional[str] = None, max_entries: int = 100_000):
+        super(ChecksumCache, self).__init__(
+            join(base_dir or config_dirname(), "checksums", sha1(abspath(directory)) + ".json"),
+        )
+        self.max_entries = max_entries
+        self._dirty = False
+
+    def load(self):
+        # The cache is only an optimization, so a damaged file is simply discarded.
+        try:
+            super(ChecksumCache, self).load()
+        except (OSError, ValueError):
+            logger.debug("Ignoring unreadable checksum cache %s" % self._primary_path)
+            self._data = {}
+        if not isinstance(self._data, dict):
+            self._data = {}
+
+    def get(self, path: str, stat: os.stat_result) -> Optional[str]:
+        """
+        Return the cached checksum of a file, if the file is unchanged since it was cached.
+
+        :param path: the path of the file.
+        :param stat: the current stat() result of the file.
+        """
+        entry = self._data.get(abspath(path))
+        if (
+            not isinstance(entry, dict)
+            or entry.get("size") != stat.st_size
+            or entry.get("mtime_ns") != stat.st_mtime_ns
+            or entry.get("inode") != stat.st_ino
+        ):
+            return None
+        entry["used"] = time.time()
+        return entry.get("checksum")
+
+    def set(self, path: str, stat: os.stat_result, checksum: str):
+        """
+        Remember the checksum of a file. Call save() to write the cache to disk.
+
+        :param path: the path of the file.
+        :param stat: the stat() result of the file taken before it was hashed.
+        :param checksum: the checksum of the file.
+        """
+        if time.time_ns() - stat.st_mtime_ns < self._RACY_WINDOW_NS:
+            return
+        self._data[abspath(path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "inode": stat.st_ino,
+            "checksum": checksum,
+            "used": time.time(),
+        }
+        self._dirty = True
+
+    def save(self, open: Callable[..., BufferedWriter] = open):
+        """
+        Write the cache to disk if it has changed, evicting the least recently used
+        entries first. Failing to write the cache is not an error.
+        """
+        if not self._dirty:
+            return
+        if len(self._data) > self.max_entries:
+            by_use = sorted(self._data.items(), key=lambda item: item[1].get("used", 0), reverse=True)
+            self._data = dict(by_use[: self.max_entries])
+        try:
+            super(ChecksumCache, self).save(open)
+            self._dirty = False
+        except OSError as e:
+            logger.debug("Unable to save the checksum cache: %s" % e)
+
+
 DEFAULT_BUILD_DIR = join(os.getcwd(), "rsconnect-build")
 
 
@@ -697,13 +916,13 @@ class ContentBuildStore(DataStore[Dict[str, object]]):
     def __init__(
         self,
         server: Union[RSConnectServer, SPCSConnectServer],
-        base_dir: str = os.getenv("CONNECT_CONTENT_BUILD_DIR", DEFAULT_BUILD_DIR),
+        base_dir: Optional[str] = None,
     ):
         # This type declaration is a bit of a hack. It is needed because data model used
         # in this class doesn't quite match the one used in the superclass.
         self._data: ContentBuildStoreData
         self._server = server
-        self._base_dir = os.path.abspath(base_dir)
+        self._base_dir = os.path.abspath(base_dir or os.getenv("CONNECT_CONTENT_BUILD_DIR", DEFAULT_BUILD_DIR))
         self._build_logs_dir = join(self._base_dir, "logs", _normalize_server_url(server.url))
         self._build_state_file = join(self._base_dir, "%s.json" % _normalize_server_url(server.url))
         super(ContentBuildStore, self).__init__(self._build_state_file, chmod=True)
@@ -275,8 +275,10 @@ class GlobMatcher(object):
             # Note: the index used here makes sure the pattern has a trailing
             # slash.  We want that.
             self._pattern = pattern[:-4]
+            self._prefix_only = True
             self.matches = self._match_with_starts_with
         else:
+            self._prefix_only = False
             self._pattern_parts: list[str | re.Pattern[str]]
             self._wildcard_index: int | None
             self._pattern_parts, self._wildcard_index = self._to_parts_list(pattern)
@@ -315,6 +317,15 @@ class GlobMatcher(object):
         path = pathlib.PurePath(path).as_posix()
         return path.startswith(self._pattern)
 
+    def matches_all_under(self, directory: str | pathlib.PurePath) -> bool:
+        """
+        Determines whether every path under the given directory is matched, so a
+        directory walk doesn't need to descend into it.
+        """
+        if not self._prefix_only:
+            return False
+        return (pathlib.PurePath(directory).as_posix() + "/").startswith(self._pattern)
+
     def _match_with_list_parts(self, path: str | pathlib.PurePath):
         path = pathlib.PurePath(path).as_posix()
         parts = path.split("/")
@@ -350,13 +361,136 @@ class GlobMatcher(object):
         return pattern_index == wildcard_index
 
 
+def _glob_segment_regex(segment: str) -> str:
+    """
+    Translates one path segment of a glob into a regular expression that, like the
+    per-segment matching in GlobMatcher, never matches across a "/".
+    """
+    result: list[str] = []
+    i, n = 0, len(segment)
+    while i < n:
+        ch = segment[i]
+        i += 1
+        if ch == "*":
+            result.append("[^/]*")
+        elif ch == "?":
+            result.append("[^/]")
+        elif ch == "[":
+            j = i
+            if j < n and segment[j] == "!":
+                j += 1
+            if j < n and segment[j] == "]":
+                j += 1
+            while j < n and segment[j] != "]":
+                j += 1
+            if j >= n:
+                result.append("\\[")
+                continue
+            chars = segment[i:j].replace("\\", "\\\\")
+            i = j + 1
+            if chars.startswith("!"):
+                chars = "^/" + chars[1:]
+            elif chars.startswith("^"):
+                chars = "\\" + chars
+            result.append("[" + chars + "]")
+        else:
+            result.append(re.escape(ch))
+    return "".join(result)
+
+
+def _glob_regex(pattern: str) -> str:
+    """
+    Translates a Posix-style glob into a regular expression. `**` matches zero or
+    more whole directories and may appear any number of times.
+    """
+    segments: list[str] = []
+    for segment in pattern.split("/"):
+        if not (segment == "**" and segments and segments[-1] == "**"):
+            segments.append(segment)
+
+    regex = ""
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == "**":
+            if not last:
+                regex += "(?:.*/)?"
+            elif regex:
+                # "dir/**" matches the directory itself and everything under it.
+                regex = regex[:-1] + "(?:/.*)?"
+            else:
+                regex = ".*"
+        else:
+            regex += _glob_segment_regex(segment) + ("" if last else "/")
+    return regex
+
+
+class _PrefixTrie(object):
+    """
+    A trie of directory paths, by path segment, for the `dir/**/*` patterns that
+    match everything under a directory.
+    """
+
+    def __init__(self) -> None:
+        self.children: dict[str, _PrefixTrie] = {}
+        self.terminal = False
+
+    def add(self, parts: list[str]) -> None:
+        node = self
+        for part in parts:
+            node = node.children.setdefault(part, _PrefixTrie())
+        node.terminal = True
+
+    def depth_of_first_terminal(self, parts: list[str]) -> Optional[int]:
+        """The number of leading parts that form a directory in the trie, if any do."""
+        node = self
+        for depth, part in enumerate(parts):
+            if node.terminal:
+                return depth
+            child = node.children.get(part)
+            if child is None:
+                return None
+            node = child
+        return len(parts) if node.terminal else None
+
+
+def _normalize_glob_path(path: str | pathlib.PurePath) -> str:
+    """Returns the Posix form of a path, as `PurePath(path).as_posix()` would."""
+    if isinstance(path, str) and sys.platform != "win32":
+        if not (path.startswith("./") or "/./" in path or "//" in path or path.endswith(("/", "/.")) or path == "."):
+            return path
+    return pathlib.PurePath(path).as_posix()
+
+
 class GlobSet(object):
     """
-    Matches against a set of `GlobMatcher` patterns
+    Matches against a set of `GlobMatcher` patterns.
+
+    A compiled GlobSet instead merges all the patterns into one regular expression,
+    plus a trie of the directories named by `dir/**/*` patterns, so each path is
+    matched with a single call whatever the number of patterns. In this mode `**`
+    may appear more than once in a pattern.
     """
 
-    def __init__(self, patterns: list[str]):
-        self._matchers = [GlobMatcher(pattern) for pattern in patterns]
+    def __init__(self, patterns: list[str], compiled: bool = False):
+        self._compiled = compiled
+        self._matchers: list[GlobMatcher] = []
+        self._prefixes = _PrefixTrie()
+        self._regex: Optional[re.Pattern[str]] = None
+
+        if not compiled:
+            self._matchers = [GlobMatcher(pattern) for pattern in patterns]
+            return
+
+        regexes: list[str] = []
+        for pattern in patterns:
+            pattern = pathlib.PurePath(pattern).as_posix()
+            prefix = pattern[:-5]
+            if pattern.endswith("/**/*") and not any(ch in prefix for ch in "*?["):
+                self._prefixes.add(prefix.split("/"))
+            else:
+                regexes.append(_glob_regex(pattern))
+        if regexes:
+            self._regex = re.compile(r"\A(?:" + "|".join(regexes) + r")\Z", re.DOTALL)
 
     def matches(self, path: str):
         """
@@ -366,7 +500,26 @@ class GlobSet(object):
         :param path: the path to test.
         :return: True, if the given path matches any of our glob patterns.
         """
-        return any(matcher.matches(path) for matcher in self._matchers)
+        if not self._compiled:
+            return any(matcher.matches(path) for matcher in self._matchers)
+        posix_path = _normalize_glob_path(path)
+        parts = posix_path.split("/")
+        depth = self._prefixes.depth_of_first_terminal(parts)
+        if depth is not None and depth < len(parts):
+            return True
+        return self._regex is not None and self._regex.match(posix_path) is not None
+
+    def matches_all_under(self, directory: str) -> bool:
+        """
+        Determines whether every path under the given directory is matched by one
+        of our glob expressions.
+
+        :param directory: the directory to test.
+        :return: True, if all paths under the directory match.
+        """
+        if not self._compiled:
+            return any(matcher.matches_all_under(directory) for matcher in self._matchers)
+        return self._prefixes.depth_of_first_terminal(_normalize_glob_path(directory).split("/")) is not None
 
 
 # Strip quotes from string arguments that might be passed in by jq
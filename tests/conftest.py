@@ -0,0 +1,18 @@
+import pytest
+
+from rsconnect.http_support import _connection_pool
+
+
+@pytest.fixture(autouse=True)
+def isolate_config_dir(tmp_path, monkeypatch):
+    # Keep the checksum, bundle and other caches out of the user's configuration directory.
+    config_home = str(tmp_path / "config-home")
+    for name in ["HOME", "XDG_CONFIG_HOME", "APPDATA"]:
+        monkeypatch.setenv(name, config_home)
+
+
+@pytest.fixture(autouse=True)
+def clear_connection_pool():
+    # Don't let a test reuse a connection to a server mocked by another test.
+    yield
+    _connection_pool.clear()
@@ -1,9 +1,15 @@
+import hashlib
 import io
 import json
+import os
 import sys
+import tempfile
+import time
+from os.path import join
 from unittest import TestCase
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, call, patch
 
+import click
 import httpretty
 import pytest
 
@@ -12,12 +18,21 @@ from rsconnect.api import (
     RSConnectClient,
     RSConnectExecutor,
     RSConnectServer,
+    S3Client,
     ShinyappsServer,
     ShinyappsService,
     SPCSConnectServer,
+    TaskWatcher,
+    find_unique_name,
+    server_info_cache,
     verify_api_key,
 )
+from rsconnect.bundle import BundleArchive
+from rsconnect.bundle_cache import BundleCache
 from rsconnect.exception import DeploymentFailedException, RSConnectException
+from rsconnect.http_support import HTTPResponse
+from rsconnect.main import cli
+from rsconnect.metadata import AppStore, ServerInfoCache
 
 from .utils import require_api_key, require_connect
 
@@ -313,6 +328,265 @@ class RSConnectClientTestCase(TestCase):
             with self.assertRaises(RSConnectException):
                 client.deploy(app_id, app_name=None, app_title=None, title_is_default=None, tarball=None)
 
+    def _task_client(self, outputs):
+        with patch.object(RSConnectClient, "__init__", lambda _, server, cookies, timeout: None):
+            client = RSConnectClient(Mock(), Mock(), Mock())
+        client._conn = Mock()
+        client.task_get = Mock(
+            side_effect=[
+                dict(output=output, last=index, finished=index == len(outputs) - 1, code=0)
+                for index, output in enumerate(outputs)
+            ]
+        )
+        return client
+
+    def test_wait_for_task_adapts_the_poll_wait(self):
+        client = self._task_client([[], [], [], [], ["a", "b"], ["c"], [], []])
+        log_lines, task = client.wait_for_task("task-1", None, poll_wait=1, max_poll_wait=8)
+        self.assertEqual(log_lines, ["a", "b", "c"])
+        self.assertTrue(task["finished"])
+        waits = [call.kwargs["wait"] for call in client.task_get.call_args_list]
+        self.assertEqual(waits, [1, 2, 4, 8, 8, 4, 2, 4])
+        firsts = [call.kwargs["first"] for call in client.task_get.call_args_list]
+        self.assertEqual(firsts, [None, 0, 1, 2, 3, 4, 5, 6])
+
+    def test_wait_for_task_poll_wait_fits_the_request_timeout(self):
+        client = self._task_client([[]] * 5)
+        with patch.dict(os.environ, {"CONNECT_REQUEST_TIMEOUT": "6"}):
+            client.wait_for_task("task-1", None, poll_wait=1)
+        waits = [call.kwargs["wait"] for call in client.task_get.call_args_list]
+        self.assertEqual(waits, [1, 2, 3, 3, 3])
+
+    def _deploy_client(self):
+        with patch.object(RSConnectClient, "__init__", lambda _, server, cookies, timeout: None):
+            client = RSConnectClient(Mock(), Mock(), Mock())
+        client._server = Mock(spec=RSConnectServer)
+        client.get_content_by_id = Mock(
+            return_value={
+                "id": "1",
+                "guid": "abc-123",
+                "title": "Title",
+                "content_url": "http://test-server/content/abc-123/",
+                "dashboard_url": "http://test-server/connect/#/apps/abc-123",
+            }
+        )
+        client.upload_bundle = Mock(return_value={"id": "8"})
+        client.content_deploy = Mock(return_value={"task_id": "task-1"})
+        return client
+
+    def test_deploy_unchanged_bundle(self):
+        client = self._deploy_client()
+        result = client.deploy("abc-123", None, "Title", True, tarball=Mock(), bundle_id="7")
+        client.upload_bundle.assert_not_called()
+        client.content_deploy.assert_called_once_with("abc-123", "7", activate=True)
+        self.assertEqual(result["bundle_id"], "7")
+        self.assertEqual(result["task_id"], "task-1")
+
+    def test_deploy_unchanged_bundle_missing(self):
+        client = self._deploy_client()
+        client.content_deploy.side_effect = [RSConnectException("Bundle not found"), {"task_id": "task-2"}]
+        tarball = Mock()
+        result = client.deploy("abc-123", None, "Title", True, tarball=tarball, bundle_id="7")
+        client.upload_bundle.assert_called_once_with("abc-123", tarball, metadata=None)
+        client.content_deploy.assert_called_with("abc-123", "8", activate=True)
+        self.assertEqual(result["bundle_id"], "8")
+        self.assertEqual(result["task_id"], "task-2")
+
+
+class ServerInfoCacheTestCase(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = ServerInfoCache(self.tempdir)
+        patcher = patch("rsconnect.api.server_info_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.requests = []
+
+    def respond(self, etag=None, version="2025.06.0"):
+        def callback(request, uri, response_headers):
+            self.requests.append(request.headers.get("If-None-Match"))
+            if etag is not None and request.headers.get("If-None-Match") == etag:
+                return [304, {"ETag": etag}, ""]
+            headers = {"Content-Type": "application/json"}
+            if etag is not None:
+                headers["ETag"] = etag
+            return [200, headers, json.dumps({"version": version})]
+
+        httpretty.register_uri(httpretty.GET, "http://test-server/__api__/server_settings", body=callback)
+
+    def expire(self):
+        for entry in self.cache._data.values():
+            entry["fetched"] -= ServerInfoCache.DEFAULT_TTL + 1
+
+    @httpretty.activate(verbose=True, allow_net_connect=False)
+    def test_fresh_settings_are_reused(self):
+        self.respond()
+        with RSConnectClient(RSConnectServer("http://test-server", "key")) as client:
+            self.assertEqual(client.server_settings(), {"version": "2025.06.0"})
+            self.assertEqual(client.server_settings(), {"version": "2025.06.0"})
+        self.assertEqual(
+            RSConnectClient(RSConnectServer("http://test-server", "key")).server_settings()["version"], "2025.06.0"
+        )
+        self.assertEqual(self.requests, [None])
+
+        # Another API key has its own entry.
+        RSConnectClient(RSConnectServer("http://test-server", "other-key")).server_settings()
+        self.assertEqual(len(self.requests), 2)
+
+    @httpretty.activate(verbose=True, allow_net_connect=False)
+    def test_stale_settings_are_revalidated(self):
+        self.respond(etag='"v1"')
+        client = RSConnectClient(RSConnectServer("http://test-server", "key"))
+        client.server_settings()
+        self.expire()
+        self.assertEqual(client.server_settings(), {"version": "2025.06.0"})
+        self.assertEqual(self.requests, [None, '"v1"'])
+        # The revalidated entry is fresh again.
+        client.server_settings()
+        self.assertEqual(len(self.requests), 2)
+
+        self.expire()
+        self.respond(etag='"v2"', version="2025.11.1")
+        self.assertEqual(client.server_settings(), {"version": "2025.11.1"})
+
+    @httpretty.activate(verbose=True, allow_net_connect=False)
+    def test_errors_are_not_cached(self):
+        httpretty.register_uri(httpretty.GET, "http://test-server/__api__/server_settings", status=500, body="oops")
+        client = RSConnectClient(RSConnectServer("http://test-server", "key"))
+        with self.assertRaises(RSConnectException):
+            client.server_settings()
+        self.assertEqual(self.cache.count(), 0)
+
+
+class ServerInfoCacheScopeTestCase(TestCase):
+    def test_cache_belongs_to_the_command(self):
+        self.assertIsNone(server_info_cache())
+        with click.Context(cli) as ctx:
+            ctx.invoke(cli)
+            cache = server_info_cache()
+            self.assertIsInstance(cache, ServerInfoCache)
+            self.assertIs(RSConnectClient(RSConnectServer("http://test-server", "key")).server_info_cache, cache)
+        with click.Context(cli) as ctx:
+            ctx.invoke(cli, no_server_cache=True)
+            self.assertIsNone(server_info_cache())
+        self.assertIsNone(server_info_cache())
+
+
+class TaskWatcherTestCase(TestCase):
+    def setUp(self):
+        self.outputs = {
+            "task-1": [["a"], [], ["b", "c"]],
+            "task-2": [[], ["x"]],
+            "task-3": [[], [], [], [], [], []],
+        }
+        self.calls = []
+        self.watcher = TaskWatcher(RSConnectServer("http://test-server", "key"), poll_wait=0.01, max_poll_wait=0.04)
+        self.watcher._client.task_get = self.task_get
+
+    def tearDown(self):
+        self.watcher.close()
+
+    def task_get(self, task_id, first=None, wait=None):
+        self.calls.append((task_id, first))
+        outputs = self.outputs[task_id]
+        index = 0 if first is None else first + 1
+        return dict(
+            output=outputs[index],
+            last=index,
+            finished=index == len(outputs) - 1,
+            code=1 if task_id == "task-2" else 0,
+            result=None,
+            error="",
+        )
+
+    def test_watch(self):
+        lines = {"task-1": [], "task-2": [], "task-3": []}
+        futures = {task_id: self.watcher.watch(task_id, lines[task_id].append) for task_id in lines}
+
+        self.assertEqual(futures["task-1"].result(5)["last"], 2)
+        self.assertEqual(futures["task-2"].result(5)["code"], 1)
+        self.assertEqual(futures["task-3"].result(5)["last"], 5)
+        # Each poll's output is passed on at once.
+        self.assertEqual(lines["task-1"], [["a"], ["b", "c"]])
+        self.assertEqual(lines["task-2"], [["x", "Task failed. Task exited with status 1."]])
+        self.assertEqual(lines["task-3"], [])
+        self.assertEqual(self.watcher.polls, 11)
+        self.assertEqual([first for task_id, first in self.calls if task_id == "task-1"], [None, 0, 1])
+
+    def test_abort(self):
+        future = self.watcher.watch("task-3", lambda lines: None, abort_func=lambda: True)
+        with self.assertRaises(RSConnectException) as context:
+            future.result(5)
+        self.assertEqual(context.exception.message, "Task aborted.")
+        self.assertEqual(self.calls, [])
+
+    def test_close(self):
+        self.watcher.max_poll_wait = 60
+        future = self.watcher.watch("task-3", lambda lines: None)
+        while not self.calls:
+            time.sleep(0.01)
+        self.watcher.close()
+        self.assertTrue(future.cancelled())
+        with self.assertRaises(RSConnectException):
+            self.watcher.watch("task-1", lambda lines: None)
+
+
+class RSConnectExecutorDeltaDeployTestCase(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.ce = RSConnectExecutor(None, None, "http://test-server/", "api_key", path=self.tempdir)
+        self.ce.app_store = AppStore(join(self.tempdir, "app.py"))
+        self.ce.app_store.set(
+            self.ce.remote_server.url,
+            self.tempdir,
+            "http://test-server/content/abc-123/",
+            "1",
+            "abc-123",
+            "Title",
+            "python-api",
+            bundle_id="7",
+            bundle_digest="digest",
+        )
+        self.ce.app_id = "abc-123"
+        self.ce.bundle_digest = "digest"
+
+    def test_unchanged_bundle_id(self):
+        self.assertEqual(self.ce.unchanged_bundle_id(), "7")
+
+    def test_changed_bundle(self):
+        self.ce.bundle_digest = "other"
+        self.assertIsNone(self.ce.unchanged_bundle_id())
+
+    def test_other_content(self):
+        self.ce.app_id = "def-456"
+        self.assertIsNone(self.ce.unchanged_bundle_id())
+
+    def test_new_content(self):
+        self.ce.app_id = None
+        self.assertIsNone(self.ce.unchanged_bundle_id())
+
+    def test_force_upload(self):
+        self.ce.force_upload = True
+        self.assertIsNone(self.ce.unchanged_bundle_id())
+
+    def test_compression_level(self):
+        self.ce.title = "Title"
+        self.ce.compression_level = 1
+        self.ce.make_bundle(BundleArchive(self.tempdir).to_file, stream=False)
+        self.assertEqual(self.ce.bundle.compression_level, 1)
+
+        with self.assertRaisesRegex(RSConnectException, "between 1 and 9"):
+            RSConnectExecutor(None, None, "http://test-server/", "api_key", path=self.tempdir, compression_level=0)
+
+    def test_make_bundle_uses_bundle_cache(self):
+        self.ce.title = "Title"
+        self.ce.make_bundle(BundleArchive(self.tempdir).to_file, stream=False)
+        self.assertIsInstance(self.ce.bundle.cache, BundleCache)
+
+        self.ce.use_bundle_cache = False
+        self.ce.make_bundle(BundleArchive(self.tempdir).to_file, stream=False)
+        self.assertIsNone(self.ce.bundle.cache)
+
 
 class ShinyappsServiceTestCase(TestCase):
     def setUp(self) -> None:
@@ -332,7 +606,7 @@ class ShinyappsServiceTestCase(TestCase):
 
         self.cloud_client.set_bundle_status.assert_called_with(bundle_id, "ready")
         self.cloud_client.deploy_application.assert_called_with(bundle_id, app_id)
-        self.cloud_client.wait_until_task_is_successful.assert_called_with(task_id)
+        self.cloud_client.wait_until_task_is_successful.assert_called_with(task_id, log_callback=ANY)
 
     def test_do_deploy_failure(self):
         bundle_id = 1
@@ -352,10 +626,224 @@ class ShinyappsServiceTestCase(TestCase):
 
         self.cloud_client.set_bundle_status.assert_called_with(bundle_id, "ready")
         self.cloud_client.deploy_application.assert_called_with(bundle_id, app_id)
-        self.cloud_client.wait_until_task_is_successful.assert_called_with(task_id)
+        self.cloud_client.wait_until_task_is_successful.assert_called_with(task_id, log_callback=ANY)
         self.cloud_client.get_shinyapps_build_task.assert_called_with(task_id)
         self.cloud_client.get_task_logs.assert_called_with(build_task_id)
 
+    def test_do_deploy_failure_after_following_logs(self):
+        def wait(task_id, log_callback):
+            log_callback("here's why it failed")
+            raise DeploymentFailedException("uh oh")
+
+        self.cloud_client.deploy_application.return_value = {"id": 3}
+        self.cloud_client.wait_until_task_is_successful.side_effect = wait
+
+        with pytest.raises(DeploymentFailedException):
+            self.service.do_deploy(1, 2)
+
+        self.cloud_client.get_task_logs.assert_not_called()
+
+
+class FindUniqueNameTestCase(TestCase):
+    def test_connect_name_is_free(self):
+        with patch.object(RSConnectClient, "content_list", return_value=[]) as content_list:
+            self.assertEqual(find_unique_name(RSConnectServer("http://test-server", "key"), "dashboard"), "dashboard")
+        content_list.assert_called_once_with(filters={"name": "dashboard"})
+
+    def test_connect_name_is_taken(self):
+        names = ["dashboard", "dashboard1", "dashboard2", "dashboard4", "dashboard-old", "other"]
+        listing = [{"name": name} for name in names]
+        with patch.object(RSConnectClient, "content_list", side_effect=[listing[:1], listing]) as content_list:
+            self.assertEqual(find_unique_name(RSConnectServer("http://test-server", "key"), "dashboard"), "dashboard3")
+        self.assertEqual(content_list.call_args_list, [call(filters={"name": "dashboard"}), call()])
+
+    @httpretty.activate(verbose=True, allow_net_connect=False)
+    def test_connect_name_is_taken_with_service_principal(self):
+        # A service principal has no user, so v1/user would be rejected with a 403.
+        httpretty.register_uri(
+            httpretty.GET,
+            "http://test-server/__api__/v1/user",
+            body=json.dumps({"code": 22, "error": "You don't have permission to perform this operation."}),
+            status=403,
+            forcing_headers={"Content-Type": "application/json"},
+        )
+
+        def content(request, uri, response_headers):
+            names = request.querystring.get("name", ["dashboard", "dashboard1", "someone-elses"])
+            return [200, response_headers, json.dumps([{"name": name} for name in names])]
+
+        httpretty.register_uri(
+            httpretty.GET,
+            "http://test-server/__api__/v1/content",
+            body=content,
+            forcing_headers={"Content-Type": "application/json"},
+        )
+        self.assertEqual(find_unique_name(RSConnectServer("http://test-server", "key"), "dashboard"), "dashboard2")
+        self.assertNotIn("/__api__/v1/user", [request.path for request in httpretty.latest_requests()])
+
+    def test_shinyapps_pages(self):
+        pages = [
+            {"applications": [{"name": "myapp"}, {"name": "myapp1"}], "count": 2, "total": 5},
+            {"applications": [{"name": "myapp2"}, {"name": "myapp3"}], "count": 2, "total": 5},
+            {"applications": [{"name": "myapp5"}], "count": 1, "total": 5},
+        ]
+        server = ShinyappsServer("https://api.shinyapps.io", "the_account", "the_token", "c2VjcmV0")
+        with patch.object(PositClient, "_get_applications_like_name_page", side_effect=pages) as get_page:
+            self.assertEqual(find_unique_name(server, "myapp"), "myapp4")
+        self.assertEqual([call.args for call in get_page.call_args_list], [("myapp", 0), ("myapp", 2), ("myapp", 4)])
+
+    def test_shinyapps_stops_on_empty_page(self):
+        pages = [
+            {"applications": [{"name": "myapp"}], "count": 1, "total": 3},
+            {"applications": [], "count": 0, "total": 3},
+        ]
+        client = PositClient(ShinyappsServer("https://api.shinyapps.io", "the_account", "the_token", "c2VjcmV0"))
+        with patch.object(PositClient, "_get_applications_like_name_page", side_effect=pages):
+            self.assertEqual(client.get_applications_like_name("myapp"), ["myapp"])
+
+
+class PositClientTestCase(TestCase):
+    def setUp(self):
+        self.client = PositClient(ShinyappsServer("https://api.shinyapps.io", "the_account", "the_token", "c2VjcmV0"))
+        self.now = 0.0
+        self.sleeps = []
+
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+        patchers = [
+            patch("rsconnect.api.time.sleep", sleep),
+            patch("rsconnect.api.time.monotonic", lambda: self.now),
+            patch("rsconnect.api.random.uniform", lambda low, high: 1),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tasks(self, *statuses, error=None):
+        return [
+            dict(finished=index == len(statuses) - 1, status=status, description=f"{status} app", error=error)
+            for index, status in enumerate(statuses)
+        ]
+
+    def test_wait_backs_off_until_the_status_changes(self):
+        self.client.get_task = Mock(side_effect=self.tasks(*["building"] * 7, "deploying", "deploying", "success"))
+        with patch("builtins.print") as print_:
+            self.client.wait_until_task_is_successful("task-1", poll_wait=1, max_poll_wait=4, backoff=2)
+
+        self.assertEqual(self.sleeps, [1, 2, 4, 4, 4, 4, 4, 1, 2])
+        printed = [call.args[0] for call in print_.call_args_list if call.args]
+        self.assertEqual(
+            printed,
+            [
+                "Waiting for task: task-1",
+                "  building - building app",
+                "  deploying - deploying app",
+                "Task done: success app",
+            ],
+        )
+
+    def test_wait_times_out_on_the_clock(self):
+        self.client.get_task = Mock(side_effect=self.tasks(*["building"] * 100))
+        with patch("builtins.print"), self.assertRaises(RSConnectException):
+            self.client.wait_until_task_is_successful("task-1", timeout=10, poll_wait=3, backoff=1)
+
+        self.assertEqual(self.sleeps, [3, 3, 3, 1])
+        self.assertEqual(self.client.get_task.call_count, 5)
+
+    def test_wait_follows_the_build_log(self):
+        # Polled every 4 seconds: the status changes at 28 seconds and the deploy fails at 32.
+        statuses = ["building"] * 7 + ["deploying", "failed"]
+        self.client.get_task = Mock(side_effect=self.tasks(*statuses, error="oops"))
+        self.client.get_shinyapps_build_task = Mock(side_effect=[{"tasks": []}, {"tasks": [{"id": "build-1"}]}])
+        logs = ["one\ntw", "one\ntwo\n", "one\ntwo\nthree\n", "one\ntwo\nthree\nfour"]
+        fetched = []
+
+        def get_task_logs(task_id):
+            fetched.append(self.now)
+            return Mock(response_body=logs[len(fetched) - 1])
+
+        self.client.get_task_logs = Mock(side_effect=get_task_logs)
+        lines = []
+
+        with patch("builtins.print"), self.assertRaises(DeploymentFailedException):
+            self.client.wait_until_task_is_successful(
+                "task-1", poll_wait=4, max_poll_wait=4, backoff=1, log_callback=lines.append
+            )
+
+        self.assertEqual(lines, ["one", "two", "three", "four"])
+        self.client.get_task_logs.assert_called_with("build-1")
+        self.assertEqual(self.client.get_shinyapps_build_task.call_count, 2)
+        # At most every 10 seconds, and when the status changes or the deploy finishes.
+        self.assertEqual(fetched, [12, 24, 28, 32])
+
+    def test_empty_body_checksum(self):
+        headers = self.client.get_extra_headers("https://api.shinyapps.io/v1/tasks/1", "GET", None)
+        self.assertEqual(headers["X-Content-Checksum"], "d41d8cd98f00b204e9800998ecf8427e")
+        headers = self.client.get_extra_headers("https://api.shinyapps.io/v1/bundles", "POST", '{"a": 1}')
+        self.assertEqual(headers["X-Content-Checksum"], hashlib.md5(b'{"a": 1}').hexdigest())
+
+
+class S3ClientTestCase(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = S3Client("https://bucket.s3.amazonaws.com")
+        self.bodies = []
+
+    def respond(self, *responses):
+        def do_request(method, path, query_params, body, *args):
+            self.bodies.append(body.read())
+            return responses[len(self.bodies) - 1]
+
+        return patch.object(self.client, "_do_request", side_effect=do_request)
+
+    def ok(self):
+        response = HTTPResponse("/bundle")
+        response.status = 200
+        return response
+
+    def failed(self, status=None):
+        if status is None:
+            return HTTPResponse("/bundle", exception=ConnectionResetError("reset"))
+        response = HTTPResponse("/bundle")
+        response.status = status
+        response.reason = "Error"
+        return response
+
+    @patch("rsconnect.http_support.random.uniform", side_effect=lambda low, high: high)
+    @patch("rsconnect.http_support.time.sleep")
+    def test_upload_retried_from_start(self, sleep, uniform):
+        contents = io.BytesIO(b"bundle-contents")
+        with self.respond(self.failed(), self.failed(500), self.ok()):
+            response = self.client.upload("/bundle", "checksum", 15, contents)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.bodies, [b"bundle-contents"] * 3)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [4.0, 8.0])
+
+    @patch("rsconnect.http_support.time.sleep")
+    def test_upload_retries_are_shown(self, sleep):
+        contents = io.BytesIO(b"bundle-contents")
+        with self.respond(self.failed(), self.ok()), self.assertLogs("rsconnect", "INFO") as logs:
+            self.client.upload("/bundle", "checksum", 15, contents)
+        self.assertIn("PUT /bundle failed (reset); retry 1 of 2", logs.output[0])
+
+    @patch("rsconnect.http_support.time.sleep")
+    def test_upload_gives_up(self, sleep):
+        contents = io.BytesIO(b"bundle-contents")
+        with self.respond(self.failed(), self.failed(), self.failed()):
+            response = self.client.upload("/bundle", "checksum", 15, contents)
+        self.assertIsNotNone(response.exception)
+        self.assertEqual(len(self.bodies), 3)
+
+    @patch("rsconnect.http_support.time.sleep")
+    def test_client_errors_not_retried(self, sleep):
+        with self.respond(self.failed(403)):
+            response = self.client.upload("/bundle", "checksum", 15, io.BytesIO(b"bundle-contents"))
+        self.assertEqual(response.status, 403)
+        self.assertEqual(len(self.bodies), 1)
+        sleep.assert_not_called()
+
 
 class SPCSConnectServerTestCase(TestCase):
     def test_init(self):
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import io
 import json
 import os
@@ -36,6 +37,24 @@ from rsconnect.bundle import (
     make_tensorflow_bundle,
     make_tensorflow_manifest,
     make_voila_bundle,
+    Bundle,
+    BundleArchive,
+    BundleFile,
+    BundleStream,
+    CONNECT_CHECKSUM_WORKERS,
+    CONNECT_STREAM_BUNDLE,
+    SOURCE_DATE_EPOCH,
+    checksum_workers,
+    create_file_list,
+    source_date_epoch,
+    bundle_size_and_checksum,
+    file_checksum,
+    file_checksums,
+    manifest_add_file,
+    manifest_add_files,
+    bundle_add_buffer,
+    buffer_checksum,
+    bundle_add_file,
     default_title_from_bundle,
     open_bundle,
     read_bundle_app_mode,
@@ -50,6 +69,7 @@ from rsconnect.shiny_express import escape_to_var_name
 from rsconnect.environment_node import NodeEnvironment
 from rsconnect.environment import Environment, PackageInstaller
 from rsconnect.exception import RSConnectException
+from rsconnect.metadata import ChecksumCache
 from rsconnect.models import AppModes
 
 from .utils import get_dir, get_manifest_path
@@ -3442,3 +3462,316 @@ def test_resolve_shiny_express_entrypoint_normalizes_py_extension(tmp_path):
 def test_resolve_shiny_express_entrypoint_non_express_unchanged(tmp_path):
     (tmp_path / "app.py").write_text("from shiny import App\n")
     assert resolve_shiny_express_entrypoint("app.py", str(tmp_path)) == "app.py"
+
+
+def _archive_with_files(tmp_path):
+    (tmp_path / "app.py").write_text("import this\n")
+    (tmp_path / "data.csv").write_text("a,b\n1,2\n" * 1000)
+    archive = BundleArchive()
+    bundle_add_buffer(archive, "manifest.json", json.dumps({"version": 1}))
+    bundle_add_file(archive, "app.py", str(tmp_path))
+    bundle_add_file(archive, "data.csv", str(tmp_path))
+    return archive
+
+
+def _tar_contents(fileobj):
+    with tarfile.open(mode="r:gz", fileobj=io.BytesIO(fileobj.read())) as tar:
+        return {name: tar.extractfile(name).read() for name in tar.getnames()}
+
+
+class TestBundleArchive:
+    def test_to_file(self, tmp_path):
+        bundle_file = _archive_with_files(tmp_path).to_file(stream=False)
+        assert bundle_file.tell() == 0
+        contents = _tar_contents(bundle_file)
+        assert list(contents) == ["manifest.json", "app.py", "data.csv"]
+        assert contents["app.py"] == b"import this\n"
+
+    def test_stream_matches_file(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        stream = archive.to_file(stream=True)
+        assert isinstance(stream, BundleFile)
+        assert isinstance(stream._open(), BundleStream)
+        assert _tar_contents(stream) == _tar_contents(archive.to_file(stream=False))
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_bundle_size_and_checksum(self, tmp_path, stream):
+        archive = _archive_with_files(tmp_path)
+        expected = archive.to_file(stream=False).read()
+        bundle, size, checksum = bundle_size_and_checksum(archive.to_file(stream=stream))
+        assert size == len(expected)
+        assert checksum == hashlib.md5(expected).hexdigest()
+        assert bundle.seekable()
+        assert bundle.read() == expected
+
+    def test_stream_from_environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(CONNECT_STREAM_BUNDLE, "true")
+        assert isinstance(_archive_with_files(tmp_path).to_file()._open(), BundleStream)
+        monkeypatch.setenv(CONNECT_STREAM_BUNDLE, "0")
+        assert not isinstance(_archive_with_files(tmp_path).to_file()._open(), BundleStream)
+
+    def test_stream_missing_file(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        (tmp_path / "missing.txt").write_text("deleted before the bundle is built")
+        bundle_add_file(archive, "missing.txt", str(tmp_path))
+        stream = archive.to_file(stream=True)
+        (tmp_path / "missing.txt").unlink()
+        with pytest.raises(RSConnectException, match="Unable to include the file .*missing.txt"):
+            stream.read()
+
+    def test_stream_close_stops_producer(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        (tmp_path / "big.bin").write_bytes(os.urandom(4 * 1024 * 1024))
+        bundle_add_file(archive, "big.bin", str(tmp_path))
+        stream = archive.to_file(stream=True)
+        stream.read(1024)
+        stream.close()
+        stream._file._thread.join(timeout=5)
+        assert not stream._file._thread.is_alive()
+
+    def test_compression_level(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        (tmp_path / "image.png").write_bytes(os.urandom(100000))
+        bundle_add_file(archive, "image.png", str(tmp_path))
+        fast = archive.to_file(stream=False)
+        fast.compression_level = 1
+        fast = fast.read()
+        smallest = archive.to_file(stream=False).read()
+        assert len(smallest) < len(fast)
+        assert _tar_contents(io.BytesIO(fast)) == _tar_contents(io.BytesIO(smallest))
+
+    def test_to_file_is_lazy(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        with mock.patch.object(archive, "write") as write:
+            bundle_file = archive.to_file(stream=False)
+            assert bundle_file.digest() == archive.digest()
+            write.assert_not_called()
+
+    def test_digest(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        digest = archive.digest()
+        assert digest == _archive_with_files(tmp_path).digest()
+
+        (tmp_path / "app.py").write_text("import antigravity\n")
+        assert archive.digest() != digest
+        bundle_add_buffer(archive, "extra.txt", "extra")
+        assert archive.digest() != _archive_with_files(tmp_path).digest()
+
+    def test_digest_includes_mode(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        digest = archive.digest()
+        (tmp_path / "app.py").chmod(0o664)
+        assert archive.digest() == digest
+        (tmp_path / "app.py").chmod(0o755)
+        assert archive.digest() != digest
+        archive.to_file(stream=False).read()
+        assert archive.written_digest() == archive.digest()
+
+    def test_digest_uses_known_checksums(self, tmp_path):
+        digest = _archive_with_files(tmp_path).digest()
+        archive = BundleArchive(checksums={"app.py": file_checksum(str(tmp_path / "app.py"))})
+        bundle_add_buffer(archive, "manifest.json", json.dumps({"version": 1}))
+        bundle_add_file(archive, "app.py", str(tmp_path))
+        bundle_add_file(archive, "data.csv", str(tmp_path))
+        with mock.patch("rsconnect.bundle.file_checksums", wraps=file_checksums) as checksums:
+            assert archive.digest() == digest
+        # Only the file the manifest has no checksum for is read.
+        checksums.assert_called_once_with([str(tmp_path / "data.csv")], cache=None)
+
+    def test_to_file_missing_file(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        bundle_add_file(archive, "missing.txt", str(tmp_path))
+        with pytest.raises(FileNotFoundError):
+            archive.to_file()
+
+    def test_digest_with_directory(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        (tmp_path / "subdir").mkdir()
+        archive.add(str(tmp_path / "subdir"), arcname="subdir")
+        assert archive.digest() is None
+
+    def test_reproducible(self, tmp_path, monkeypatch):
+        copies = []
+        for i, name in enumerate(["one", "two"]):
+            directory = tmp_path / name
+            directory.mkdir()
+            archive = _archive_with_files(directory)
+            (directory / "run.sh").write_text("#!/bin/sh\n")
+            (directory / "run.sh").chmod(0o770 if i else 0o755)
+            (directory / "data.csv").chmod(0o600 if i else 0o664)
+            bundle_add_file(archive, "run.sh", str(directory))
+            for path in directory.iterdir():
+                os.utime(path, (2000000000 + i, 2000000000 + i))
+            copies.append(archive)
+
+        monkeypatch.setenv(SOURCE_DATE_EPOCH, "1700000000")
+        first, second = [archive.to_file(stream=False).read() for archive in copies]
+        assert first == second
+        with tarfile.open(mode="r:gz", fileobj=io.BytesIO(first)) as tar:
+            members = {member.name: member for member in tar.getmembers()}
+        assert members["run.sh"].mode == 0o755
+        assert members["data.csv"].mode == 0o644
+        assert members["data.csv"].mtime == 1700000000
+        assert {(m.uid, m.gid, m.uname, m.gname) for m in members.values()} == {(0, 0, "", "")}
+
+        monkeypatch.delenv(SOURCE_DATE_EPOCH)
+        first, second = [archive.to_file(stream=False).read() for archive in copies]
+        assert first != second
+        assert first == copies[0].to_file(stream=False).read()
+
+    def test_source_date_epoch(self, monkeypatch):
+        monkeypatch.delenv(SOURCE_DATE_EPOCH, raising=False)
+        assert source_date_epoch() is None
+        monkeypatch.setenv(SOURCE_DATE_EPOCH, "1700000000")
+        assert source_date_epoch() == 1700000000
+        for value in ["yesterday", "-1"]:
+            monkeypatch.setenv(SOURCE_DATE_EPOCH, value)
+            with pytest.raises(RSConnectException, match=SOURCE_DATE_EPOCH):
+                source_date_epoch()
+
+    def test_bundle_members_are_sorted(self, tmp_path):
+        names = ["b.py", "c.py", "a.py", "sub/z.py", "sub/a.py"]
+        for name in names:
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_text(name)
+        bundle = Bundle()
+        for name in names:
+            bundle.add_file(str(tmp_path / name))
+        bundle.add_to_buffer("manifest.json", "{}")
+        assert list(_tar_contents(bundle.to_file(str(tmp_path)))) == sorted(names) + ["manifest.json"]
+
+    def test_write_records_checksums(self, tmp_path):
+        archive = _archive_with_files(tmp_path)
+        (tmp_path / "link.py").symlink_to("app.py")
+        archive.add(str(tmp_path / "link.py"), arcname="link.py")
+        contents = _tar_contents(archive.to_file(stream=False))
+        assert archive.checksums == {
+            "app.py": file_checksum(tmp_path / "app.py"),
+            "data.csv": file_checksum(tmp_path / "data.csv"),
+        }
+        assert archive.checksums["data.csv"] == buffer_checksum(contents["data.csv"])
+
+    def test_write_fills_checksum_cache(self, tmp_path, monkeypatch):
+        config_dir = str(tmp_path / "config")
+        monkeypatch.setattr("rsconnect.metadata.config_dirname", lambda: config_dir)
+        archive = _archive_with_files(tmp_path)
+        archive.base_dir = str(tmp_path)
+        for name in ["app.py", "data.csv"]:
+            os.utime(tmp_path / name, ns=(10**18, 10**18))
+        archive.to_file(stream=False).read()
+
+        paths = [str(tmp_path / "app.py"), str(tmp_path / "data.csv")]
+        with mock.patch("rsconnect.bundle.file_checksum") as checksum:
+            assert file_checksums(paths, cache=ChecksumCache(str(tmp_path), config_dir)) == [
+                archive.checksums["app.py"],
+                archive.checksums["data.csv"],
+            ]
+            checksum.assert_not_called()
+
+
+class TestFileChecksums:
+    def test_file_checksums_keep_order(self, tmp_path):
+        paths = []
+        for i in range(50):
+            path = tmp_path / ("file%02d.txt" % i)
+            path.write_bytes(os.urandom(i * 1000))
+            paths.append(str(path))
+        expected = [file_checksum(path) for path in paths]
+        assert file_checksums(paths, workers=8) == expected
+        assert file_checksums(paths, workers=1) == expected
+        assert file_checksums([]) == []
+
+    def test_file_checksum_mmap(self, tmp_path):
+        path = tmp_path / "big.bin"
+        data = os.urandom(300000)
+        path.write_bytes(data)
+        with mock.patch("rsconnect.bundle._CHECKSUM_MMAP_THRESHOLD", 1000):
+            assert file_checksum(path) == buffer_checksum(data)
+        with mock.patch("rsconnect.bundle._CHECKSUM_CHUNK_SIZE", 4096):
+            assert file_checksum(path) == buffer_checksum(data)
+        (tmp_path / "empty").write_bytes(b"")
+        assert file_checksum(tmp_path / "empty") == buffer_checksum(b"")
+
+    def test_manifest_add_files(self, tmp_path):
+        for name in ["b.py", "a.py", "c.txt"]:
+            (tmp_path / name).write_text(name)
+        rel_paths = ["b.py", "a.py", "c.txt"]
+        serial = {"files": {}}
+        for rel_path in rel_paths:
+            manifest_add_file(serial, rel_path, str(tmp_path))
+        concurrent = {}
+        manifest_add_files(concurrent, rel_paths, str(tmp_path))
+        assert list(concurrent["files"].items()) == list(serial["files"].items())
+
+    def test_checksum_workers(self, monkeypatch):
+        monkeypatch.delenv(CONNECT_CHECKSUM_WORKERS, raising=False)
+        assert checksum_workers() >= 1
+        monkeypatch.setenv(CONNECT_CHECKSUM_WORKERS, "3")
+        assert checksum_workers() == 3
+        for value in ["0", "many"]:
+            monkeypatch.setenv(CONNECT_CHECKSUM_WORKERS, value)
+            with pytest.raises(RSConnectException, match=CONNECT_CHECKSUM_WORKERS):
+                checksum_workers()
+
+    def test_file_checksums_cache(self, tmp_path):
+        paths = []
+        for name in ["a.txt", "b.txt"]:
+            path = tmp_path / name
+            path.write_text(name)
+            os.utime(path, ns=(10**18, 10**18))
+            paths.append(str(path))
+        expected = [file_checksum(path) for path in paths]
+        config_dir = str(tmp_path / "config")
+        assert file_checksums(paths, cache=ChecksumCache(str(tmp_path), config_dir)) == expected
+        assert (tmp_path / "config" / "checksums").exists()
+
+        with mock.patch("rsconnect.bundle.file_checksum") as checksum:
+            assert file_checksums(paths, cache=ChecksumCache(str(tmp_path), config_dir)) == expected
+            checksum.assert_not_called()
+
+    def test_checksum_cache_disabled(self, tmp_path):
+        assert isinstance(BundleArchive(str(tmp_path))._checksum_cache(), ChecksumCache)
+        assert BundleArchive(str(tmp_path), use_checksum_cache=False)._checksum_cache() is None
+        assert BundleArchive()._checksum_cache() is None
+
+
+class TestCreateFileList:
+    def make_tree(self, root):
+        for rel_path in ["app.py", "lib/util.py", "data/big/a.csv", "data/big/b.csv", "node_modules/x/index.js"]:
+            path = root / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(rel_path)
+
+    def test_excluded_directories_are_not_read(self, tmp_path):
+        self.make_tree(tmp_path)
+        scanned = []
+        real_scandir = os.scandir
+
+        def scandir(path):
+            scanned.append(os.path.relpath(path, str(tmp_path)))
+            return real_scandir(path)
+
+        with mock.patch("rsconnect.bundle.os.scandir", side_effect=scandir):
+            file_list = create_file_list(str(tmp_path), [], ["data"])
+        assert file_list == ["app.py", os.path.join("lib", "util.py")]
+        assert sorted(scanned) == [".", "lib"]
+
+    def test_extra_file_in_excluded_directory(self, tmp_path):
+        self.make_tree(tmp_path)
+        extra = os.path.join("data", "big", "a.csv")
+        assert create_file_list(str(tmp_path), [extra], ["data"]) == [
+            "app.py",
+            extra,
+            os.path.join("lib", "util.py"),
+        ]
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="symlinks require privileges on Windows")
+    def test_directory_symlinks_are_not_followed(self, tmp_path):
+        self.make_tree(tmp_path)
+        os.symlink(str(tmp_path / "lib"), str(tmp_path / "lib-link"))
+        os.symlink(str(tmp_path / "app.py"), str(tmp_path / "app-link.py"))
+        assert create_file_list(str(tmp_path), [], ["data"]) == [
+            "app-link.py",
+            "app.py",
+            os.path.join("lib", "util.py"),
+        ]
@@ -0,0 +1,188 @@
+import os
+import tarfile
+import tempfile
+import time
+from os.path import join
+from unittest import TestCase, mock
+
+from click.testing import CliRunner
+
+from rsconnect.bundle import BundleArchive, BundleFile, bundle_add_buffer, bundle_add_file
+from rsconnect.bundle_cache import (
+    CONNECT_BUNDLE_CACHE_SIZE,
+    DEFAULT_BUNDLE_CACHE_SIZE,
+    BundleCache,
+    bundle_cache_size,
+    parse_size,
+)
+from rsconnect.exception import RSConnectException
+from rsconnect.main import cli
+
+
+class TestBundleCache(TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.cache = BundleCache(join(self.temp.name, "bundles"), max_size=1000)
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def add(self, key, data, last_used=None):
+        writer = self.cache.writer(key)
+        writer.write(data)
+        self.assertTrue(writer.commit())
+        if last_used is not None:
+            os.utime(self.cache.path(key), (last_used, last_used))
+
+    def test_key(self):
+        self.assertEqual(BundleCache.key("abc", 9), BundleCache.key("abc", 9))
+        self.assertNotEqual(BundleCache.key("abc", 9), BundleCache.key("abc", 1))
+        self.assertNotEqual(BundleCache.key("abc", 9), BundleCache.key("abd", 9))
+        self.assertNotEqual(BundleCache.key("abc", 9), BundleCache.key("abc", 9, 1700000000))
+
+    def test_get_and_commit(self):
+        self.assertIsNone(self.cache.get("key"))
+        writer = self.cache.writer("key")
+        writer.write(b"partial")
+        self.assertIsNone(self.cache.get("key"))
+        writer.commit()
+        with self.cache.get("key") as cached:
+            self.assertEqual(cached.read(), b"partial")
+
+    def test_discard(self):
+        writer = self.cache.writer("key")
+        writer.write(b"data")
+        writer.discard()
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_prune_least_recently_used(self):
+        now = time.time()
+        self.add("old", b"x" * 400, now - 300)
+        self.add("middle", b"x" * 400, now - 200)
+        self.add("new", b"x" * 400, now - 100)
+        self.assertEqual([entry.key for entry in self.cache.entries()], ["new", "middle"])
+
+        # Using a bundle makes it the most recently used.
+        self.cache.get("middle").close()
+        removed = self.cache.prune(max_size=500)
+        self.assertEqual([entry.key for entry in removed], ["new"])
+        self.assertEqual([entry.key for entry in self.cache.entries()], ["middle"])
+
+        self.cache.prune(max_size=0)
+        self.assertEqual(self.cache.entries(), [])
+
+    def test_prune_removes_stale_temp_files(self):
+        os.makedirs(self.cache.directory)
+        stale = join(self.cache.directory, ".tmpstale")
+        fresh = join(self.cache.directory, ".tmpfresh")
+        for path in (stale, fresh):
+            with open(path, "wb") as f:
+                f.write(b"partial")
+        os.utime(stale, (time.time() - 2 * 24 * 60 * 60,) * 2)
+        self.cache.prune()
+        self.assertEqual(os.listdir(self.cache.directory), [".tmpfresh"])
+
+    def test_unwritable_cache(self):
+        blocker = join(self.temp.name, "file")
+        with open(blocker, "w") as f:
+            f.write("not a directory")
+        cache = BundleCache(join(blocker, "bundles"))
+        writer = cache.writer("key")
+        self.assertTrue(writer.failed)
+        self.assertEqual(writer.write(b"data"), 4)
+        self.assertFalse(writer.commit())
+        self.assertEqual(cache.entries(), [])
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("0"), 0)
+        self.assertEqual(parse_size("1024"), 1024)
+        self.assertEqual(parse_size("500M"), 500 * 1024 * 1024)
+        self.assertEqual(parse_size("2g"), 2 * 1024**3)
+        self.assertEqual(parse_size("10KiB"), 10 * 1024)
+        with self.assertRaises(RSConnectException):
+            parse_size("lots")
+
+    def test_bundle_cache_size(self):
+        with mock.patch.dict(os.environ, {CONNECT_BUNDLE_CACHE_SIZE: ""}):
+            self.assertEqual(bundle_cache_size(), DEFAULT_BUNDLE_CACHE_SIZE)
+        with mock.patch.dict(os.environ, {CONNECT_BUNDLE_CACHE_SIZE: "100M"}):
+            self.assertEqual(bundle_cache_size(), 100 * 1024 * 1024)
+        with mock.patch.dict(os.environ, {CONNECT_BUNDLE_CACHE_SIZE: "big"}):
+            with self.assertRaisesRegex(RSConnectException, CONNECT_BUNDLE_CACHE_SIZE):
+                bundle_cache_size()
+
+
+class TestBundleFileCache(TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.project = join(self.temp.name, "project")
+        os.makedirs(self.project)
+        with open(join(self.project, "app.py"), "w") as f:
+            f.write("import this\n")
+        self.cache = BundleCache(join(self.temp.name, "bundles"), max_size=10**9)
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def make_bundle(self, stream=False):
+        archive = BundleArchive(self.project)
+        bundle_add_buffer(archive, "manifest.json", '{"version": 1}')
+        bundle_add_file(archive, "app.py", self.project)
+        bundle_file = archive.to_file(stream=stream)
+        assert isinstance(bundle_file, BundleFile)
+        bundle_file.cache = self.cache
+        return bundle_file
+
+    def test_reuses_cached_bundle(self):
+        for stream in (False, True):
+            first = self.make_bundle(stream).read()
+            self.assertEqual(len(self.cache.entries()), 1)
+
+            bundle_file = self.make_bundle(stream)
+            with mock.patch.object(bundle_file.archive, "write") as write:
+                self.assertEqual(bundle_file.read(), first)
+                write.assert_not_called()
+            self.cache.prune(max_size=0)
+
+    def test_changed_files_are_rebuilt(self):
+        self.make_bundle().read()
+        with open(join(self.project, "app.py"), "w") as f:
+            f.write("import antigravity\n")
+        bundle_file = self.make_bundle()
+        with tarfile.open(fileobj=bundle_file, mode="r:gz") as tar:
+            self.assertEqual(tar.extractfile("app.py").read(), b"import antigravity\n")
+        self.assertEqual(len(self.cache.entries()), 2)
+
+    def test_file_changed_while_building_is_not_cached(self):
+        bundle_file = self.make_bundle()
+        bundle_file.digest()
+        with open(join(self.project, "app.py"), "w") as f:
+            f.write("import antigravity\n")
+        bundle_file.read()
+        self.assertEqual(self.cache.entries(), [])
+
+
+class TestBundleCacheCommands(TestCase):
+    def test_ls_and_prune(self):
+        with tempfile.TemporaryDirectory() as config_dir, mock.patch(
+            "rsconnect.bundle_cache.config_dirname", return_value=config_dir
+        ):
+            runner = CliRunner()
+            result = runner.invoke(cli, ["bundle", "cache", "ls"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("The bundle cache is empty.", result.output)
+
+            writer = BundleCache().writer("abc123")
+            writer.write(b"x" * 2048)
+            writer.commit()
+
+            result = runner.invoke(cli, ["bundle", "cache", "ls"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("abc123", result.output)
+            self.assertIn("2.0 KiB", result.output)
+
+            result = runner.invoke(cli, ["bundle", "cache", "prune", "--max-size", "0"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("Removed 1 bundles (2.0 KiB).", result.output)
+            self.assertEqual(BundleCache().entries(), [])
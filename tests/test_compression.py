@@ -0,0 +1,78 @@
+import gzip
+import io
+import os
+import zlib
+from unittest import TestCase, mock
+
+from rsconnect.compression import (
+    CONNECT_COMPRESSION_WORKERS,
+    STORE_ONLY,
+    ParallelGzipWriter,
+    compression_workers,
+    is_precompressed,
+)
+from rsconnect.exception import RSConnectException
+
+TEXT = b"".join(b"line %d of some compressible text\n" % i for i in range(20000))
+
+
+class TestParallelGzipWriter(TestCase):
+    def compress(self, chunks, **kwargs):
+        out = io.BytesIO()
+        with ParallelGzipWriter(out, block_size=4096, **kwargs) as writer:
+            for chunk in chunks:
+                if isinstance(chunk, int):
+                    writer.set_level(chunk)
+                else:
+                    writer.write(chunk)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        for workers in (1, 4):
+            for level in (1, 6, 9):
+                compressed = self.compress([TEXT[:1000], TEXT[1000:]], level=level, workers=workers)
+                self.assertEqual(gzip.decompress(compressed), TEXT)
+                self.assertLess(len(compressed), len(TEXT) // 5)
+
+    def test_same_output_for_any_worker_count(self):
+        self.assertEqual(self.compress([TEXT], workers=1), self.compress([TEXT], workers=8))
+
+    def test_empty(self):
+        self.assertEqual(gzip.decompress(self.compress([], workers=2)), b"")
+
+    def test_store_only(self):
+        data = os.urandom(50000)
+        compressed = self.compress([TEXT, STORE_ONLY, data, 9, TEXT], level=9, workers=2)
+        self.assertEqual(gzip.decompress(compressed), TEXT + data + TEXT)
+        # Stored data grows only by the few bytes of deflate block headers.
+        self.assertLess(len(compressed), len(data) + len(TEXT) // 5)
+
+    def test_trailer(self):
+        compressed = self.compress([TEXT], workers=3)
+        self.assertEqual(compressed[:2], b"\x1f\x8b")
+        self.assertEqual(int.from_bytes(compressed[-8:-4], "little"), zlib.crc32(TEXT))
+        self.assertEqual(int.from_bytes(compressed[-4:], "little"), len(TEXT))
+
+    def test_tell(self):
+        writer = ParallelGzipWriter(io.BytesIO(), workers=1)
+        writer.write(b"abc")
+        self.assertEqual(writer.tell(), 3)
+        writer.close()
+
+
+class TestCompressionSettings(TestCase):
+    def test_is_precompressed(self):
+        for name in ["data/model.onnx", "img/logo.PNG", "table.parquet", "archive.zip", "a.tar.gz"]:
+            self.assertTrue(is_precompressed(name), name)
+        for name in ["app.py", "data.csv", "README", "notebook.ipynb"]:
+            self.assertFalse(is_precompressed(name), name)
+
+    def test_compression_workers(self):
+        with mock.patch.dict(os.environ, {CONNECT_COMPRESSION_WORKERS: "3"}):
+            self.assertEqual(compression_workers(), 3)
+        with mock.patch.dict(os.environ, {CONNECT_COMPRESSION_WORKERS: ""}):
+            self.assertGreaterEqual(compression_workers(), 1)
+        for value in ["0", "lots"]:
+            with mock.patch.dict(os.environ, {CONNECT_COMPRESSION_WORKERS: value}):
+                with self.assertRaises(RSConnectException):
+                    compression_workers()
@@ -0,0 +1,254 @@
+import asyncio
+import gzip
+import json
+from http.server import BaseHTTPRequestHandler
+from unittest import TestCase, mock
+
+from rsconnect.api import AsyncRSConnectClient, RSConnectServer
+from rsconnect.http_async import AsyncHTTPServer
+from rsconnect.http_support import HTTPResponse, RetryPolicy
+from rsconnect.http_timing import add_request_timing_hook, remove_request_timing_hook
+
+from .utils import serve_http
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def respond(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request_body = self.rfile.read(length).decode("utf-8") if length else None
+        self.server.requests.append((self.command, self.path, self.client_address, dict(self.headers)))
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/target")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/not-modified":
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        if self.path.endswith("/unauthorized") and self.headers.get("Authorization") != "Bearer fresh":
+            self.send_response(401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.endswith("/busy"):
+            self.send_response(429)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/hang-up":
+            self.close_connection = True
+            return
+        if self.path == "/flaky" and len(self.server.requests) == 1:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = json.dumps({"method": self.command, "path": self.path, "body": request_body}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if self.path == "/cookie":
+            self.send_header("Set-Cookie", "session=abc")
+        if self.path == "/gzip":
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        if self.path == "/chunked":
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(body), 7):
+                chunk = body[start : start + 7]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncHTTPServer(TestCase):
+    def setUp(self):
+        self.server, self.url = serve_http(self, _Handler, requests=[])
+
+    def run_with_client(self, coroutine, **kwargs):
+        async def run():
+            async with AsyncHTTPServer(self.url, **kwargs) as client:
+                return await coroutine(client)
+
+        return asyncio.run(run())
+
+    def connections_used(self):
+        return len({client_address for _, _, client_address, _ in self.server.requests})
+
+    def test_concurrent_requests(self):
+        async def fetch(client):
+            return await asyncio.gather(*[client.get("/item/%d" % i) for i in range(50)])
+
+        responses = self.run_with_client(fetch, max_connections=4)
+        self.assertEqual([response.json_data["path"] for response in responses], ["/item/%d" % i for i in range(50)])
+        self.assertLessEqual(self.connections_used(), 4)
+
+    def test_connections_are_reused(self):
+        async def fetch(client):
+            for path in ["/a", "/b", "/c"]:
+                await client.get(path)
+
+        self.run_with_client(fetch)
+        self.assertEqual(self.connections_used(), 1)
+
+    def test_sent_request_resent_only_if_idempotent(self):
+        async def send(client):
+            client.retry_policy = RetryPolicy(max_retries=0)
+            await client.get("/a")
+            once = await client.post("/hang-up", body={})
+            await client.get("/a")
+            twice = await client.post("/hang-up", body={}, headers={"Idempotency-Key": "abc"})
+            return once, twice
+
+        once, twice = self.run_with_client(send)
+        self.assertIsNotNone(once.exception)
+        self.assertIsNotNone(twice.exception)
+        paths = [path for _, path, _, _ in self.server.requests]
+        self.assertEqual(paths, ["/a", "/hang-up", "/a", "/hang-up", "/hang-up"])
+
+    def test_bodies(self):
+        async def send(client):
+            return [
+                await client.post("/post", body={"a": 1}),
+                await client.put("/put", body=b"raw", decode_response=False),
+                await client.delete("/delete"),
+            ]
+
+        post, put, delete = self.run_with_client(send)
+        self.assertEqual(post.json_data["body"], '{"a": 1}')
+        self.assertEqual(put.json_data["body"], "raw")
+        self.assertEqual(delete.json_data["method"], "DELETE")
+
+    def test_response_framing_and_encoding(self):
+        async def fetch(client):
+            return [await client.get(path) for path in ["/chunked", "/gzip"]]
+
+        chunked, gzipped = self.run_with_client(fetch)
+        self.assertEqual(chunked.json_data["path"], "/chunked")
+        self.assertEqual(gzipped.json_data["path"], "/gzip")
+        self.assertEqual(self.server.requests[0][3]["Accept-Encoding"], "gzip, deflate")
+
+    def test_redirects_and_cookies(self):
+        async def fetch(client):
+            redirected = await client.get("/redirect")
+            await client.get("/cookie")
+            await client.get("/after")
+            return redirected
+
+        response = self.run_with_client(fetch)
+        self.assertEqual(response.json_data["path"], "/target")
+        self.assertEqual(self.server.requests[-1][3]["Cookie"], "session=abc")
+
+    def test_retries(self):
+        async def no_sleep(delay):
+            pass
+
+        with mock.patch("rsconnect.http_async.asyncio.sleep", no_sleep):
+            response = self.run_with_client(lambda client: client.get("/flaky"))
+        self.assertEqual(response.json_data["path"], "/flaky")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_not_modified_and_raw_response(self):
+        async def fetch(client):
+            return await client.get("/not-modified"), await client.request("GET", "/a", raw_response=True)
+
+        not_modified, raw = self.run_with_client(fetch)
+        self.assertEqual(not_modified.status, 304)
+        self.assertEqual(not_modified.getheader("ETag"), '"v1"')
+        self.assertIsInstance(raw, HTTPResponse)
+        self.assertEqual(raw.json_data["path"], "/a")
+
+    def test_timing_hooks(self):
+        timings = []
+        add_request_timing_hook(timings.append)
+        try:
+            self.run_with_client(lambda client: client.get("/a"))
+        finally:
+            remove_request_timing_hook(timings.append)
+        self.assertEqual([(timing.method, timing.path, timing.status) for timing in timings], [("GET", "/a", 200)])
+        self.assertEqual(set(timings[0].phases), {"connect", "send", "wait", "receive"})
+
+    def test_connection_error(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with mock.patch.object(AsyncHTTPServer.retry_policy, "max_retries", 0):
+            response = self.run_with_client(lambda client: client.get("/a"))
+        self.assertIsInstance(response, HTTPResponse)
+        self.assertIsInstance(response.exception, ConnectionError)
+
+
+class TestAsyncRSConnectClient(TestCase):
+    def setUp(self):
+        self.server, url = serve_http(self, _Handler, requests=[])
+        self.url = url.rstrip("/")
+
+    def test_authorization_and_paths(self):
+        async def fetch():
+            async with AsyncRSConnectClient(RSConnectServer(self.url, "the-key")) as client:
+                return await asyncio.gather(client.content_get("abc"), client.content_get("def"))
+
+        responses = asyncio.run(fetch())
+        self.assertEqual(
+            [response["path"] for response in responses], ["/__api__/v1/content/abc", "/__api__/v1/content/def"]
+        )
+        self.assertEqual({request[3]["Authorization"] for request in self.server.requests}, {"Key the-key"})
+
+    def test_token_refresh(self):
+        server = RSConnectServer(self.url, None)
+        server.oauth_client_id = "client"
+        server.oauth_access_token = "stale"
+
+        def refresh(client):
+            client.authorization("Bearer fresh")
+            return True
+
+        async def fetch():
+            async with AsyncRSConnectClient(server) as client:
+                with mock.patch.object(client, "_attempt_token_refresh", side_effect=lambda: refresh(client)):
+                    return await client.get("/unauthorized"), client._attempt_token_refresh.call_count
+
+        response, refreshes = asyncio.run(fetch())
+        self.assertEqual(response["path"], "/__api__/unauthorized")
+        self.assertEqual(refreshes, 1)
+        self.assertEqual(
+            [request[3]["Authorization"] for request in self.server.requests], ["Bearer stale", "Bearer fresh"]
+        )
+
+    def test_429_throttles_later_requests(self):
+        real_sleep = asyncio.sleep
+        sleeps = []
+
+        async def recording_sleep(delay):
+            sleeps.append(delay)
+            await real_sleep(delay)
+
+        async def fetch():
+            async with AsyncRSConnectClient(RSConnectServer(self.url, "the-key", rate_limit=20)) as client:
+                busy = await client.get("/busy")
+                await client.get("/after")
+                return busy, client.rate_limiter
+
+        with mock.patch.object(AsyncHTTPServer.retry_policy, "max_retries", 0), mock.patch(
+            "rsconnect.http_support.asyncio.sleep", recording_sleep
+        ):
+            busy, limiter = asyncio.run(fetch())
+        self.assertEqual(busy.status, 429)
+        self.assertEqual(limiter.throttled, 1)
+        self.assertLess(limiter.rate, 20)
+        # The request after the 429 waits for a token at the halved rate.
+        self.assertEqual(len(sleeps), 1)
+        self.assertAlmostEqual(sleeps[0], 0.1, delta=0.02)
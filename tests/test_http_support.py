@@ -1,14 +1,42 @@
-from unittest import TestCase
+import hashlib
+import http.client
+import io
+import json
+import os
+import shutil
+import socket
+import ssl
+import tempfile
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler
+from unittest import TestCase, mock
+
+import pytest
 
 from rsconnect.http_support import (
+    DOWNLOAD_CHUNK_SIZE,
+    ConnectionPool,
     _connection_factory,
+    _connection_pool,
+    _ssl_context,
+    _TimedHTTPConnection,
+    _tls_sessions,
+    _transfer_stats,
     _user_agent,
     _create_ssl_connection,
     append_to_path,
+    create_multipart_form_data,
+    create_multipart_form_data_stream,
     HTTPServer,
     CookieJar,
+    HTTPResponse,
+    RateLimiter,
+    RetryPolicy,
 )
 
+from .utils import serve_http
+
 
 class TestHTTPSupport(TestCase):
     def test_connection_factory_map(self):
@@ -21,6 +49,29 @@ class TestHTTPSupport(TestCase):
         with self.assertRaises(ValueError):
             _create_ssl_connection(None, None, True, "fake")
 
+    def test_create_ssl_connection_ca_data_skips_proxy(self):
+        environ = {"https_proxy": "https://proxy.example.com:3128", "no_proxy": "#"}
+        with mock.patch.dict(os.environ, environ), mock.patch("rsconnect.http_support._ssl_context"):
+            conn = _create_ssl_connection("connect.example.com", None, False, "ca-data")
+        self.assertEqual((conn.host, conn.port), ("connect.example.com", 443))
+        self.assertIsNone(conn._tunnel_host)
+
+    def test_timed_connection_uses_resolved_address(self):
+        sockaddr = ("fe80::1", 8080, 0, 3)
+        addresses = [(socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", sockaddr)]
+        conn = _TimedHTTPConnection("connect.example.com", 8080, timeout=7, source_address=("::", 0))
+        with mock.patch("socket.getaddrinfo", return_value=addresses) as getaddrinfo, mock.patch(
+            "socket.socket"
+        ) as socket_class:
+            sock = conn._create_connection(("connect.example.com", 8080), 7, ("::", 0))
+
+        getaddrinfo.assert_called_once()
+        socket_class.assert_called_once_with(socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        sock.settimeout.assert_called_once_with(7)
+        sock.bind.assert_called_once_with(("::", 0))
+        sock.connect.assert_called_once_with(sockaddr)
+        self.assertEqual(set(conn.connect_timings), {"dns", "connect"})
+
     def test_append_to_path(self):
         self.assertEqual(append_to_path("path/", "/sub"), "path/sub")
         self.assertEqual(append_to_path("path", "sub"), "path/sub")
@@ -109,3 +160,496 @@ class TestCookieJar(TestCase):
                 "content": {"my-cookie": "my-value", "my-2nd-cookie": "my-other-value"},
             },
         )
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append(self.client_address)
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/close":
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.server.posts.append(self.path)
+        self.rfile.read(int(self.headers["Content-Length"]))
+        # Hang up without answering, like a server closing an idle connection just
+        # as a request arrives.
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionPool(TestCase):
+    def setUp(self):
+        self.server, self.url = serve_http(self, _KeepAliveHandler, requests=[], posts=[])
+
+    def connections_used(self):
+        return len(set(self.server.requests))
+
+    def test_clients_share_connections(self):
+        for path in ["/a", "/b", "/c"]:
+            self.assertEqual(HTTPServer(self.url).get(path).json_data, {"path": path})
+        with HTTPServer(self.url) as server:
+            server.get("/d")
+            server.get("/e")
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(self.connections_used(), 1)
+
+    def test_connection_close(self):
+        HTTPServer(self.url).get("/close")
+        HTTPServer(self.url).get("/a")
+        self.assertEqual(self.connections_used(), 2)
+
+    def idle_connection(self):
+        ((conn, _),) = [idle for connections in _connection_pool._idle.values() for idle in connections]
+        return conn
+
+    def test_dropped_idle_connection_is_replaced(self):
+        HTTPServer(self.url).get("/a")
+        self.idle_connection().sock.shutdown(socket.SHUT_RDWR)
+        self.assertEqual(HTTPServer(self.url).get("/b").json_data, {"path": "/b"})
+        self.assertEqual(self.connections_used(), 2)
+
+    def test_request_retried_when_reused_connection_was_closed(self):
+        HTTPServer(self.url).get("/a")
+        self.idle_connection().sock.shutdown(socket.SHUT_RDWR)
+        with mock.patch("rsconnect.http_support._is_connection_dropped", return_value=False):
+            self.assertEqual(HTTPServer(self.url).get("/b").json_data, {"path": "/b"})
+        self.assertEqual(self.connections_used(), 2)
+
+    def test_sent_request_resent_only_if_idempotent(self):
+        HTTPServer(self.url).get("/a")
+        server = HTTPServer(self.url)
+        server.retry_policy = RetryPolicy(max_retries=0)
+        response = server.post("/once", body={})
+        self.assertIsInstance(response.exception, http.client.RemoteDisconnected)
+        self.assertEqual(self.server.posts, ["/once"])
+
+        HTTPServer(self.url).get("/a")
+        response = server.post("/twice", body={}, headers={"Idempotency-Key": "abc"})
+        self.assertIsNotNone(response.exception)
+        self.assertEqual(self.server.posts, ["/once", "/twice", "/twice"])
+
+    def test_idle_timeout(self):
+        HTTPServer(self.url).get("/a")
+        conn = self.idle_connection()
+        with mock.patch.object(_connection_pool, "idle_timeout", 0):
+            HTTPServer(self.url).get("/b")
+        self.assertIsNone(conn.sock)
+        self.assertEqual(self.connections_used(), 2)
+
+    def test_max_idle_per_host(self):
+        pool = ConnectionPool(max_idle_per_host=1)
+        servers = [HTTPServer(self.url) for _ in range(3)]
+        conns = []
+        for server in servers:
+            conn, _ = pool.acquire(server._pool_key(), server._new_connection)
+            conn.connect()
+            conns.append(conn)
+        for server, conn in zip(servers, conns):
+            pool.release(server._pool_key(), conn)
+        self.assertEqual(sum(len(idle) for idle in pool._idle.values()), 1)
+        self.assertIsNone(conns[1].sock)
+        self.assertIsNone(conns[2].sock)
+        pool.clear()
+        self.assertIsNone(conns[0].sock)
+
+
+class TestTLSSessionResumption(TestCase):
+    def setUp(self):
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(
+            "tests/testdata/certificates/localhost.crt", "tests/testdata/certificates/localhost.key"
+        )
+        self.server, self.url = serve_http(self, _KeepAliveHandler, context, requests=[])
+        _tls_sessions.clear()
+
+    def tearDown(self):
+        _tls_sessions.clear()
+
+    def test_contexts_are_shared(self):
+        self.assertIs(_ssl_context(True, None), _ssl_context(True, None))
+        self.assertIsNot(_ssl_context(True, None), _ssl_context(False, None))
+
+    def test_sessions_are_resumed(self):
+        for path in ["/a", "/b", "/c"]:
+            response = HTTPServer(self.url, disable_tls_check=True).get(path)
+            self.assertEqual(response.json_data, {"path": path})
+            # Force a new connection for the next request.
+            _connection_pool.clear()
+        self.assertEqual(_tls_sessions.handshakes, 1)
+        self.assertEqual(_tls_sessions.resumptions, 2)
+
+
+class _DownloadHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    payload = bytes(range(256)) * 10000
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get("Range"))
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"][len("bytes=") : -1])
+            if start >= len(self.payload):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes %d-%d/%d" % (start, len(self.payload) - 1, len(self.payload)))
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/gzip")
+        self.send_header("Content-Length", str(len(self.payload) - start))
+        self.end_headers()
+        self.wfile.write(self.payload[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownload(TestCase):
+    def setUp(self):
+        self.server, self.url = serve_http(self, _DownloadHandler, ranges=[])
+        self.dir = tempfile.mkdtemp()
+        self.destination = os.path.join(self.dir, "bundle.tar.gz")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write_partial_download(self, data):
+        with open(HTTPServer(self.url)._partial_download_path("/bundle", self.destination), "wb") as f:
+            f.write(data)
+
+    def test_download(self):
+        hasher = hashlib.sha256()
+        progress = []
+        response = HTTPServer(self.url).download(
+            "/bundle", self.destination, hasher=hasher, progress=lambda *args: progress.append(args)
+        )
+        self.assertEqual(response.status, 200)
+        self.assertIsNone(response.response_body)
+        with open(self.destination, "rb") as f:
+            self.assertEqual(f.read(), _DownloadHandler.payload)
+        self.assertEqual(hasher.hexdigest(), hashlib.sha256(_DownloadHandler.payload).hexdigest())
+        total = len(_DownloadHandler.payload)
+        self.assertEqual(len(progress), -(-total // DOWNLOAD_CHUNK_SIZE))
+        self.assertEqual(progress[-1], (total, total))
+        self.assertEqual(os.listdir(self.dir), ["bundle.tar.gz"])
+
+    def test_resume(self):
+        self.write_partial_download(_DownloadHandler.payload[:1000])
+        hasher = hashlib.sha256()
+        response = HTTPServer(self.url).download("/bundle", self.destination, hasher=hasher)
+        self.assertEqual(response.status, 206)
+        self.assertEqual(self.server.ranges, ["bytes=1000-"])
+        with open(self.destination, "rb") as f:
+            self.assertEqual(f.read(), _DownloadHandler.payload)
+        self.assertEqual(hasher.hexdigest(), hashlib.sha256(_DownloadHandler.payload).hexdigest())
+
+    def test_resume_disabled(self):
+        self.write_partial_download(b"stale")
+        HTTPServer(self.url).download("/bundle", self.destination, resume=False)
+        self.assertEqual(self.server.ranges, [None])
+        with open(self.destination, "rb") as f:
+            self.assertEqual(f.read(), _DownloadHandler.payload)
+
+    def test_unsatisfiable_range_restarts(self):
+        self.write_partial_download(_DownloadHandler.payload + b"extra")
+        response = HTTPServer(self.url).download("/bundle", self.destination)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.server.ranges, ["bytes=%d-" % (len(_DownloadHandler.payload) + 5), None])
+        with open(self.destination, "rb") as f:
+            self.assertEqual(f.read(), _DownloadHandler.payload)
+
+    def test_error_response_is_not_written(self):
+        response = HTTPServer(self.url).download("/missing", self.destination)
+        self.assertEqual(response.status, 404)
+        self.assertEqual(os.listdir(self.dir), [])
+
+
+class _UnseekableReader(io.RawIOBase):
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self._data.readinto(b)
+
+
+class TestMultipartFormDataStream(TestCase):
+    def fields(self, archive):
+        return {"archive": ("bundle.tar.gz", archive, "application/x-tar"), "metadata": '{"a": "b"}'}
+
+    def test_matches_bytes_body(self):
+        data = bytes(range(256)) * 1000
+        expected, _ = create_multipart_form_data(self.fields(data), boundary="xyz")
+        stream, content_type = create_multipart_form_data_stream(self.fields(io.BytesIO(data)), boundary="xyz")
+        self.assertEqual(content_type, "multipart/form-data; boundary=xyz")
+        self.assertEqual(stream.length, len(expected))
+        self.assertEqual(stream.read(), expected)
+
+        stream.seek(100)
+        self.assertEqual(stream.read(), expected[100:])
+        stream.seek(len(expected) - 50)
+        self.assertEqual(stream.tell(), len(expected) - 50)
+        self.assertEqual(stream.read(), expected[-50:])
+
+    def test_unseekable_file(self):
+        data = b"bundle" * 1000
+        expected, _ = create_multipart_form_data(self.fields(data), boundary="xyz")
+        stream, _ = create_multipart_form_data_stream(self.fields(_UnseekableReader(data)), boundary="xyz")
+        self.assertFalse(stream.seekable())
+        self.assertIsNone(stream.length)
+        self.assertEqual(stream.read(), expected)
+
+
+class _CompressingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.accept_encodings.append(self.headers.get("Accept-Encoding"))
+        body = json.dumps({"items": [{"path": self.path}] * 1000}).encode("utf-8")
+        encoding = self.path.strip("/")
+        if encoding == "gzip":
+            compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            compressor = zlib.compressobj()
+        elif encoding == "raw-deflate":
+            compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+            encoding = "deflate"
+        elif encoding == "broken":
+            compressor = None
+            body = b"not gzip data"
+            encoding = "gzip"
+        else:
+            compressor = None
+        if compressor is not None:
+            body = compressor.compress(body) + compressor.flush()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding != "plain":
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResponseDecoding(TestCase):
+    def setUp(self):
+        self.server, self.url = serve_http(self, _CompressingHandler, accept_encodings=[])
+        _transfer_stats.clear()
+
+    def tearDown(self):
+        _transfer_stats.clear()
+
+    def test_compressed_responses_are_decoded(self):
+        for path in ["/gzip", "/deflate", "/raw-deflate", "/plain"]:
+            response = HTTPServer(self.url).get(path)
+            self.assertEqual(response.json_data, {"items": [{"path": path}] * 1000})
+        self.assertEqual(self.server.accept_encodings, ["gzip, deflate"] * 4)
+        self.assertLess(_transfer_stats.received, _transfer_stats.decoded / 10)
+
+    def test_invalid_compressed_response(self):
+        response = HTTPServer(self.url).get("/broken")
+        self.assertIn("Unable to decode the gzip response body", str(response.exception))
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def respond(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append((self.command, self.path))
+        if len(self.server.requests) <= self.server.failures:
+            self.send_response(503)
+            self.send_header("Retry-After", "1")
+            body = b""
+        else:
+            self.send_response(200)
+            body = json.dumps({"path": self.path}).encode("utf-8")
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRetries(TestCase):
+    def setUp(self):
+        self.server, self.url = serve_http(self, _FlakyHandler, requests=[], failures=2)
+        sleep_patcher = mock.patch("rsconnect.http_support.time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_get_is_retried(self):
+        self.assertEqual(HTTPServer(self.url).get("/a").json_data, {"path": "/a"})
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [1.0, 1.0])
+
+    def test_retries_are_limited(self):
+        self.server.failures = 10
+        response = HTTPServer(self.url).get("/a")
+        self.assertEqual(response.status, 503)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_post_is_retried_only_with_idempotency_key(self):
+        response = HTTPServer(self.url).post("/a", body={"a": 1})
+        self.assertEqual(response.status, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+        response = HTTPServer(self.url).post("/b", body=b"{}", headers={"Idempotency-Key": "abc"})
+        self.assertEqual(response.json_data, {"path": "/b"})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_json_post_is_retried_with_idempotency_key(self):
+        response = HTTPServer(self.url).post("/c", body={"a": 1}, headers={"Idempotency-Key": "abc"})
+        self.assertEqual(response.json_data, {"path": "/c"})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff=1.0, max_backoff=5.0)
+        response = HTTPResponse("/", exception=ConnectionResetError())
+        with mock.patch("rsconnect.http_support.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual([policy.delay(response, retries) for retries in range(4)], [1.0, 2.0, 4.0, None])
+            policy.max_retries = 5
+            self.assertEqual(policy.delay(response, 4), 5.0)
+        self.assertIsNone(policy.delay(HTTPResponse("/", exception=socket.gaierror()), 0))
+        self.assertIsNone(policy.delay({"ok": True}, 0))
+
+    def test_retry_after_date(self):
+        self.assertEqual(RetryPolicy._retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertEqual(RetryPolicy._retry_after("120"), 120.0)
+        self.assertIsNone(RetryPolicy._retry_after("soon"))
+
+
+def _throttled_response(retry_after=None):
+    headers = {"Retry-After": retry_after}
+    return HTTPResponse("/", response=mock.Mock(status=429, reason="Too Many Requests", getheader=headers.get))
+
+
+class TestRateLimiter(TestCase):
+    def setUp(self):
+        self.now = 100.0
+        clock_patcher = mock.patch("rsconnect.http_support.time.monotonic", side_effect=lambda: self.now)
+        clock_patcher.start()
+        self.addCleanup(clock_patcher.stop)
+        self.waits = []
+
+    def limiter(self, *args, **kwargs):
+        limiter = RateLimiter(*args, **kwargs)
+
+        def wait(timeout=None):
+            self.waits.append(timeout)
+            # A little extra, as a real clock would have moved on by then too.
+            self.now += timeout + 1e-6
+
+        limiter._cond.wait = wait
+        return limiter
+
+    def test_rate(self):
+        limiter = self.limiter(rate=10)
+        for _ in range(10):
+            limiter.release(limiter.acquire(), {})
+        self.assertEqual(self.waits, [])
+        limiter.acquire()
+        self.assertEqual(self.waits, [pytest.approx(0.1)])
+
+    def test_max_in_flight(self):
+        limiter = RateLimiter(max_in_flight=2)
+        started = [limiter.acquire(), limiter.acquire()]
+        third = threading.Thread(target=limiter.acquire)
+        third.start()
+        third.join(0.1)
+        self.assertTrue(third.is_alive())
+        limiter.release(started[0], {})
+        third.join(5)
+        self.assertFalse(third.is_alive())
+
+    def test_throttling(self):
+        limiter = self.limiter(rate=8)
+        first, second = limiter.acquire(), limiter.acquire()
+        self.now += 1
+        limiter.release(first, _throttled_response("2"))
+        self.assertEqual(limiter.rate, 4)
+        # Requests sent before the slowdown don't slow it down again.
+        limiter.release(second, _throttled_response())
+        self.assertEqual(limiter.rate, 4)
+        self.assertEqual(limiter.throttled, 1)
+
+        limiter.acquire()
+        self.assertEqual(self.waits, [2.0])
+        limiter.release(limiter.acquire(), {})
+        self.assertEqual(limiter.rate, 4.25)
+
+        # Clients configured with the same limits keep the throttled rate.
+        limiter.configure(8, None)
+        self.assertEqual(limiter.rate, 4.25)
+        limiter.configure(16, None)
+        self.assertEqual(limiter.rate, 16)
+
+    def test_throttling_without_a_rate(self):
+        limiter = self.limiter()
+        started = [limiter.acquire() for _ in range(20)]
+        limiter.release(started[0], _throttled_response())
+        self.assertEqual(limiter.rate, 10)
+        for _ in range(100):
+            limiter.release(limiter.acquire(), {"ok": True})
+        self.assertGreater(limiter.rate, 15)
+
+
+class _ThrottlingHandler(_FlakyHandler):
+    def respond(self):
+        self.server.requests.append((self.command, self.path))
+        if len(self.server.requests) == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            body = b""
+        else:
+            self.send_response(200)
+            body = b"{}"
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = respond
+
+
+class TestRateLimiting(TestCase):
+    def setUp(self):
+        self.server, self.url = serve_http(self, _ThrottlingHandler, requests=[])
+
+    def test_limiter_is_shared_and_adapts(self):
+        server = HTTPServer(self.url)
+        self.assertIs(server.rate_limiter, HTTPServer(self.url + "__api__").rate_limiter)
+        self.assertIsNot(server.rate_limiter, HTTPServer("http://127.0.0.1:1/").rate_limiter)
+
+        with mock.patch("rsconnect.http_support.time.sleep"):
+            self.assertEqual(server.get("/a").json_data, {})
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(server.rate_limiter.throttled, 1)
+        self.assertIsNotNone(server.rate_limiter.rate)
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+from http.server import BaseHTTPRequestHandler
+from unittest import TestCase
+
+from rsconnect.http_support import HTTPServer, RetryPolicy
+from rsconnect.http_timing import (
+    LatencyHistogram,
+    RequestTiming,
+    RequestTimingStats,
+    TraceFile,
+    add_request_timing_hook,
+    endpoint_template,
+    remove_request_timing_hook,
+)
+
+from .utils import serve_http
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _timing(method, path, duration, **phases):
+    timing = RequestTiming(method, path)
+    timing.started = 1000.0
+    timing.duration = duration
+    timing.phases = phases
+    timing.status = 200
+    return timing
+
+
+class TestRequestTiming(TestCase):
+    def test_endpoint_template(self):
+        self.assertEqual(
+            endpoint_template("/__api__/v1/content/1d2fe6f4-94c5-4a5b-9a8e-2d9b0c1b3f4e/bundles/42?page=2"),
+            "/__api__/v1/content/{guid}/bundles/{id}",
+        )
+        self.assertEqual(endpoint_template("/__api__/v1/tasks/yKNPu3yDblUxUBmE"), "/__api__/v1/tasks/{id}")
+        self.assertEqual(endpoint_template("/__api__/server_settings"), "/__api__/server_settings")
+
+    def test_histogram(self):
+        histogram = LatencyHistogram()
+        for seconds in [0.005] * 90 + [0.3] * 9 + [4.0]:
+            histogram.add(seconds)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(0.5), 0.01)
+        self.assertEqual(histogram.percentile(0.95), 0.5)
+        self.assertEqual(histogram.percentile(1.0), 4.0)
+
+    def test_summary(self):
+        stats = RequestTimingStats()
+        self.assertEqual(stats.summary(), [])
+        stats(_timing("GET", "/v1/tasks/yKNPu3yDblUxUBmE", 0.2, send=0.05, wait=0.1, receive=0.05))
+        stats(_timing("GET", "/v1/tasks/zKNPu3yDblUxUBmE", 0.4, send=0.05, wait=0.3, receive=0.05))
+        stats(_timing("POST", "/v1/content", 1.0, dns=0.1, connect=0.1, send=0.8))
+
+        lines = stats.summary()
+        self.assertEqual(lines[0].split(), ["Endpoint", "Count", "Total", "Mean", "p50", "p95", "Max"])
+        self.assertEqual(
+            lines[1].split(), ["POST", "/v1/content", "1", "1.000s", "1.000s", "1.000s", "1.000s", "1.000s"]
+        )
+        self.assertEqual(lines[2].split()[:5], ["GET", "/v1/tasks/{id}", "2", "0.600s", "0.300s"])
+        self.assertEqual(
+            lines[3],
+            "Time by phase: dns 0.100s, connect 0.100s, send 0.900s, wait 0.400s, receive 0.100s",
+        )
+
+    def test_trace_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "trace.json")
+        trace = TraceFile(path)
+        trace(_timing("GET", "/v1/content/abc", 0.5, dns=0.1, send=0.1, wait=0.2, receive=0.1))
+        trace.write()
+
+        with open(path) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual([event["name"] for event in events], ["GET /v1/content/abc", "dns", "send", "wait", "receive"])
+        self.assertEqual(events[0]["ts"], 1000.0 * 1e6)
+        self.assertEqual(events[0]["args"]["status"], 200)
+        self.assertEqual([round(event["ts"] - events[0]["ts"]) for event in events[1:]], [0, 100000, 200000, 400000])
+
+
+class TestRequestTimingHooks(TestCase):
+    def setUp(self):
+        self.server, self.url = serve_http(self, _Handler)
+        self.timings = []
+        add_request_timing_hook(self.timings.append)
+
+    def tearDown(self):
+        remove_request_timing_hook(self.timings.append)
+
+    def test_requests_are_timed(self):
+        with HTTPServer(self.url) as server:
+            server.get("/a")
+            server.get("/b")
+
+        first, second = self.timings
+        self.assertEqual(first.endpoint, "GET /a")
+        self.assertEqual(first.status, 200)
+        self.assertEqual(set(first.phases), {"dns", "connect", "send", "wait", "receive"})
+        self.assertGreaterEqual(first.duration, sum(first.phases.values()) - 1e-6)
+        # The second request reuses the connection.
+        self.assertEqual(set(second.phases), {"send", "wait", "receive"})
+
+    def test_failures_are_timed(self):
+        self.server.shutdown()
+        self.server.server_close()
+        server = HTTPServer(self.url)
+        server.retry_policy = RetryPolicy(max_retries=0)
+        server.get("/a")
+
+        (timing,) = self.timings
+        self.assertIsNone(timing.status)
@@ -128,7 +128,13 @@ class TestMain:
         ],
     )
     @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_deploy_draft(self, command, target, expected_activate, caplog):
+    def test_deploy_draft(self, command, target, expected_activate, caplog, tmp_path):
+        # Deploy a copy of the project, so the deployment record isn't written into tests/testdata.
+        source = target if os.path.isdir(target) else os.path.dirname(target)
+        project = str(tmp_path / "project")
+        shutil.copytree(source, project)
+        target = os.path.normpath(join(project, os.path.relpath(target, source)))
+
         original_api_key_value = os.environ.pop("CONNECT_API_KEY", None)
         original_server_value = os.environ.pop("CONNECT_SERVER", None)
 
@@ -885,6 +891,22 @@ class TestMain:
             status=200,
         )
 
+        httpretty.register_uri(
+            httpretty.GET,
+            "https://api.shinyapps.io/v1/tasks",
+            body=json.dumps({"tasks": [{"id": 444}]}),
+            adding_headers={"Content-Type": "application/json"},
+            status=200,
+        )
+
+        httpretty.register_uri(
+            httpretty.GET,
+            "https://api.shinyapps.io/v1/tasks/444/logs",
+            body="Building image\n",
+            adding_headers={"Content-Type": "text/plain"},
+            status=200,
+        )
+
         runner = CliRunner()
         args = [
             "deploy",
@@ -1051,6 +1073,22 @@ class TestMain:
             status=200,
         )
 
+        httpretty.register_uri(
+            httpretty.GET,
+            "https://api.shinyapps.io/v1/tasks",
+            body=json.dumps({"tasks": [{"id": 444}]}),
+            adding_headers={"Content-Type": "application/json"},
+            status=200,
+        )
+
+        httpretty.register_uri(
+            httpretty.GET,
+            "https://api.shinyapps.io/v1/tasks/444/logs",
+            body="Building image\n",
+            adding_headers={"Content-Type": "text/plain"},
+            status=200,
+        )
+
         runner = CliRunner()
         args = [
             "deploy",
@@ -2,6 +2,7 @@ import os
 import json
 import shutil
 import tarfile
+import tempfile
 import unittest
 from unittest import mock
 
@@ -17,12 +18,6 @@ from rsconnect.metadata import _normalize_server_url
 
 from .utils import apply_common_args
 
-# These tests need to run in order because they share the same tempdir
-# For some reason setup and teardown aren't enough to fully reset the state
-# between tests. Overriding the env var CONNECT_CONTENT_BUILD_DIR to be a tempdir
-# would be preferable but this is fine for now.
-TEMP_DIR = "rsconnect-build-test"
-
 
 def register_uris(connect_server: str):
     def register_content_endpoints(i: int, guid: str):
@@ -101,10 +96,23 @@ def register_uris(connect_server: str):
 
 
 class TestContentSubcommand(unittest.TestCase):
+    # These tests need to run in order because they share the same content build
+    # directory, and the build store that actions_content keeps for the process.
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.patchers = [
+            mock.patch.dict(os.environ, {"CONNECT_CONTENT_BUILD_DIR": cls.temp_dir}),
+            mock.patch("rsconnect.actions_content._content_build_store", None),
+        ]
+        for patcher in cls.patchers:
+            patcher.start()
+
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(TEMP_DIR):
-            shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        for patcher in reversed(cls.patchers):
+            patcher.stop()
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
 
     def setUp(self):
         self.connect_server = "http://localhost:3939"
@@ -161,21 +169,20 @@ class TestContentSubcommand(unittest.TestCase):
             "-g",
             "7d59c5c7-c4a7-4950-acc3-3943b7192bc4",
             "-o",
-            f"{TEMP_DIR}/bundle.tar.gz",
+            f"{self.temp_dir}/bundle.tar.gz",
         ]
         apply_common_args(args, server=self.connect_server, key=self.api_key)
         result = runner.invoke(cli, args)
         self.assertEqual(result.exit_code, 0, result.output)
-        with tarfile.open(f"{TEMP_DIR}/bundle.tar.gz", mode="r:gz") as tgz:
+        with tarfile.open(f"{self.temp_dir}/bundle.tar.gz", mode="r:gz") as tgz:
             manifest = json.loads(tgz.extractfile("manifest.json").read())
             self.assertIn("metadata", manifest)
 
     @httpretty.activate(verbose=True, allow_net_connect=False)
     def test_content_get_lockfile(self):
         register_uris(self.connect_server)
-        os.makedirs(TEMP_DIR, exist_ok=True)
         runner = CliRunner()
-        output_path = f"{TEMP_DIR}/requirements.txt.lock"
+        output_path = f"{self.temp_dir}/requirements.txt.lock"
         args = [
             "content",
             "get-lockfile",
@@ -219,7 +226,7 @@ class TestContentSubcommand(unittest.TestCase):
     @httpretty.activate(verbose=True, allow_net_connect=False)
     def test_content_venv(self):
         register_uris(self.connect_server)
-        env_path = f"{TEMP_DIR}/venv"
+        env_path = f"{self.temp_dir}/venv"
 
         # Mock subprocess.run so we don't actually invoke uv; capture the calls instead
         with mock.patch("subprocess.run", return_value=mock.Mock(returncode=0)) as mock_run:
@@ -260,7 +267,7 @@ class TestContentSubcommand(unittest.TestCase):
         apply_common_args(args, server=self.connect_server, key=self.api_key)
         result = runner.invoke(cli, args)
         self.assertEqual(result.exit_code, 0, result.output)
-        self.assertTrue(os.path.exists("%s/%s.json" % (TEMP_DIR, _normalize_server_url(self.connect_server))))
+        self.assertTrue(os.path.exists("%s/%s.json" % (self.temp_dir, _normalize_server_url(self.connect_server))))
 
         # list the "tracked" content
         args = ["content", "build", "ls", "-g", "7d59c5c7-c4a7-4950-acc3-3943b7192bc4"]
@@ -308,7 +315,7 @@ class TestContentSubcommand(unittest.TestCase):
         apply_common_args(args, server=self.connect_server, key=self.api_key)
         result = runner.invoke(cli, args)
         self.assertEqual(result.exit_code, 0, result.output)
-        self.assertTrue(os.path.exists("%s/%s.json" % (TEMP_DIR, _normalize_server_url(self.connect_server))))
+        self.assertTrue(os.path.exists("%s/%s.json" % (self.temp_dir, _normalize_server_url(self.connect_server))))
 
         # change the content build status so it looks like it was interrupted/failed
         self.build_store.set_content_item_build_status("7d59c5c7-c4a7-4950-acc3-3943b7192bc4", BuildStatus.RUNNING)
@@ -351,7 +358,7 @@ class TestContentSubcommand(unittest.TestCase):
         apply_common_args(args, server=self.connect_server, key=self.api_key)
         result = runner.invoke(cli, args)
         self.assertEqual(result.exit_code, 0, result.output)
-        self.assertTrue(os.path.exists("%s/%s.json" % (TEMP_DIR, _normalize_server_url(self.connect_server))))
+        self.assertTrue(os.path.exists("%s/%s.json" % (self.temp_dir, _normalize_server_url(self.connect_server))))
 
         # set rsconnect_build_running to true to trigger "already a build running" error
         self.build_store.set_build_running(True)
@@ -387,7 +394,7 @@ class TestContentSubcommand(unittest.TestCase):
         apply_common_args(args, server=self.connect_server, key=self.api_key)
         result = runner.invoke(cli, args)
         self.assertEqual(result.exit_code, 0, result.output)
-        self.assertTrue(os.path.exists("%s/%s.json" % (TEMP_DIR, _normalize_server_url(self.connect_server))))
+        self.assertTrue(os.path.exists("%s/%s.json" % (self.temp_dir, _normalize_server_url(self.connect_server))))
 
         # set rsconnect_build_running to true
         # --force flag should ignore this and not fail.
@@ -439,7 +446,7 @@ class TestContentSubcommand(unittest.TestCase):
         apply_common_args(args, server=self.connect_server, key=self.api_key)
         result = runner.invoke(cli, args)
         self.assertEqual(result.exit_code, 0, result.output)
-        self.assertTrue(os.path.exists("%s/%s.json" % (TEMP_DIR, _normalize_server_url(self.connect_server))))
+        self.assertTrue(os.path.exists("%s/%s.json" % (self.temp_dir, _normalize_server_url(self.connect_server))))
 
         # change the content build status so it looks like it was interrupted/failed
         # --retry used with --force should successfully build content with these statuses.
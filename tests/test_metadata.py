@@ -1,13 +1,16 @@
+import os
 import shutil
 import tempfile
 from os.path import exists, join
-from unittest import TestCase
+from unittest import TestCase, mock
 
 from rsconnect.api import RSConnectServer
 from rsconnect.exception import RSConnectException
 from rsconnect.metadata import (
     AppStore,
+    ChecksumCache,
     ContentBuildStore,
+    ServerInfoCache,
     ServerStore,
     _normalize_server_url,
 )
@@ -176,6 +179,18 @@ class TestServerMetadata(TestCase):
         server_store2 = ServerStore(base_dir=temp)
         self.assertEqual(server_store.get_all_servers(), server_store2.get_all_servers())
 
+    def test_rate_limits(self):
+        self.server_store.set("limited", "http://connect.busy", "apiKey", rate_limit=2.5, max_in_flight=8)
+        self.assertEqual(self.server_store.get_by_name("limited")["rate_limit"], 2.5)
+
+        server_data = self.server_store.resolve("limited", None)
+        self.assertEqual(server_data.rate_limit, 2.5)
+        self.assertEqual(server_data.max_in_flight, 8)
+
+        server_data = self.server_store.resolve("foo", None)
+        self.assertIsNone(server_data.rate_limit)
+        self.assertIsNone(server_data.max_in_flight)
+
     def test_get_path(self):
         self.assertIn("servers.json", self.server_store.get_path())
 
@@ -345,6 +360,124 @@ class TestAppMetadata(TestCase):
         self.assertEqual(new_app_store._data, self.app_store._data)
 
 
+class TestChecksumCache(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.config_dir = tempfile.mkdtemp()
+        self.path = join(self.tempdir, "app.py")
+        with open(self.path, "w") as f:
+            f.write("import this\n")
+        # Files modified within the last couple of seconds aren't cached.
+        os.utime(self.path, ns=(10**18, 10**18))
+        self.stat = os.stat(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        shutil.rmtree(self.config_dir)
+
+    def cache(self, **kwargs):
+        return ChecksumCache(self.tempdir, self.config_dir, **kwargs)
+
+    def test_get_set(self):
+        cache = self.cache()
+        self.assertIsNone(cache.get(self.path, self.stat))
+        cache.set(self.path, self.stat, "abc123")
+        self.assertEqual(cache.get(self.path, self.stat), "abc123")
+
+        with open(self.path, "a") as f:
+            f.write("import antigravity\n")
+        self.assertIsNone(cache.get(self.path, os.stat(self.path)))
+
+    def test_recently_modified_not_cached(self):
+        os.utime(self.path)
+        cache = self.cache()
+        cache.set(self.path, os.stat(self.path), "abc123")
+        self.assertIsNone(cache.get(self.path, os.stat(self.path)))
+
+    def test_save_load(self):
+        cache = self.cache()
+        cache.set(self.path, self.stat, "abc123")
+        cache.save()
+        # The cache is kept in the config directory, not the deployed directory.
+        self.assertEqual(os.listdir(self.tempdir), ["app.py"])
+        self.assertEqual(len(os.listdir(join(self.config_dir, "checksums"))), 1)
+        self.assertEqual(self.cache().get(self.path, self.stat), "abc123")
+
+    def test_hits_are_not_saved(self):
+        cache = self.cache()
+        cache.set(self.path, self.stat, "abc123")
+        cache.save()
+        cache = self.cache()
+        cache.get(self.path, self.stat)
+        with mock.patch("rsconnect.metadata.DataStore.save") as save:
+            cache.save()
+        save.assert_not_called()
+
+    def test_eviction(self):
+        cache = self.cache(max_entries=2)
+        for i, name in enumerate(["a", "b", "c"]):
+            cache.set(join(self.tempdir, name), self.stat, name)
+            cache._data[join(self.tempdir, name)]["used"] = i
+        cache.get(join(self.tempdir, "a"), self.stat)
+        cache.save()
+        self.assertEqual(sorted(self.cache()._data), [join(self.tempdir, "a"), join(self.tempdir, "c")])
+
+    def test_unreadable_cache(self):
+        cache = self.cache()
+        cache.set(self.path, self.stat, "abc123")
+        cache.save()
+        (name,) = os.listdir(join(self.config_dir, "checksums"))
+        with open(join(self.config_dir, "checksums", name), "w") as f:
+            f.write("{not json")
+        self.assertEqual(self.cache().count(), 0)
+
+
+class TestServerInfoCache(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.key = ServerInfoCache.key("http://connect.local", "key-1", "server_settings")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_key(self):
+        self.assertEqual(self.key, ServerInfoCache.key("http://connect.local/", "key-1", "server_settings"))
+        self.assertNotEqual(self.key, ServerInfoCache.key("http://connect.local", "key-2", "server_settings"))
+        self.assertNotEqual(self.key, ServerInfoCache.key("http://connect.local", "key-1", "v1/server_settings/python"))
+        self.assertNotIn("key-1", self.key)
+
+    def test_get_set(self):
+        cache = ServerInfoCache(self.tempdir)
+        self.assertIsNone(cache.get(self.key))
+        cache.set(self.key, {"version": "2025.06.0"}, '"abc"')
+
+        entry = ServerInfoCache(self.tempdir).get(self.key)
+        self.assertEqual(entry["data"], {"version": "2025.06.0"})
+        self.assertEqual(entry["etag"], '"abc"')
+        self.assertTrue(cache.is_fresh(entry))
+
+    def test_ttl(self):
+        cache = ServerInfoCache(self.tempdir, ttl=60)
+        cache.set(self.key, {"version": "2025.06.0"})
+        entry = cache.get(self.key)
+        self.assertNotIn("etag", entry)
+        entry["fetched"] -= 61
+        self.assertFalse(cache.is_fresh(entry))
+
+    def test_long_stale_entries_are_dropped(self):
+        cache = ServerInfoCache(self.tempdir, ttl=60)
+        cache.set(self.key, {"version": "2025.06.0"})
+        cache.get(self.key)["fetched"] -= 601
+        other = ServerInfoCache.key("http://connect.local", "key-2", "server_settings")
+        cache.set(other, {"version": "2025.06.0"})
+        self.assertEqual(list(ServerInfoCache(self.tempdir)._data), [other])
+
+    def test_unreadable_cache(self):
+        with open(join(self.tempdir, "server_info.json"), "w") as f:
+            f.write("{not json")
+        self.assertEqual(ServerInfoCache(self.tempdir).count(), 0)
+
+
 class TestHelpers(TestCase):
     def test_normalize_server_url(self):
         self.assertEqual("localhost_3939", _normalize_server_url("https://localhost:3939"))
@@ -358,7 +491,8 @@ class TestBuildMetadata(TestCase):
         self.server_store = ServerStore()
         self.server_store.set("connect", "https://connect.remote:6443", api_key="apiKey", insecure=True)
         self.server = RSConnectServer("https://connect.remote:6443", api_key="apiKey", insecure=True, ca_data=None)
-        self.build_store = ContentBuildStore(self.server)
+        self.tempdir = tempfile.mkdtemp()
+        self.build_store = ContentBuildStore(self.server, self.tempdir)
         self.build_store._set("rsconnect_build_running", False)
         self.build_store._set(
             "rsconnect_content",
@@ -441,6 +575,9 @@ class TestBuildMetadata(TestCase):
             },
         )
 
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
     def test_get_build_logs_dir(self):
         logs_dir = self.build_store.get_build_logs_dir("015143da-b75f-407c-81b1-99c4a724341e")
         self.assertEqual(
@@ -2,7 +2,7 @@ import os
 
 from unittest import TestCase
 
-from rsconnect.models import AppMode, AppModes, GlobMatcher
+from rsconnect.models import AppMode, AppModes, GlobMatcher, GlobSet
 
 
 class TestModels(TestCase):
@@ -154,6 +154,65 @@ class TestModels(TestCase):
                 expected,
                 f"pattern: {pattern}; path: {path}; expected: {expected}",
             )
+            self.assertEqual(
+                GlobSet([pattern], compiled=True).matches(path),
+                expected,
+                f"compiled pattern: {pattern}; path: {path}; expected: {expected}",
+            )
 
         with self.assertRaises(ValueError):
             GlobMatcher(os.path.join(".", "blah", "**", "blah", "**", "*.txt"))
+
+    def test_compiled_glob_set(self):
+        glob_set = GlobSet(
+            [
+                "proj/venv/**/*",
+                "proj/**/*.pyc",
+                "proj/**/build/**/*.o",
+                "proj/data/[!r]*.csv",
+                "proj/docs/**",
+            ],
+            compiled=True,
+        )
+        cases = [
+            ("proj/venv/lib/site.py", True),
+            ("proj/venv", False),
+            ("proj/venvs/x.py", False),
+            ("proj/a/b/mod.pyc", True),
+            ("proj/mod.py", False),
+            ("proj/build/x.o", True),
+            ("proj/a/build/b/c/x.o", True),
+            ("proj/a/build/b/c/x.c", False),
+            ("proj/data/table.csv", True),
+            ("proj/data/raw.csv", False),
+            ("proj/data/sub/table.csv", False),
+            ("proj/docs", True),
+            ("proj/docs/a/b.md", True),
+            (os.path.join(".", "proj", "venv", "bin", "python"), True),
+        ]
+        for path, expected in cases:
+            self.assertEqual(glob_set.matches(path), expected, f"path: {path}; expected: {expected}")
+
+        self.assertTrue(glob_set.matches_all_under("proj/venv"))
+        self.assertTrue(glob_set.matches_all_under(os.path.join("proj", "venv", "lib")))
+        self.assertFalse(glob_set.matches_all_under("proj"))
+        self.assertFalse(glob_set.matches_all_under("proj/venvs"))
+        self.assertFalse(GlobSet([], compiled=True).matches("anything"))
+
+    def test_glob_matcher_matches_all_under(self):
+        cases = [
+            ("dir/**/*", "dir", True),
+            ("dir/**/*", os.path.join("dir", "sub"), True),
+            ("dir/**/*", "dirother", False),
+            ("dir/**/*", "other", False),
+            ("dir/**/*.txt", "dir", False),
+            ("dir/*", "dir", False),
+            ("dir", "dir", False),
+        ]
+
+        for pattern, path, expected in cases:
+            self.assertEqual(
+                GlobMatcher(pattern).matches_all_under(path),
+                expected,
+                f"pattern: {pattern}; path: {path}; expected: {expected}",
+            )
@@ -436,7 +436,16 @@ class TestStreamBodyRetry:
         call_bodies: list[object] = []
 
         def fake_super_request(
-            self_arg, method, path, query_params, body, maximum_redirects=5, decode_response=True, headers=None
+            self_arg,
+            method,
+            path,
+            query_params,
+            body,
+            maximum_redirects=5,
+            decode_response=True,
+            headers=None,
+            response_sink=None,
+            raw_response=False,
         ):
             call_bodies.append(body.read() if hasattr(body, "read") else body)
             return _make_response(401, None) if len(call_bodies) == 1 else _make_response(200, {"result": "ok"})
@@ -489,7 +498,16 @@ class TestStreamBodyRetry:
         call_bodies: list[object] = []
 
         def fake_super_request(
-            self_arg, method, path, query_params, body, maximum_redirects=5, decode_response=True, headers=None
+            self_arg,
+            method,
+            path,
+            query_params,
+            body,
+            maximum_redirects=5,
+            decode_response=True,
+            headers=None,
+            response_sink=None,
+            raw_response=False,
         ):
             call_bodies.append(body)
             return _make_response(401, None) if len(call_bodies) == 1 else _make_response(200, {"result": "ok"})
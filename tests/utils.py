@@ -1,12 +1,18 @@
 import sys
 import os
+import ssl
+import threading
 import jwt
 import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from os.path import join, dirname, exists
+from typing import Any, Optional, Tuple, Type
+from unittest import TestCase
 from packaging import version
 
 import pytest
 from rsconnect.api import RSConnectServer, RSConnectClient
+from rsconnect.http_support import _connection_pool
 
 
 def apply_common_args(args: list, server=None, key=None, cacert=None, insecure=False):
@@ -21,6 +27,32 @@ def apply_common_args(args: list, server=None, key=None, cacert=None, insecure=F
     return args
 
 
+def serve_http(
+    test: TestCase,
+    handler: Type[BaseHTTPRequestHandler],
+    context: Optional[ssl.SSLContext] = None,
+    **attributes: Any,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start a local server for a test, answering requests with the given handler, and
+    return it and its URL. The attributes are set on the server for the handler to
+    use. When the test ends, pooled connections are dropped and the server is stopped.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    if context is not None:
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Cleanups run last in, first out.
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    test.addCleanup(_connection_pool.clear)
+    scheme = "http" if context is None else "https"
+    return server, "%s://127.0.0.1:%d/" % (scheme, server.server_address[1])
+
+
 def optional_target(default):
     return os.environ.get("CONNECT_DEPLOY_TARGET", default)
 